@@ -1,32 +1,261 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context, g
 from markupsafe import escape
-import pandas as pd
-import threading
-import time
 import os
-from VectrPyLogic import save_options_data, calculate_and_visualize_data
-from sectors import get_etf_performance
-from holdings import update_holdings
-import shutil
-import json
-from plotly.utils import PlotlyJSONEncoder
+import re
+import hashlib
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from VectrPyLogic import (fetch_option_chain, fetch_quote, summarize_chain, summarize_expiration, figure_dict,
+                          compact_figure, totals_annotation_text, ChainSummary, SIDE_DTYPE)
+from sectors import get_etf_performance, PerformanceSnapshot, SECTOR_ETFS, TIMEFRAMES
+from price_store import valid_symbol
+from holdings import HoldingsRefresher, HoldingsFragments, HOLDINGS_PUBLISH_TIME
+from chain_cache import SnapshotCache
+import shared_cache
+import chain_archive
+import metrics
+import profiling
+import compression
+from metrics import span
+import orjson
+import numpy as np
 
 app = Flask(__name__)
 
-# Global variable to track the last update time
-last_holdings_update = 0
-holdings_update_interval = 24 * 60 * 60  # Update once every 24 hours
+# gzip / brotli responses by Accept-Encoding ( see compression.py ); installed first, so it runs after the other hooks
+compression.install(app)
+
+# Opt-in profiling of single requests ( VECTR_PROFILING=1, see profiling.py ); a no-op otherwise
+profiling.install(app)
+
+# Option chains are analyzed in memory; set VECTR_PERSIST_CSV=1 to also keep a CSV copy under <cwd>/<TICKER>/
+persist_option_data = os.environ.get("VECTR_PERSIST_CSV", "0") == "1"
+# Concurrency and time budget for fetching a ticker's expirations
+option_fetch_workers = int(os.environ.get("VECTR_FETCH_WORKERS", "8"))
+option_fetch_deadline = float(os.environ.get("VECTR_FETCH_DEADLINE", "45"))
+# Charts go to the front end with typed arrays and deduplicated dates ( see compact_figure ); 0 sends plain figures
+compact_figures = os.environ.get("VECTR_COMPACT_FIGURES", "1") == "1"
+
+# Chains, summaries, the performance matrix and holdings refreshes shared by the worker processes of a host
+# ( VECTR_SHARED_CACHE=<sqlite file>, see shared_cache.py and gunicorn.conf.py ); None keeps them per process
+shared = shared_cache.from_environment()
+
+# Opt-in daily archive of every fetched chain, for open interest changes ( VECTR_ARCHIVE=1, see chain_archive.py )
+archive = chain_archive.from_environment()
+
+# Recently fetched chains are shared between requests (TTLs in seconds, budget in MB)
+chain_cache = SnapshotCache(
+    ttl=float(os.environ.get("VECTR_CHAIN_TTL", "900")),
+    market_hours_ttl=float(os.environ.get("VECTR_CHAIN_TTL_MARKET", "60")),
+    max_bytes=int(os.environ.get("VECTR_CHAIN_CACHE_MB", "256")) * 1024 * 1024,
+    sizeof=lambda chain: chain.nbytes(),
+    shared=shared,
+    namespace="chains",
+)
+
+
+# Analytics results per chain snapshot; a few KB each, so re-rendering never needs the chain again
+summary_cache = SnapshotCache(
+    ttl=chain_cache.ttl,
+    market_hours_ttl=chain_cache.market_hours_ttl,
+    max_bytes=16 * 1024 * 1024,
+    sizeof=lambda summary: summary.nbytes(),
+    shared=shared,
+    namespace="summaries",
+)
+
+
+class RenderedFigure:
+    """A /process_ticker response body ( {"ticker", "figure"} encoded as JSON ) and its ETag."""
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body, etag):
+        self.body = body
+        self.etag = etag
+
+
+# Rendered figures per ( ticker, width, height, chain snapshot, compact ), so repeated requests skip rendering
+# and encoding; bounded by VECTR_FIGURE_CACHE_MB, least recently used first
+figure_cache = SnapshotCache(
+    ttl=chain_cache.ttl,
+    market_hours_ttl=chain_cache.market_hours_ttl,
+    max_bytes=int(os.environ.get("VECTR_FIGURE_CACHE_MB", "32")) * 1024 * 1024,
+    sizeof=lambda rendered: len(rendered.body),
+)
+
+
+def get_option_chain(ticker, on_expiration=None):
+    """
+    Return the option chain for a ticker, served from the snapshot cache when fresh.
+    on_expiration is only called if this request ends up fetching the chain ( see fetch_option_chain ).
+    """
+    def fetch():
+        chain = fetch_option_chain(ticker, persist=persist_option_data, max_workers=option_fetch_workers,
+                                   deadline=option_fetch_deadline, on_expiration=on_expiration)
+        # Figures rendered from the ticker's previous snapshot won't be asked for again
+        figure_cache.invalidate_where(lambda key: key[0] == ticker)
+        if archive is not None:
+            try:
+                archive.append(chain)
+            except Exception as e:  # The archive is an add-on: never fail the fetch over it
+                print(f"Could not archive the {ticker} chain: {e!r}")
+        return chain
+
+    return chain_cache.get(ticker, fetch)
+
+
+# Parsed holdings and their HTML tables, rebuilt only when a holdings file changes
+holdings_fragments = HoldingsFragments(SECTOR_ETFS)
+
+# Holdings are refreshed once per SSGA publication (New York time), one refresh at a time
+holdings_refresher = HoldingsRefresher(
+    SECTOR_ETFS,
+    publish_time=os.environ.get("VECTR_HOLDINGS_PUBLISH_TIME", HOLDINGS_PUBLISH_TIME),
+    on_success=holdings_fragments.refresh,
+    shared=shared,
+)
+
+# Sector performance matrix, recomputed in the background and only read by the endpoints
+performance_snapshot = PerformanceSnapshot(
+    SECTOR_ETFS, refresh_interval=float(os.environ.get("VECTR_PERFORMANCE_REFRESH", "300")), shared=shared)
+
+
+# Batch requests: tickers per request, threads fetching chains, processes aggregating them (0 = aggregate in-thread)
+batch_max_tickers = int(os.environ.get("VECTR_BATCH_MAX_TICKERS", "50"))
+batch_fetch_workers = int(os.environ.get("VECTR_BATCH_WORKERS", "8"))
+summary_processes = int(os.environ.get("VECTR_SUMMARY_PROCESSES", str(min(4, os.cpu_count() or 1))))
+
+batch_executor = ThreadPoolExecutor(max_workers=batch_fetch_workers, thread_name_prefix="batch")
+_summary_pool = None
+_summary_pool_lock = threading.Lock()
+
+
+def get_summary_pool():
+    """
+    Process pool for summarize_chain(), created on first use.
+    Workers are spawned rather than forked, because forking a process that already runs fetch threads can
+    deadlock the child on a lock held by one of them.
+    """
+    global _summary_pool
+    if summary_processes <= 0:
+        return None
+    with _summary_pool_lock:
+        if _summary_pool is None:
+            _summary_pool = ProcessPoolExecutor(max_workers=summary_processes,
+                                                mp_context=multiprocessing.get_context("spawn"))
+        return _summary_pool
+
+
+def get_chain_summary(ticker, pool=None, quote=None, chain=None):
+    """
+    Return the ChainSummary of the ticker's current chain snapshot ( or of chain ), computing it once per snapshot.
+    With a process pool the quote is still fetched here ( I/O ), but the aggregation runs in a worker process,
+    so it doesn't hold this process's GIL.
+    """
+    chain = chain or get_option_chain(ticker)
+    if pool is None:
+        return summary_cache.get((ticker, chain.fetched_at), lambda: summarize_chain(chain, quote))
+    def summarize_in_pool():
+        quote_data = quote or fetch_quote(ticker)
+        # The worker's own span is recorded in the worker process; time the wait for it here instead
+        with span("summarize"):
+            return pool.submit(summarize_chain, chain, quote_data).result()
+
+    return summary_cache.get((ticker, chain.fetched_at), summarize_in_pool)
+
+
+# Chart size in pixels, unless a request asks for another one ( within the bounds )
+FIGURE_WIDTH, FIGURE_HEIGHT = 1200, 540
+FIGURE_MIN_SIZE, FIGURE_MAX_SIZE = 200, 4000
+
+
+def figure_size(values):
+    """( width, height ) from a request's 'width' / 'height' values, clamped to the bounds; defaults if missing."""
+    def dimension(name, default):
+        value = values.get(name, type=int)
+        return default if value is None else min(max(value, FIGURE_MIN_SIZE), FIGURE_MAX_SIZE)
+
+    return dimension('width', FIGURE_WIDTH), dimension('height', FIGURE_HEIGHT)
+
+
+def client_figure(summary, width=FIGURE_WIDTH, height=FIGURE_HEIGHT, oi_change=None):
+    """A summary's chart as sent to the front end: figure_dict(), compacted unless VECTR_COMPACT_FIGURES=0."""
+    figure = figure_dict(summary, width=width, height=height, oi_change=oi_change)
+    return compact_figure(figure) if compact_figures else figure
+
+
+def figure_cache_key(ticker, chain, width=FIGURE_WIDTH, height=FIGURE_HEIGHT):
+    return ticker, width, height, chain.fetched_at, compact_figures
+
+
+def render_figure(ticker, width=FIGURE_WIDTH, height=FIGURE_HEIGHT, pool=None, quote=None):
+    """
+    The ticker's RenderedFigure for its current chain snapshot, rendered and encoded once per snapshot and size.
+    The ETag is a hash of the body, so a refetched chain with unchanged data keeps it.
+    """
+    chain = get_option_chain(ticker)
+
+    def render():
+        summary = get_chain_summary(ticker, pool, quote, chain)
+        oi_change = archived_oi_change(ticker, chain)
+        body = encode_json({'ticker': ticker, 'figure': client_figure(summary, width, height, oi_change)})
+        return RenderedFigure(body, hashlib.sha1(body).hexdigest())
+
+    return figure_cache.get(figure_cache_key(ticker, chain, width, height), render)
+
+
+def archived_oi_change(ticker, chain):
+    """Open interest change per expiration since the archive's previous day for the chart, or None."""
+    if archive is None:
+        return None
+    try:
+        return archive.expiration_changes(ticker, chain_archive.session_date(chain.fetched_at))
+    except Exception as e:  # The chart goes out without the overlay rather than not at all
+        print(f"Could not read the {ticker} archive: {e!r}")
+        return None
+
 
-def update_holdings_background():
-    """Run the holdings update in a background thread."""
-    def run_update():
-        update_holdings()
-        global last_holdings_update
-        last_holdings_update = time.time()
-    thread = threading.Thread(target=run_update)
-    thread.start()
+def encode_json(payload):
+    """
+    Encode a payload holding figures with orjson, in one pass: the figure goes out as a JSON object, not as a
+    JSON string nested in the response. NaN values ( gaps in the chart ) are written as null.
+    """
+    with span("json_encode"):
+        return orjson.dumps(payload)
 
 
+def conditional_figure(rendered, req=None):
+    """A RenderedFigure as a JSON response with its ETag, answering 304 to a GET whose If-None-Match matches."""
+    response = Response(rendered.body, mimetype='application/json')
+    response.set_etag(rendered.etag)
+    response.headers['Cache-Control'] = 'no-cache'  # Always revalidate; an unchanged chart costs a 304
+    return response.make_conditional(req if req is not None else request)
+
+
+def parse_tickers(raw):
+    """Split "AAPL, msft tsla" style input into unique upper-case tickers, keeping their order."""
+    tickers = [str(escape(ticker.strip().upper())) for ticker in re.split(r"[\s,]+", raw or "")]
+    return list(dict.fromkeys(ticker for ticker in tickers if ticker))
+
+# Request counts, durations and in-flight requests for /metrics
+@app.before_request
+def start_request_metrics():
+    g.metrics_started = metrics.request_started()
+
+@app.after_request
+def record_response_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    # Runs once the response is complete, so streamed responses are timed until their last event
+    if "metrics_started" in g:
+        endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        metrics.request_finished(endpoint, request.method, g.get("metrics_status", 500), g.metrics_started)
+
 # Apply security headers after every request
 @app.after_request
 def apply_security_headers(response):
@@ -43,57 +272,108 @@ def index():
 # S&P 500 Sectors Page
 @app.route("/sp500sectors")
 def sp500sectors():
-    global last_holdings_update
+    # Start a background holdings refresh if a newer publication is out (never more than one at a time)
+    holdings_refresher.maybe_refresh()
+
+    performance = performance_snapshot.get().performance
 
-    etfs = ["XLRE", "XLE", "XLU", "XLK", "XLB",
-            "XLP", "XLY", "XLI", "XLC", "XLV", "XLF", "XBI"]
+    # Holdings tables are rendered once per file change, not once per page view
+    holdings_data = holdings_fragments.all()
 
-    # Check if holdings data needs to be updated
-    current_time = time.time()
-    if current_time - last_holdings_update > holdings_update_interval or not os.path.exists('sectors'):
-        update_holdings_background()
+    return render_template("SP500sectors.html", performance=performance, holdings_data=holdings_data)
 
-    performance = get_etf_performance(etfs)
+def conditional_json(payload, matrix, req=None):
+    """JSON response tagged with the performance matrix version, answering 304 when the client is up to date."""
+    response = app.json.response(payload)
+    response.set_etag(matrix.etag)
+    response.last_modified = matrix.last_modified
+    response.headers['Cache-Control'] = 'no-cache'  # Always revalidate; unchanged data costs a 304
+    return response.make_conditional(req if req is not None else request)
 
-    # Initialize a dictionary to hold holdings data
-    holdings_data = {}
+def performance_data(etf, timeframe, matrix=None):
+    """
+    Payload of /get_performance, as ( payload, matrix it was read from ).
+    The matrix is None when etf isn't a sector ETF: its value was computed on demand ( a network call, not
+    kept in the price store ) and can't be revalidated. Without a matrix argument the snapshot's current one is used.
+    etf must be a valid_symbol(); see performance_symbol().
+    """
+    matrix = matrix or performance_snapshot.get()
 
-    for etf in etfs:
-        # Construct the file path for the holdings .xlsx file
-        holdings_file = os.path.join('sectors', f"{etf}_holdings.xlsx")
-        if os.path.exists(holdings_file):
-            try:
-                # Read the .xlsx file using pandas
-                df = pd.read_excel(holdings_file)
-                # Format the 'Weight' column with percentages
-                df["Weight"] = df["Weight"].apply(lambda x: f"{x}%")
-                # Convert the DataFrame to HTML with Bootstrap classes
-                holdings_html = df.to_html(classes='table table-striped holdings-table', index=False)
-                # Store the HTML in the holdings_data dictionary
-                holdings_data[etf] = holdings_html
-            except Exception as e:
-                print(f"Error reading {holdings_file}: {e}")
-                holdings_data[etf] = '<p>Error loading holdings data.</p>'
-        else:
-            holdings_data[etf] = '<p>Holdings data is being updated. Please refresh the page in a few moments.</p>'
+    if etf not in matrix.etfs:
+        # Not a sector ETF: computed on demand as before
+        try:
+            performance = get_etf_performance([etf], timeframes=[timeframe] if timeframe else None, persist=False)
+        except ValueError:
+            performance = {}
+        return {"performance": performance.get(etf, {}).get(timeframe, "N/A")}, None
 
-    return render_template("SP500sectors.html", performance=performance, holdings_data=holdings_data)
+    if timeframe in TIMEFRAMES:
+        value = matrix.performance[etf].get(timeframe, "N/A")
+    else:
+        # Custom lookbacks such as "2-week" or "6-month" are computed from the snapshot's price panel
+        try:
+            value = matrix.custom([etf], timeframe)[etf].get(timeframe, "N/A")
+        except (ValueError, TypeError):
+            value = "N/A"
+    return {"performance": value}, matrix
+
+def performance_symbol(raw):
+    """The upper-case symbol of a /get_performance request, or None unless it looks like a ticker."""
+    symbol = (raw or "").strip().upper()
+    return symbol if valid_symbol(symbol) else None
+
+def performance_group_data(timeframe, matrix=None):
+    """Payload of /get_performance_group, as ( payload, matrix it was read from )."""
+    matrix = matrix or performance_snapshot.get()
+
+    if timeframe in TIMEFRAMES:
+        performance = matrix.performance
+    else:
+        try:
+            performance = matrix.custom(matrix.etfs, timeframe)
+        except (ValueError, TypeError):
+            performance = {etf: {} for etf in matrix.etfs}
+    return {etf: {"performance": metrics.get(timeframe)} for etf, metrics in performance.items()}, matrix
 
 @app.route("/get_performance")
 def get_performance():
-    etf = request.args.get("etf")
-    timeframe = request.args.get("timeframe")
-    etfs = [etf]
-    performance = get_etf_performance(etfs)
-    return jsonify({"performance": performance.get(etf, {}).get(timeframe, "N/A")})
+    etf = performance_symbol(request.args.get("etf"))
+    if etf is None:
+        return jsonify({'error': 'Invalid ETF symbol'}), 400
+    payload, matrix = performance_data(etf, request.args.get("timeframe"))
+    return jsonify(payload) if matrix is None else conditional_json(payload, matrix)
 
 @app.route("/get_performance_group")
 def get_performance_group():
-    timeframe = request.args.get("timeframe")
-    etfs = ["XLRE", "XLE", "XLU", "XLK", "XLB", "XLP", "XLY", "XLI", "XLC", "XLV", "XLF", "XBI"]
-    performance = get_etf_performance(etfs)
-    result = {etf: {"performance": metrics.get(timeframe)} for etf, metrics in performance.items()}
-    return jsonify(result)
+    payload, matrix = performance_group_data(request.args.get("timeframe"))
+    return conditional_json(payload, matrix)
+
+@app.route("/get_performance_matrix")
+def get_performance_matrix():
+    """Every sector ETF x timeframe at once, so the sectors page can switch timeframes without a round trip."""
+    matrix = performance_snapshot.get()
+    payload = {
+        "timeframes": matrix.timeframes,
+        "performance": matrix.performance,
+        "last_modified": matrix.last_modified.isoformat(),
+    }
+    return conditional_json(payload, matrix)
+
+# Option chain cache counters, used to size VECTR_CHAIN_CACHE_MB / TTLs
+@app.route("/cache_stats")
+def cache_stats():
+    return jsonify({"option_chains": chain_cache.stats(), "chain_summaries": summary_cache.stats(),
+                    "figures": figure_cache.stats(), "shared": shared.stats() if shared is not None else None})
+
+# Stage timings, upstream calls and request counters in the Prometheus text format
+@app.route("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+# Holdings refresh schedule, last duration and failures
+@app.route("/holdings_status")
+def holdings_status():
+    return jsonify(holdings_refresher.status())
 
 # CONTACT PAGE
 @app.route('/contact', methods=['GET'])
@@ -106,31 +386,179 @@ def getting_started():
     return render_template('getting_started.html')
 
 # Process ticker for visualization
-@app.route('/process_ticker', methods=['POST'])
+# Also answers GET ( ?ticker=...&width=...&height=... ), which can be revalidated with If-None-Match
+@app.route('/process_ticker', methods=['GET', 'POST'])
 def process_ticker():
-    ticker = request.form.get('ticker', '').strip().upper()
+    ticker = request.values.get('ticker', '').strip().upper()
 
     # Escape user input to prevent XSS
     ticker = escape(ticker)
 
     if not ticker:
         return jsonify({'error': 'No ticker provided'}), 400
+    if not valid_symbol(ticker):
+        return jsonify({'error': 'Invalid ticker symbol'}), 400
 
     try:
-        save_options_data(ticker)
-        fig = calculate_and_visualize_data(ticker, width=1200, height=540)
-        graph_json = json.dumps(fig, cls=PlotlyJSONEncoder)
+        width, height = figure_size(request.values)
+        return conditional_figure(render_figure(str(ticker), width, height))
+    except Exception as e:
+        error = f"An error occurred while processing {ticker}: {e}"
+        print(error)
+        return jsonify({'error': error}), 500
 
-        # Clean up the temporary data directories
-        folder_path = os.path.join(os.getcwd(), ticker)
-        if os.path.exists(folder_path):
-            shutil.rmtree(folder_path)
+# Process several tickers at once, streaming each figure back as soon as it is ready
+@app.route('/process_tickers', methods=['POST'])
+def process_tickers():
+    """
+    Accepts {"tickers": [...]} as JSON or a comma / space separated 'tickers' form field.
+    Responds with NDJSON: one {"ticker", "figure"} or {"ticker", "error"} line per ticker, in completion order.
+    """
+    payload = request.get_json(silent=True)
+    if payload is not None and not isinstance(payload, dict):
+        return jsonify({'error': 'Expected a JSON object with a "tickers" field'}), 400
+    raw = (payload or {}).get('tickers', request.form.get('tickers', ''))
+    if isinstance(raw, list) and all(isinstance(ticker, str) for ticker in raw):
+        raw = " ".join(raw)
+    elif not isinstance(raw, str):
+        return jsonify({'error': '"tickers" must be a string or a list of strings'}), 400
+    tickers = parse_tickers(raw)
 
-        return jsonify({'ticker': ticker, 'graph_json': graph_json})
+    if not tickers:
+        return jsonify({'error': 'No ticker provided'}), 400
+    if len(tickers) > batch_max_tickers:
+        return jsonify({'error': f'At most {batch_max_tickers} tickers per request'}), 400
+    if not all(map(valid_symbol, tickers)):
+        return jsonify({'error': 'Invalid ticker symbol'}), 400
+
+    pool = get_summary_pool()
+    futures = {batch_executor.submit(render_figure, ticker, pool=pool): ticker for ticker in tickers}
+
+    def generate():
+        try:
+            for future in as_completed(futures):
+                ticker = futures[future]
+                try:
+                    line = future.result().body  # The /process_ticker body is the line
+                except Exception as e:
+                    error = f"An error occurred while processing {ticker}: {e}"
+                    print(error)
+                    line = encode_json({'ticker': ticker, 'error': error})
+                yield line + b"\n"
+        finally:
+            # Client went away: don't start work nobody will read
+            for future in futures:
+                future.cancel()
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.headers['X-Accel-Buffering'] = 'no'  # Let reverse proxies pass lines through as they are written
+    return response
+
+# Seconds between SSE comments sent while nothing else is, so proxies don't close an idle stream
+stream_keepalive = float(os.environ.get("VECTR_STREAM_KEEPALIVE", "15"))
+# Streams producing events at the same time; more wait their turn ( their clients get keep-alives meanwhile ).
+# Separate from batch_executor, which each stream itself waits on for the quote and the chain
+stream_executor = ThreadPoolExecutor(max_workers=int(os.environ.get("VECTR_STREAM_WORKERS", "16")),
+                                     thread_name_prefix="stream")
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Event; data is a payload to encode, or JSON bytes already encoded."""
+    encoded = data if isinstance(data, bytes) else encode_json(data)
+    return f"event: {event}\ndata: {encoded.decode()}\n\n"
+
+
+def stream_ticker_events(ticker, events):
+    """
+    Produce the events of /process_ticker_stream, putting ( event, data ) tuples on the events queue and None last.
+    'start' always comes first: expirations fetched before the quote are held back until it is sent.
+
+    start       -> The chart without any expiration ( title, current price, styles ), to draw right away
+    expiration  -> summarize_expiration() of each expiration as it arrives, plus the running totals and
+                   their annotation texts
+    complete    -> The full figure, identical to /process_ticker's
+    error       -> Something failed; nothing else follows
+    """
+    totals = {'call_volume': 0.0, 'put_volume': 0.0, 'call_premium': 0.0, 'put_premium': 0.0}
+    received = 0
+    held = []  # Expiration events produced before 'start' was sent; None once it was
+    lock = threading.Lock()  # Expirations arrive from several fetch threads
+
+    def on_expiration(date, calls, puts, remaining):
+        nonlocal received
+        partial = summarize_expiration(date, calls, puts)
+        with lock:
+            received += 1
+            for side in ('call', 'put'):
+                side_totals = partial[f'{side}s'] or {}
+                totals[f'{side}_volume'] += side_totals.get('volume') or 0.0
+                totals[f'{side}_premium'] += side_totals.get('premium') or 0.0
+            partial['totals'] = dict(totals)
+            partial['annotations'] = totals_annotation_text(
+                totals['call_volume'], totals['put_volume'], totals['call_premium'], totals['put_premium'])
+            partial['received'] = received
+            partial['remaining'] = remaining
+            if held is not None:
+                held.append(('expiration', partial))
+            else:
+                events.put(('expiration', partial))
+
+    try:
+        # The quote ( title and price line ) is fetched alongside the chain, so the empty chart can be drawn early
+        quote_future = batch_executor.submit(fetch_quote, ticker)
+        chain_future = batch_executor.submit(get_option_chain, ticker, on_expiration)
+
+        quote = quote_future.result()
+        empty = np.zeros(0, dtype=SIDE_DTYPE)
+        skeleton = ChainSummary(ticker, quote['company_name'], float(quote['current_price']),
+                                float(quote['daily_change_dollar']), float(quote['daily_change_pct']),
+                                empty, empty, np.zeros(0), 0.0, 0.0, 0.0, 0.0, [])
+        start = ('start', {'ticker': ticker, 'figure': client_figure(skeleton)})
+        with lock:
+            events.put(start)
+            for item in held:
+                events.put(item)
+            held = None
+
+        chain_future.result()
+        events.put(('complete', render_figure(ticker, quote=quote).body))
     except Exception as e:
         error = f"An error occurred while processing {ticker}: {e}"
         print(error)
-        return jsonify({'error': error}), 500
+        events.put(('error', {'ticker': ticker, 'error': error}))
+    finally:
+        events.put(None)
+
+# Stream a ticker's chart over Server-Sent Events, one expiration at a time
+@app.route('/process_ticker_stream', methods=['GET'])
+def process_ticker_stream():
+    tickers = parse_tickers(request.args.get('ticker', ''))
+
+    if len(tickers) != 1:
+        return jsonify({'error': 'Exactly one ticker must be provided'}), 400
+    ticker = tickers[0]
+    if not valid_symbol(ticker):
+        return jsonify({'error': 'Invalid ticker symbol'}), 400
+
+    events = queue.Queue()
+    stream_executor.submit(stream_ticker_events, ticker, events)
+
+    def generate():
+        # If the client disconnects, the fetch still completes and fills the cache; its events are dropped
+        while True:
+            try:
+                item = events.get(timeout=stream_keepalive)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                return
+            yield sse_event(*item)
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -1,81 +1,262 @@
 # -- MODULES -- #
 import os
+import base64
 import pandas as pd
 import time
+import threading
+import random
 import numpy as np
 import plotly.graph_objects as go
 from datetime import datetime
-import yfinance as yf
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from providers import get_provider
+from metrics import span
+
+# -- OPTION CHAIN FETCHING -- #
+FETCH_MAX_WORKERS = 8  # Expirations fetched in parallel for a single ticker
+FETCH_MAX_RETRIES = 3  # Attempts per expiration before it is skipped
+FETCH_BACKOFF_BASE = 0.5  # seconds, doubled on every retry
+FETCH_BACKOFF_MAX = 8.0  # seconds, upper bound for a single backoff
+FETCH_DEADLINE = 45.0  # seconds allowed for the whole chain; late expirations are dropped
+
+class OptionChain:
+    """
+    In-memory container for a ticker's option chain.
+    Calls and puts are kept per expiration date ( 'YYYY-MM-DD', as yfinance returns them ) so the analytics
+    can consume the fetched frames directly, without writing them to disk and reading them back.
+
+    + Attributes:
+    ticker (str): The stock ticker symbol the chain belongs to.
+    calls (dict): Expiration date -> DataFrame of call contracts.
+    puts (dict): Expiration date -> DataFrame of put contracts.
+    fetched_at (float): Epoch timestamp of when the chain was created.
+    """
 
-def save_options_data(ticker):
+    def __init__(self, ticker):
+        self.ticker = ticker
+        self.calls = {}
+        self.puts = {}
+        self.fetched_at = time.time()
+
+    def add_expiration(self, date, calls, puts):
+        """Store the calls/puts frames returned for a single expiration date."""
+        self.calls[date] = calls
+        self.puts[date] = puts
+
+    @property
+    def expirations(self):
+        """Sorted list of every expiration date held in the chain."""
+        return sorted(set(self.calls) | set(self.puts))
+
+    def __len__(self):
+        return len(self.expirations)
+
+    def nbytes(self):
+        """Approximate memory footprint of the chain's frames, used for cache budgeting."""
+        return int(sum(df.memory_usage(deep=True).sum() for frames in (self.calls, self.puts) for df in frames.values()))
+
+    @span("csv_write")
+    def save_csv(self, base_dir=None):
+        """
+        Persist the chain using the original on-disk layout: <base_dir>/<TICKER>/CALLS/*.csv and /PUTS/*.csv
+        Each file is written to a temporary name first and then moved into place, so a concurrent request
+        for the same ticker never reads a half-written file.
+        """
+        if base_dir is None:
+            base_dir = os.getcwd()
+
+        ticker_dir = os.path.join(base_dir, self.ticker)
+        for folder, frames in (("CALLS", self.calls), ("PUTS", self.puts)):
+            folder_dir = os.path.join(ticker_dir, folder)
+            os.makedirs(folder_dir, exist_ok=True)
+            for date, df in frames.items():
+                filename = os.path.join(folder_dir, f"{date.replace('-', '')}{folder}.csv")
+                tmp_filename = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+                df.to_csv(tmp_filename)
+                os.replace(tmp_filename, filename)
+
+    @classmethod
+    def load_csv(cls, ticker, base_dir=None):
+        """Rebuild a chain from the CSV layout written by save_csv() / save_options_data()."""
+        if base_dir is None:
+            base_dir = os.getcwd()
+
+        chain = cls(ticker)
+        for folder, frames in (("CALLS", chain.calls), ("PUTS", chain.puts)):
+            folder_dir = os.path.join(base_dir, ticker, folder)
+            if not os.path.isdir(folder_dir):
+                continue
+            for filename in os.listdir(folder_dir):
+                if not filename.endswith(folder + ".csv"):
+                    continue
+                date_str = filename.split(folder)[0]
+                try:
+                    date = datetime.strptime(date_str, '%Y%m%d').strftime('%Y-%m-%d')
+                except ValueError as e:
+                    print(f"Error processing {filename}: {e}")
+                    continue
+                frames[date] = pd.read_csv(os.path.join(folder_dir, filename))
+        return chain
+
+
+def backoff_delay(attempt, base=FETCH_BACKOFF_BASE, cap=FETCH_BACKOFF_MAX):
     """
-    This function is responsible for retrieving option chain data using * yfinance *
-    Each ticker gets assigned its own folder, which also contains 2 subfolders ( /CALLS/ and /PUTS/ )
-    Each expiration date within the given ticker(s) option chain is iterated over to extract all available contracts
+    Jittered exponential backoff: a random delay between 0 and min(cap, base * 2^attempt) seconds.
+    Randomizing the full interval keeps parallel workers that failed together from retrying in lockstep.
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
 
-    + Parameters:
-    ticker (str): The stock ticker symbol for which to fetch option chain data.
+
+@span("option_chain")
+def _fetch_expiration(provider, ticker, date, deadline_at, max_retries, cancelled):
+    """
+    Fetch a single expiration's calls and puts, retrying with backoff until the request deadline.
+    Returns a (calls, puts) tuple, or None when every attempt failed or the deadline would be exceeded.
     """
+    for attempt in range(max_retries):
+        try:
+            return provider.option_chain(ticker, date)
 
-    # First, get the current working directory
-    base_dir = os.getcwd()
+        except Exception as e:
+            print(f"Attempt {attempt + 1} of {max_retries} failed for {date}: {e}")
+            if attempt == max_retries - 1:
+                print(f"An error occurred while processing options for {date}: {e}")
+                break
+
+            delay = backoff_delay(attempt)
+            if time.monotonic() + delay >= deadline_at:
+                print(f"Skipping {date}: retrying would exceed the request deadline.")
+                break
+
+            # Wait before retrying; wakes up early if the whole fetch has been abandoned
+            if cancelled.wait(delay):
+                break
+
+    return None
 
-    # Create a 'ticker folder' for the specific ticker(s), only if they don't already exist
-    ticker_dir = os.path.join(base_dir, ticker)
-    if not os.path.exists(ticker_dir):
-        os.makedirs(ticker_dir)
 
-    # Create separate directories for call and put option data
-    calls_dir = os.path.join(ticker_dir, "CALLS")
-    puts_dir = os.path.join(ticker_dir, "PUTS")
-    os.makedirs(calls_dir, exist_ok=True)
-    os.makedirs(puts_dir, exist_ok=True)
+@span("fetch_chain")
+def fetch_option_chain(ticker, persist=False, base_dir=None, max_workers=FETCH_MAX_WORKERS,
+                       deadline=FETCH_DEADLINE, max_retries=FETCH_MAX_RETRIES, on_expiration=None, provider=None):
+    """
+    This function is responsible for retrieving option chain data using * yfinance * ( or the configured provider )
+    Every expiration date within the given ticker's option chain is fetched by a bounded pool of workers,
+    and the resulting frames are kept in memory in an OptionChain.
+
+    + Parameters:
+    ticker (str): The stock ticker symbol for which to fetch option chain data.
+    persist (bool): Also write the chain to <base_dir>/<TICKER>/CALLS and /PUTS as CSV files.
+    base_dir (str): Directory to persist into (defaults to the current working directory).
+    max_workers (int): Number of expirations fetched concurrently ( 1 fetches them one at a time ).
+    deadline (float): Seconds allowed for the whole chain. Expirations still pending are left out of the result.
+    max_retries (int): Attempts per expiration, separated by jittered exponential backoff.
+    on_expiration (callable): Called as on_expiration(date, calls, puts, remaining) in the caller's thread as soon
+                              as each expiration arrives ( in completion order ); remaining is the number of
+                              expirations still being fetched. Used to stream partial results.
+    provider (MarketDataProvider): Data source; the process-wide one ( see providers.py ) by default.
+
+    + Returns:
+    OptionChain: The fetched chain (empty if the ticker has no options).
+    """
+    chain = OptionChain(ticker)
+    deadline_at = time.monotonic() + deadline
 
     # Fetch option chain data for the ticker using yfinance
-    stock = yf.Ticker(ticker)
-    exp_dates = stock.options  # List of available expiration dates
+    provider = provider or get_provider()
+    with span("option_expirations"):
+        exp_dates = provider.options(ticker)  # List of available expiration dates
 
     # Check if there are any options available
     if not exp_dates:
         print(f"No option chain found for the ticker {ticker}, may not exist.")
-        return
+        return chain
+
+    cancelled = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(exp_dates))))
+    futures = {
+        executor.submit(_fetch_expiration, provider, ticker, date, deadline_at, max_retries, cancelled): date
+        for date in exp_dates
+    }
+
+    try:
+        for future in as_completed(futures, timeout=max(0.0, deadline_at - time.monotonic())):
+            result = future.result()
+            if result is not None:
+                chain.add_expiration(futures[future], *result)
+                if on_expiration is not None:
+                    remaining = sum(1 for pending in futures if not pending.done())
+                    on_expiration(futures[future], *result, remaining)
+    except TimeoutError:
+        pending = sum(1 for future in futures if not future.done())
+        print(f"Deadline of {deadline}s reached for {ticker}; skipped {pending} expiration(s).")
+    finally:
+        # Don't let a slow expiration hold the request: stop retries and drop anything not yet started
+        cancelled.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if persist:
+        chain.save_csv(base_dir)
+
+    return chain
+
+
+def save_options_data(ticker, base_dir=None, **fetch_kwargs):
+    """
+    Fetch the option chain for a ticker and write it to disk.
+    Each ticker gets assigned its own folder, which also contains 2 subfolders ( /CALLS/ and /PUTS/ )
 
-    # Retry mechanism in the event connection suddenly fails // API doesn't respond correctly on first attempt
-    max_retries = 3
-    retry_delay = 5  # seconds
+    + Parameters:
+    ticker (str): The stock ticker symbol for which to fetch option chain data.
+    base_dir (str): Directory to write into (defaults to the current working directory).
+    **fetch_kwargs: Concurrency / retry settings forwarded to fetch_option_chain().
 
-    # Iterate over each expiration date to fetch and save the option data
-    for date in exp_dates:
-        for attempt in range(max_retries):
-            try:
-                # Fetch the option chain for the given date
-                opt = stock.option_chain(date)
-
-                # Define filenames for saving the calls and puts data
-                calls_filename = os.path.join(calls_dir, f"{date.replace('-', '')}CALLS.csv")
-                puts_filename = os.path.join(puts_dir, f"{date.replace('-', '')}PUTS.csv")
-
-                # Save calls and puts data to CSV files
-                opt.calls.to_csv(calls_filename)
-                opt.puts.to_csv(puts_filename)
-                break  # If successful, exit the retry loop
-
-            except Exception as e:
-                print(f"Attempt {attempt + 1} of {max_retries} failed: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay)  # Wait before retrying
-                else:
-                    print(f"An error occurred while processing options for {date}: {e}")
-    pass
+    + Returns:
+    OptionChain: The fetched chain, so callers can keep working on it without reading the CSVs back.
+    """
+    if base_dir is None:
+        base_dir = os.getcwd()
 
+    # Create the ticker folder and its CALLS / PUTS subfolders, only if they don't already exist
+    ticker_dir = os.path.join(base_dir, ticker)
+    os.makedirs(os.path.join(ticker_dir, "CALLS"), exist_ok=True)
+    os.makedirs(os.path.join(ticker_dir, "PUTS"), exist_ok=True)
 
-def preprocess_dates(data_dir, file_suffix):
+    return fetch_option_chain(ticker, persist=True, base_dir=base_dir, **fetch_kwargs)
+
+
+def preprocess_frame(df, local_tz):
     """
-    Preprocess and sort option chain data by expiration dates.
+    Coerce the numeric columns of a single expiration's DataFrame and localize its lastTradeDate.
 
     Parameters:
-    - data_dir (str): Directory path containing the options data CSV files.
-    - file_suffix (str): 'CALLS' or 'PUTS' to handle specific file types.
+    - df (DataFrame): Raw calls or puts frame ( fetched from yfinance or read from CSV ).
+    - local_tz (tzinfo): Timezone used for the 'lastTradeDate_Local' column.
+
+    Returns:
+    - DataFrame: A processed copy of the frame.
+    """
+    df = df.copy()
+    df["strike"] = pd.to_numeric(df["strike"], errors="coerce")
+    df["openInterest"] = pd.to_numeric(df["openInterest"], errors="coerce")
+    df["volume"] = pd.to_numeric(df["volume"], errors="coerce")
+    df["lastPrice"] = pd.to_numeric(df["lastPrice"], errors="coerce")
+
+    # Convert lastTradeDate to datetime (CSV files hold it as text, yfinance already as UTC datetimes)
+    if pd.api.types.is_datetime64_any_dtype(df["lastTradeDate"]):
+        df["lastTradeDate"] = pd.to_datetime(df["lastTradeDate"], utc=True)
+    else:
+        df["lastTradeDate"] = pd.to_datetime(df["lastTradeDate"], format="%Y-%m-%d %H:%M:%S%z", utc=True, errors="coerce")
+    df["lastTradeDate_Local"] = df["lastTradeDate"].dt.tz_convert(local_tz)
+    return df
+
+
+def preprocess_chain(frames):
+    """
+    Preprocess and sort in-memory option chain data by expiration dates.
+
+    Parameters:
+    - frames (dict): Expiration date ( 'YYYY-MM-DD' ) -> raw DataFrame, e.g. OptionChain.calls
 
     Returns:
     - dict: A dictionary with formatted dates as keys and corresponding DataFrames as values.
@@ -86,33 +267,175 @@ def preprocess_dates(data_dir, file_suffix):
     local_time = datetime.now().astimezone()  # "local" time
     local_tz = local_time.tzinfo  # local timezone object
 
+    for date, df in frames.items():
+        try:
+            # Convert to datetime and format
+            expiration_date = datetime.strptime(date, '%Y-%m-%d')
+            formatted_date = expiration_date.strftime('%m/%d/%y')
+
+            if not df.empty:
+                sorted_data[formatted_date] = preprocess_frame(df, local_tz)
+
+        except ValueError as e:
+            print(f"Error processing {date}: {e}")
+
+    # Sort the dictionary by datetime keys
+    return dict(sorted(sorted_data.items(), key=lambda x: datetime.strptime(x[0], '%m/%d/%y')))
+
+
+@span("preprocess")
+def preprocess_dates(data_dir, file_suffix):
+    """
+    Preprocess and sort option chain data by expiration dates.
+
+    Parameters:
+    - data_dir (str): Directory path containing the options data CSV files.
+    - file_suffix (str): 'CALLS' or 'PUTS' to handle specific file types.
+
+    Returns:
+    - dict: A dictionary with formatted dates as keys and corresponding DataFrames as values.
+    """
+    frames = {}
+
     for filename in os.listdir(data_dir):
         if filename.endswith(file_suffix + ".csv"):
             # Extract the date from the filename
             date_str = filename.split(file_suffix)[0]
             try:
-                # Convert to datetime and format
-                expiration_date = datetime.strptime(date_str, '%Y%m%d')
-                formatted_date = expiration_date.strftime('%m/%d/%y')
-
-                # Load the CSV and store in the dictionary
-                df = pd.read_csv(os.path.join(data_dir, filename))
-                if not df.empty:
-                    df["strike"] = pd.to_numeric(df["strike"], errors="coerce")
-                    df["openInterest"] = pd.to_numeric(df["openInterest"], errors="coerce")
-                    df["volume"] = pd.to_numeric(df["volume"], errors="coerce")
-                    df["lastPrice"] = pd.to_numeric(df["lastPrice"], errors="coerce")
-
-                    # Convert lastTradeDate to datetime and then to EST
-                    df["lastTradeDate"] = pd.to_datetime(df["lastTradeDate"], format="%Y-%m-%d %H:%M:%S%z", utc=True, errors="coerce")
-                    df["lastTradeDate_Local"] = df["lastTradeDate"].dt.tz_convert(local_tz)
-                    sorted_data[formatted_date] = df
-
+                date = datetime.strptime(date_str, '%Y%m%d').strftime('%Y-%m-%d')
+                frames[date] = pd.read_csv(os.path.join(data_dir, filename))
             except ValueError as e:
                 print(f"Error processing {filename}: {e}")
 
-    # Sort the dictionary by datetime keys
-    return dict(sorted(sorted_data.items(), key=lambda x: datetime.strptime(x[0], '%m/%d/%y')))
+    return preprocess_chain(frames)
+
+
+def stack_expirations(frames):
+    """
+    Concatenate every expiration of one side of the chain (calls or puts) into a single preprocessed frame.
+
+    Parameters:
+    - frames (dict): Expiration date ( 'YYYY-MM-DD' ) -> raw DataFrame, e.g. OptionChain.calls
+
+    Returns:
+    - DataFrame: All contracts, with an ordered categorical 'expiration' column holding the formatted date
+                 ( '%m/%d/%y' ). Rows of an expiration are contiguous and expirations are sorted by date.
+    """
+    columns = ["strike", "openInterest", "volume", "lastPrice", "lastTradeDate"]
+    labels, parts = [], []
+
+    for date in sorted(frames):
+        df = frames[date]
+        try:
+            formatted_date = datetime.strptime(date, '%Y-%m-%d').strftime('%m/%d/%y')
+        except ValueError as e:
+            print(f"Error processing {date}: {e}")
+            continue
+        if not df.empty:
+            labels.append(formatted_date)
+            parts.append(df[columns])
+
+    if not parts:
+        stacked = pd.DataFrame({column: pd.Series(dtype="float64") for column in columns})
+        stacked["lastTradeDate"] = pd.Series(dtype="datetime64[ns, UTC]")
+    else:
+        stacked = pd.concat(parts, ignore_index=True)
+
+    local_tz = datetime.now().astimezone().tzinfo
+    stacked = preprocess_frame(stacked, local_tz)
+
+    codes = np.repeat(np.arange(len(parts)), [len(part) for part in parts])
+    stacked["expiration"] = pd.Categorical.from_codes(codes, categories=labels, ordered=True)
+    return stacked
+
+
+def _top_n_rows(values, codes, n_groups, top_n):
+    """
+    Row positions of the top_n largest values within each group, found by top_n rounds of a grouped argmax
+    ( a partial selection: no group is ever fully sorted ). Missing ranks are reported as -1.
+    """
+    key = pd.Series(values, copy=True)
+    sizes = np.bincount(codes, minlength=n_groups)
+    rows = np.full((n_groups, top_n), -1, dtype=np.int64)
+
+    for rank in range(top_n):
+        positions = key.groupby(codes, sort=True).idxmax().to_numpy()
+        valid = sizes > rank
+        rows[valid, rank] = positions[valid]
+        key.iloc[positions] = -np.inf  # Exclude this round's winners from the next one
+
+    return rows
+
+
+def aggregate_expirations(stacked, top_n=3, today=None):
+    """
+    Compute every per-expiration metric the chart needs from a stacked chain in a few grouped, vectorized passes.
+
+    Parameters:
+    - stacked (DataFrame): Output of stack_expirations() for calls or puts.
+    - top_n (int): Number of highest open interest strikes to report per expiration.
+    - today (date): Local date used to decide if the top volume contract traded "today".
+
+    Returns:
+    - DataFrame indexed by formatted expiration date with the columns:
+        oi_total, max_oi                 -> Total and largest open interest
+        strike_1 .. strike_<top_n>       -> Strikes with the highest open interest (0 if fewer contracts)
+        top_volume, top_oi               -> Volume / OI of the highest open interest contract (NaN -> 0)
+        total_volume, total_premium      -> Sum of volume and of volume * lastPrice * 100
+        hv_strike, hv_volume, hv_oi,     -> Highest volume contract ( NaN when no volume was reported )
+        hv_last_price, hv_traded_today
+    """
+    if today is None:
+        today = datetime.now().astimezone().date()
+
+    labels = list(stacked["expiration"].cat.categories)
+    codes = stacked["expiration"].cat.codes.to_numpy()
+    n_groups = len(labels)
+
+    strike = stacked["strike"].to_numpy(dtype=float)
+    open_interest = stacked["openInterest"].to_numpy(dtype=float)
+    volume = stacked["volume"].to_numpy(dtype=float)
+    last_price = stacked["lastPrice"].to_numpy(dtype=float)
+
+    # Pass 1: sums / maxima per expiration
+    grouped = pd.DataFrame({
+        "oi_total": open_interest,
+        "max_oi": open_interest,
+        "total_volume": volume,
+        "total_premium": volume * last_price * 100,
+        "volume_count": volume,
+    }).groupby(codes, sort=True).agg({
+        "oi_total": "sum",
+        "max_oi": "max",
+        "total_volume": "sum",
+        "total_premium": "sum",
+        "volume_count": "count",
+    })
+    result = grouped.reindex(range(n_groups))
+    result.index = pd.Index(labels, name="expiration")
+
+    # Passes 2..top_n+1: strikes with the highest open interest ( NaN OI ranks below any reported OI )
+    top_rows = _top_n_rows(np.where(np.isnan(open_interest), -1.0, open_interest), codes, n_groups, top_n)
+    for rank in range(top_n):
+        rows = top_rows[:, rank]
+        result[f"strike_{rank + 1}"] = np.where(rows >= 0, strike[rows], 0)
+
+    first = top_rows[:, 0]
+    result["top_volume"] = np.nan_to_num(volume[first], nan=0.0)
+    result["top_oi"] = np.nan_to_num(open_interest[first], nan=0.0)
+
+    # Last pass: the contract with the highest volume in each expiration
+    hv_rows = pd.Series(np.where(np.isnan(volume), -np.inf, volume)).groupby(codes, sort=True).idxmax().to_numpy()
+    has_volume = result["volume_count"].to_numpy() > 0
+    last_trade_dates = stacked["lastTradeDate_Local"].iloc[hv_rows].dt.date.to_numpy() if n_groups else np.array([])
+
+    result["hv_strike"] = np.where(has_volume, strike[hv_rows], np.nan)
+    result["hv_volume"] = np.where(has_volume, volume[hv_rows], np.nan)
+    result["hv_oi"] = np.where(has_volume, open_interest[hv_rows], np.nan)
+    result["hv_last_price"] = np.where(has_volume, last_price[hv_rows], np.nan)
+    result["hv_traded_today"] = has_volume & (last_trade_dates == today)
+
+    return result.drop(columns="volume_count")
 
 
 def format_dollar_amount(amount):
@@ -132,17 +455,96 @@ def format_dollar_amount(amount):
     pass
 
 
-def calculate_and_visualize_data(ticker, width=600, height=400):
+# Per-expiration metrics of one side of the chain, as stored in ChainSummary.calls / ChainSummary.puts
+SIDE_DTYPE = np.dtype([
+    ('expiration', 'U8'),  # Formatted expiration date ( '%m/%d/%y' )
+    ('oi', 'f8'),  # Total open interest
+    ('max_oi', 'f8'),  # Largest open interest of a single contract
+    ('strike_1', 'f8'),  # Strikes with the 1st / 2nd / 3rd highest open interest
+    ('strike_2', 'f8'),
+    ('strike_3', 'f8'),
+    ('top_volume', 'f8'),  # Volume and OI of the highest open interest contract
+    ('top_oi', 'f8'),
+    ('volume', 'f8'),  # Total volume
+    ('premium', 'f8'),  # Total premium ( volume * lastPrice * 100 )
+])
+
+
+class ChainSummary:
     """
-    Function that analyzes option chain data and generates Plotly visualizations for the given stock ticker(s).
+    Compact result of the option chain analytics: everything render_summary() needs to draw the chart.
+    Per-expiration metrics live in two small NumPy record arrays ( see SIDE_DTYPE ), so a summary is a few
+    kilobytes where the raw chain is megabytes. Summaries pickle as-is and round-trip through to_dict() / from_dict().
     """
+    __slots__ = (
+        'ticker', 'company_name', 'current_price', 'daily_change_dollar', 'daily_change_pct',
+        'calls', 'puts', 'avg_strike',
+        'total_call_volume', 'total_put_volume', 'total_call_premium', 'total_put_premium',
+        'top_volume_contracts', 'created_at',
+    )
 
-    # Fetch current stock data using yfinance
-    stock = yf.Ticker(ticker)
-    current_data = stock.history(period="1d")
+    def __init__(self, ticker, company_name, current_price, daily_change_dollar, daily_change_pct,
+                 calls, puts, avg_strike, total_call_volume, total_put_volume,
+                 total_call_premium, total_put_premium, top_volume_contracts, created_at=None):
+        self.ticker = ticker
+        self.company_name = company_name
+        self.current_price = current_price
+        self.daily_change_dollar = daily_change_dollar
+        self.daily_change_pct = daily_change_pct
+        self.calls = calls  # SIDE_DTYPE record array, sorted by expiration
+        self.puts = puts
+        self.avg_strike = avg_strike  # OI-weighted average strike, aligned with calls['expiration']
+        self.total_call_volume = total_call_volume
+        self.total_put_volume = total_put_volume
+        self.total_call_premium = total_call_premium
+        self.total_put_premium = total_put_premium
+        self.top_volume_contracts = top_volume_contracts  # Most active contracts, highest volume first
+        self.created_at = time.time() if created_at is None else created_at
+
+    def nbytes(self):
+        """Approximate memory footprint, used for cache budgeting."""
+        return int(self.calls.nbytes + self.puts.nbytes + self.avg_strike.nbytes + 200 * len(self.top_volume_contracts) + 512)
+
+    def to_dict(self):
+        """Plain Python representation ( lists / floats / strings ) suitable for JSON."""
+        data = {slot: getattr(self, slot) for slot in self.__slots__}
+        data['calls'] = {field: self.calls[field].tolist() for field in SIDE_DTYPE.names}
+        data['puts'] = {field: self.puts[field].tolist() for field in SIDE_DTYPE.names}
+        data['avg_strike'] = self.avg_strike.tolist()
+        data['top_volume_contracts'] = [dict(contract) for contract in self.top_volume_contracts]
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a summary produced by to_dict()."""
+        data = dict(data)
+        for side in ('calls', 'puts'):
+            columns = data[side]
+            records = np.zeros(len(columns['expiration']), dtype=SIDE_DTYPE)
+            for field in SIDE_DTYPE.names:
+                records[field] = columns[field]
+            data[side] = records
+        data['avg_strike'] = np.asarray(data['avg_strike'], dtype=float)
+        return cls(**data)
+
+
+@span("quote")
+def fetch_quote(ticker, provider=None):
+    """
+    Fetch the quote data shown in the chart title.
+
+    + Parameters:
+    ticker (str): The stock ticker symbol.
+    provider (MarketDataProvider): Data source; the process-wide one ( see providers.py ) by default.
+
+    + Returns:
+    dict: company_name, current_price, daily_change_dollar, daily_change_pct
+    """
+    provider = provider or get_provider()
+    current_data = provider.history(ticker, period="1d")
     current_price = current_data['Close'].iloc[-1]  # Current closing price of the stock
-    price_data = stock.history(period="2d")
-    company_name = stock.info.get('longName', 'N/A')  # Retrieve company name
+    price_data = provider.history(ticker, period="2d")
+    company_name = provider.info(ticker).get('longName', 'N/A')  # Retrieve company name
 
     # Safely compute the daily change percentage if there's at least 2 rows
     if len(price_data) > 1:
@@ -153,308 +555,176 @@ def calculate_and_visualize_data(ticker, width=600, height=400):
         daily_change_dollar = 0
         daily_change_pct = 0
 
-    # Get the current working directory and construct paths for call and put data
-    base_dir = os.getcwd()
-    calls_dir = os.path.join(base_dir, ticker, "CALLS")
-    puts_dir = os.path.join(base_dir, ticker, "PUTS")
-
-    # Preprocess and sort calls and puts data
-    calls_data = preprocess_dates(calls_dir, "CALLS")
-    puts_data = preprocess_dates(puts_dir, "PUTS")
-
-    # Initialize dictionaries for visualization
-    calls_oi = {date: df['openInterest'].sum() for date, df in calls_data.items()}
-    puts_oi = {date: df['openInterest'].sum() for date, df in puts_data.items()}
-    max_strike_calls, max_strike_puts = {}, {}
-    second_max_strike_calls, second_max_strike_puts = {}, {}
-    third_max_strike_calls, third_max_strike_puts = {}, {}
-    avg_strike = {}
-    top_volume_contracts = []
+    return {
+        'company_name': company_name,
+        'current_price': current_price,
+        'daily_change_dollar': daily_change_dollar,
+        'daily_change_pct': daily_change_pct,
+    }
+
+
+def _side_records(side_summary):
+    """Pack the output of aggregate_expirations() into a SIDE_DTYPE record array."""
+    records = np.zeros(len(side_summary), dtype=SIDE_DTYPE)
+    records['expiration'] = side_summary.index.to_numpy(dtype=str)
+    records['oi'] = side_summary['oi_total'].to_numpy()
+    records['max_oi'] = side_summary['max_oi'].to_numpy()
+    records['strike_1'] = side_summary['strike_1'].to_numpy()
+    records['strike_2'] = side_summary['strike_2'].to_numpy()
+    records['strike_3'] = side_summary['strike_3'].to_numpy()
+    records['top_volume'] = side_summary['top_volume'].to_numpy()
+    records['top_oi'] = side_summary['top_oi'].to_numpy()
+    records['volume'] = side_summary['total_volume'].to_numpy()
+    records['premium'] = side_summary['total_premium'].to_numpy()
+    return records
+
+
+def average_strike(calls_summary, puts_summary):
+    """
+    Average strike per call expiration: each side's top 3 open interest strikes, weighted by that side's share
+    of the expiration's open interest. NaN where neither side has open interest.
+
+    Parameters:
+    - calls_summary, puts_summary (DataFrame): Output of aggregate_expirations().
+    """
+    puts_aligned = puts_summary.reindex(calls_summary.index)
+    total_oi = calls_summary['oi_total'] + puts_aligned['oi_total']
+    weight_calls = calls_summary['oi_total'] / total_oi
+    weight_puts = puts_aligned['oi_total'] / total_oi
+    avg_strike = (
+            (calls_summary['strike_1'] * weight_calls +
+             calls_summary['strike_2'] * weight_calls +
+             calls_summary['strike_3'] * weight_calls +
+             puts_aligned['strike_1'] * weight_puts +
+             puts_aligned['strike_2'] * weight_puts +
+             puts_aligned['strike_3'] * weight_puts) /
+            (3 * (weight_calls + weight_puts))
+    )
+    return avg_strike.where(total_oi > 0)
+
+
+def _json_number(value):
+    """float for JSON, with NaN ( which JSON can't represent ) as None."""
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def summarize_expiration(date, calls, puts, today=None):
+    """
+    Chart metrics of a single expiration, computed as soon as it is fetched ( see fetch_option_chain's
+    on_expiration ), so partial results can be drawn before the rest of the chain arrives.
+
+    Parameters:
+    - date (str): Expiration date ( 'YYYY-MM-DD' ).
+    - calls, puts (DataFrame): Raw option chain frames of that expiration.
+
+    Returns:
+    - dict: expiration ( formatted '%m/%d/%y' ), calls / puts ( SIDE_DTYPE fields except expiration, or None if
+            that side is empty ) and avg_strike. NaN values are None, so the dict can be sent as JSON.
+    """
+    if today is None:
+        today = datetime.now().astimezone().date()
+
+    calls_summary = aggregate_expirations(stack_expirations({date: calls}), today=today)
+    puts_summary = aggregate_expirations(stack_expirations({date: puts}), today=today)
+    avg_strike = average_strike(calls_summary, puts_summary)
+
+    def side(side_summary):
+        if side_summary.empty:
+            return None
+        record = _side_records(side_summary)[0]
+        return {field: _json_number(record[field]) for field in SIDE_DTYPE.names if field != 'expiration'}
 
+    return {
+        'expiration': datetime.strptime(date, '%Y-%m-%d').strftime('%m/%d/%y'),
+        'calls': side(calls_summary),
+        'puts': side(puts_summary),
+        'avg_strike': _json_number(avg_strike.iloc[0]) if len(avg_strike) else None,
+    }
+
+
+@span("summarize")
+def summarize_chain(chain, quote=None, top_contracts=5):
+    """
+    Run the option chain analytics and return a ChainSummary.
+
+    + Parameters:
+    chain (OptionChain): The chain to analyze.
+    quote (dict): Output of fetch_quote(); fetched for chain.ticker when omitted.
+    top_contracts (int): Number of 'Most Active' contracts kept for the chart annotations.
+    """
+    if quote is None:
+        quote = fetch_quote(chain.ticker)
+
+    # Stack every expiration of each side into one frame and aggregate them in a few vectorized passes
     local_time = datetime.now().astimezone()
     today_local_date = local_time.date()
+    calls_summary = aggregate_expirations(stack_expirations(chain.calls), today=today_local_date)
+    puts_summary = aggregate_expirations(stack_expirations(chain.puts), today=today_local_date)
 
-    # Process sorted calls data
-    for date, df in calls_data.items():
-        if not df.empty:
-            # Calculate strikes with highest open interest
-            sorted_calls = df.sort_values(by='openInterest', ascending=False)
-            max_strike_calls[date] = sorted_calls.iloc[0]['strike'] if not sorted_calls.empty else 0
-            second_max_strike_calls[date] = sorted_calls.iloc[1]['strike'] if len(sorted_calls) > 1 else 0
-            third_max_strike_calls[date] = sorted_calls.iloc[2]['strike'] if len(sorted_calls) > 2 else 0
-
-            # Identify the call option with the highest volume
-            if df['volume'].notna().any():
-                highest_volume_call = df.loc[df['volume'].idxmax()]
-
-                # Check lastTradeDate_EST
-                last_trade_local = highest_volume_call["lastTradeDate_Local"]
-                if pd.notnull(last_trade_local):
-                    if last_trade_local.date() == today_local_date:
-                        # It's traded "today" in EST, so we consider it "top volume"
-                        total_spent = highest_volume_call['volume'] * highest_volume_call['lastPrice'] * 100
-                        formatted_total_spent = format_dollar_amount(total_spent)
-                        unusual = highest_volume_call['volume'] > highest_volume_call['openInterest']
-
-                        top_volume_contracts.append({
-                            'type': 'CALL',
-                            'strike': highest_volume_call['strike'],
-                            'volume': highest_volume_call['volume'],
-                            'openInterest': highest_volume_call['openInterest'],
-                            'date': date,
-                            'total_spent': formatted_total_spent,
-                            'unusual': unusual
-                        })
-
-    # Process sorted puts data
-    for date, df in puts_data.items():
-        if not df.empty:
-            # Calculate strikes with the highest open interest
-            sorted_puts = df.sort_values(by='openInterest', ascending=False)
-            max_strike_puts[date] = sorted_puts.iloc[0]['strike'] if not sorted_puts.empty else 0
-            second_max_strike_puts[date] = sorted_puts.iloc[1]['strike'] if len(sorted_puts) > 1 else 0
-            third_max_strike_puts[date] = sorted_puts.iloc[2]['strike'] if len(sorted_puts) > 2 else 0
-
-            # Identify the put option with the highest volume
-            if df['volume'].notna().any():
-                highest_volume_put = df.loc[df['volume'].idxmax()]
-
-                last_trade_local = highest_volume_put["lastTradeDate_Local"]
-                if pd.notnull(last_trade_local):
-                    if last_trade_local.date() == today_local_date:
-                        total_spent = highest_volume_put['volume'] * highest_volume_put['lastPrice'] * 100
-                        formatted_total_spent = format_dollar_amount(total_spent)
-                        unusual = highest_volume_put['volume'] > highest_volume_put['openInterest']
-
-                        top_volume_contracts.append({
-                            'type': 'PUT',
-                            'strike': highest_volume_put['strike'],
-                            'volume': highest_volume_put['volume'],
-                            'openInterest': highest_volume_put['openInterest'],
-                            'date': date,
-                            'total_spent': formatted_total_spent,
-                            'unusual': unusual
-                        })
-
-    # Calculate average strike for visualization
-    for date in max_strike_calls.keys():
-        if date in max_strike_puts and calls_oi[date] + puts_oi[date] > 0:
-            total_oi = calls_oi[date] + puts_oi[date]
-            weight_calls = calls_oi[date] / total_oi if total_oi else 0
-            weight_puts = puts_oi[date] / total_oi if total_oi else 0
-
-            avg_strike[date] = (
-                    (max_strike_calls[date] * weight_calls +
-                     second_max_strike_calls[date] * weight_calls +
-                     third_max_strike_calls[date] * weight_calls +  #
-                     max_strike_puts[date] * weight_puts +
-                     second_max_strike_puts[date] * weight_puts +
-                     third_max_strike_puts[date] * weight_puts) /  #
-                    (3 * (weight_calls + weight_puts))
-            )
-        else:
-            avg_strike[date] = np.nan
+    # Highest volume contract of each expiration, only if it traded "today" (local time)
+    top_volume_contracts = []
+    for option_type, side_summary in (('CALL', calls_summary), ('PUT', puts_summary)):
+        traded_today = side_summary[side_summary['hv_traded_today']]
+        for date, row in traded_today.iterrows():
+            top_volume_contracts.append({
+                'type': option_type,
+                'strike': float(row['hv_strike']),
+                'volume': float(row['hv_volume']),
+                'openInterest': float(row['hv_oi']),
+                'date': date,
+                'total_spent': format_dollar_amount(row['hv_volume'] * row['hv_last_price'] * 100),
+                'unusual': bool(row['hv_volume'] > row['hv_oi'])
+            })
 
     # Sort contracts by volume and configure how many you'd like to display on the plotly graph as annotations
     top_volume_contracts.sort(key=lambda x: x['volume'], reverse=True)
-    # Most active options:
-    top_volume_contracts = top_volume_contracts[:5]  # <-- toggle this value to change the # of 'Most Active' Options
-
-    fig = go.Figure()
-
-    # Add Bar graph for Call OI
-    fig.add_trace(go.Bar(
-        x=list(calls_oi.keys()),  # Sorted expiration dates for calls
-        y=list(calls_oi.values()),  # Total open interest per date
-        name='Call OI',
-        marker_color='#708d8b',
-        opacity=0.55,
-        showlegend=True,
-        hovertemplate='%{y:.3s}<extra></extra>'
-    ))
-
-    # Add Bar graph for Put OI
-    fig.add_trace(go.Bar(
-        x=list(puts_oi.keys()),  # Sorted expiration dates for puts
-        y=list(puts_oi.values()),  # Total open interest per date
-        name='Put OI',
-        marker_color='#b87d6e',
-        opacity=0.55,
-        showlegend=True,
-        hovertemplate='%{y:.3s}<extra></extra>'
-    ))
-
-    # Add the average strike line
-    fig.add_trace(go.Scatter(
-        x=list(avg_strike.keys()),  # Sorted expiration dates
-        y=list(avg_strike.values()),  # Average strikes per date
-        name='Average',
-        mode='lines+markers',
-        connectgaps=True,
-        marker=dict(
-            color='#565887',
-            size=4,
-            symbol='square',  # Change marker shape to square
-            line=dict(
-                color='black',  # Border color for the markers
-                width=1  # Border width for the markers
-            )
-        ),
-        opacity=0.80,
-        yaxis='y2',  # Use secondary y-axis for strike prices
-        showlegend=True,
-        line=dict(
-            color='rgba(40, 40, 43, 0.5)',
-            width=2,
-            dash='dashdot'
-        ),
-        hovertemplate='%{y:.2f}<extra></extra>'
-    ))
-
-    # Gather all open interest values for scaling
-    all_open_interest = []
-
-    # Collect open interest values from preprocessed calls
-    for date, df in calls_data.items():
-        if not df.empty:
-            all_open_interest.append(df['openInterest'].max())  # Use max OI for scaling
+    top_volume_contracts = top_volume_contracts[:top_contracts]
 
-    # Collect open interest values from preprocessed puts
-    for date, df in puts_data.items():
-        if not df.empty:
-            all_open_interest.append(df['openInterest'].max())  # Use max OI for scaling
+    # Calculate average strike for visualization
+    avg_strike = average_strike(calls_summary, puts_summary)
+
+    return ChainSummary(
+        ticker=chain.ticker,
+        company_name=quote['company_name'],
+        current_price=float(quote['current_price']),
+        daily_change_dollar=float(quote['daily_change_dollar']),
+        daily_change_pct=float(quote['daily_change_pct']),
+        calls=_side_records(calls_summary),
+        puts=_side_records(puts_summary),
+        avg_strike=avg_strike.to_numpy(dtype=float),
+        total_call_volume=float(calls_summary['total_volume'].sum()),
+        total_put_volume=float(puts_summary['total_volume'].sum()),
+        total_call_premium=float(calls_summary['total_premium'].sum()),
+        total_put_premium=float(puts_summary['total_premium'].sum()),
+        top_volume_contracts=top_volume_contracts,
+    )
 
-    # Determine the max open interest for scaling
-    max_open_interest = max(all_open_interest) if all_open_interest else 1  # Avoid division by zero
-
-    # Add line plot for max strike calls with scaled markers
-    fig.add_trace(go.Scatter(
-        x=list(max_strike_calls.keys()),  # Sorted expiration dates
-        y=list(max_strike_calls.values()),
-        name='Call',
-        mode='lines+markers',  # Add markers
-        connectgaps=True,
-        opacity=0.56,
-        yaxis='y2',
-        showlegend=True,
-        line=dict(color='#75f542', width=2.65),
-        marker=dict(
-            size=[
-                (df['openInterest'].fillna(
-                    0).max() / max_open_interest * 20) if not df.empty and max_open_interest > 0 else 5
-                for df in calls_data.values()
-            ],
-            color='#75f542',  # Marker color
-            symbol='square',  # Square markers for calls
-            line=dict(width=1, color='black')  # Optional: border color for contrast
-        ),
-        hovertemplate=(
-            '<span style="font-family: Arial, sans-serif; font-size:9px;"><b>Strike:</b> $%{y:.2f}<br>'
-            '<b>Volume:</b> %{customdata[0]:,}<br>'
-            '<b>OI:</b> %{customdata[1]:,}</span><extra></extra>'
-        ),
-        customdata=[
-            (sorted_calls.iloc[0]['volume'], sorted_calls.iloc[0]['openInterest']) if not sorted_calls.empty else (0, 0)
-            for sorted_calls in [
-                pd.read_csv(os.path.join(calls_dir, filename)).sort_values(by='openInterest', ascending=False).fillna(0)
-                for filename in os.listdir(calls_dir)
-            ]
-        ]
-    ))
-
-    fig.add_trace(go.Scatter(
-        x=list(second_max_strike_calls.keys()),
-        y=list(second_max_strike_calls.values()),
-        name='2nd Most-Bought Call',
-        mode='lines',
-        marker_color='#57f542',
-        opacity=.47,
-        line=dict(width=2.85, dash='dot'),
-        yaxis='y2',
-        showlegend=False,
-        hovertemplate='%{y:.2f}<extra></extra>'
-    ))
-
-    fig.add_trace(go.Scatter(
-        x=list(third_max_strike_calls.keys()),
-        y=list(third_max_strike_calls.values()),
-        name='3rd Most-Bought Call',
-        mode='lines',
-        marker_color='#25f74f',
-        opacity=.37,
-        line=dict(width=2.55, dash='dot'),
-        yaxis='y2',
-        showlegend=False,
-        hovertemplate='%{y:.2f}<extra></extra>'
-    ))
-
-    # Add line plot for max strike puts with scaled markers
-    fig.add_trace(go.Scatter(
-        x=list(max_strike_puts.keys()),  # Sorted expiration dates
-        y=list(max_strike_puts.values()),
-        name='Put',
-        mode='lines+markers',  # Add markers
-        connectgaps=True,
-        opacity=0.56,
-        yaxis='y2',
-        showlegend=True,
-        line=dict(color='#f54242', width=2.65),
-        marker=dict(
-            size=[
-                (df['openInterest'].fillna(
-                    0).max() / max_open_interest * 20) if not df.empty and max_open_interest > 0 else 5
-                for df in puts_data.values()
-            ],
-            color='#de3557',  # Marker color
-            symbol='square',  # Square markers for puts
-            line=dict(width=1, color='black')  # Optional: border color for contrast
-        ),
-        hovertemplate=(
-            '<span style="font-family: Arial, sans-serif; font-size:9px;"><b>Strike:</b> $%{y:.2f}<br>'
-            '<b>Volume:</b> %{customdata[0]:,}<br>'
-            '<b>OI:</b> %{customdata[1]:,}</span><extra></extra>'
-        ),
-        customdata=[
-            (sorted_puts.iloc[0]['volume'], sorted_puts.iloc[0]['openInterest']) if not sorted_puts.empty else (0, 0)
-            for sorted_puts in [
-                pd.read_csv(os.path.join(puts_dir, filename)).sort_values(by='openInterest', ascending=False).fillna(0)
-                for filename in os.listdir(puts_dir)
-            ]
-        ]
-    ))
-
-    fig.add_trace(go.Scatter(
-        x=list(second_max_strike_puts.keys()),
-        y=list(second_max_strike_puts.values()),
-        name='2nd Most-Bought Put',
-        mode='lines',
-        marker_color='#d16262',
-        opacity=.47,
-        line=dict(width=2.85, dash='dot'),
-        yaxis='y2',
-        showlegend=False,
-        hovertemplate='%{y:.2f}<extra></extra>'
-    ))
-
-    fig.add_trace(go.Scatter(
-        x=list(third_max_strike_puts.keys()),
-        y=list(third_max_strike_puts.values()),
-        name='3rd Most-Bought Put',
-        mode='lines',
-        marker_color='#d17b7b',
-        opacity=.37,
-        line=dict(width=2.55, dash='dot'),
-        yaxis='y2',
-        showlegend=False,
-        hovertemplate='%{y:.2f}<extra></extra>'
-    ))
-
-    # Calculate total Volume for calls
-    total_call_volume = sum(df['volume'].sum() for df in calls_data.values() if not df.empty)
-
-    # Calculate total Volume for puts
-    total_put_volume = sum(df['volume'].sum() for df in puts_data.values() if not df.empty)
 
+def calculate_and_visualize_data(ticker, width=600, height=400, chain=None):
+    """
+    Function that analyzes option chain data and generates Plotly visualizations for the given stock ticker(s).
+
+    + Parameters:
+    ticker (str): The stock ticker symbol to visualize.
+    width, height (int): Figure dimensions in pixels.
+    chain (OptionChain): In-memory chain from fetch_option_chain(). When omitted, the chain is read back
+                         from the CSV files written by save_options_data().
+    """
+    # Fall back to the CSV files written by save_options_data() when no in-memory chain is given
+    if chain is None:
+        chain = OptionChain.load_csv(ticker)
+
+    return render_summary(summarize_chain(chain), width=width, height=height)
+
+
+def totals_annotation_text(total_call_volume, total_put_volume, total_call_premium, total_put_premium):
+    """
+    Text of the "Net Volume" and "Net Premium" boxes in the upper-right corner of the chart.
+
+    + Returns:
+    tuple: ( volume text, premium text ) as Plotly annotation HTML
+    """
     # Format total Volume for display
     formatted_call_volume = f"{int(total_call_volume):,}"
     formatted_put_volume = f"{int(total_put_volume):,}"
@@ -463,37 +733,6 @@ def calculate_and_visualize_data(ticker, width=600, height=400):
     call_color = "#32a852" if total_call_volume > total_put_volume else "#ffffff"  # Green if calls are higher
     put_color = "#de3557" if total_put_volume > total_call_volume else "#ffffff"  # Red if puts are higher
 
-    # Add annotation box to the upper-left corner
-    fig.add_annotation(
-        text=(
-            f"<b>Net Call Volume: <span style='color:{call_color}'>{formatted_call_volume}</b></span><br>"
-            f"<b>Net Put Volume: <span style='color:{put_color}'>{formatted_put_volume}</b></span>"
-        ),
-        xref="paper",
-        yref="paper",
-        x=0.99,  # move to right side
-        y=1.20,
-        xanchor="right",  # anchor on the right
-        yanchor="top",
-        showarrow=False,
-        font=dict(
-            family="Arial, sans-serif",
-            size=10,
-            color="white"
-        ),
-        align="right",  # text alignment
-        bgcolor="#515452",
-        bordercolor="#636363",
-        borderwidth=1,
-        borderpad=5
-    )
-
-    # Calculate total premiums for calls
-    total_call_premium = sum((df['volume'] * df['lastPrice'] * 100).sum() for df in calls_data.values() if not df.empty)
-
-    # Calculate total premiums for puts
-    total_put_premium = sum((df['volume'] * df['lastPrice'] * 100).sum() for df in puts_data.values() if not df.empty)
-
     # Format total premiums for display
     formatted_call_premium = format_dollar_amount(total_call_premium)
     formatted_put_premium = format_dollar_amount(total_put_premium)
@@ -502,149 +741,277 @@ def calculate_and_visualize_data(ticker, width=600, height=400):
     call_premium_color = "#32a852" if total_call_premium > total_put_premium else "#ffffff"  # Green if calls are higher
     put_premium_color = "#de3557" if total_put_premium > total_call_premium else "#ffffff"  # Red if puts are higher
 
-    # Add annotation for total premiums below the volume annotation
-    fig.add_annotation(
-        text=(
-            f"<b>Net Call Premium: <span style='color:{call_premium_color}'>{formatted_call_premium}</b></span><br>"
-            f"<b>Net Put Premium: <span style='color:{put_premium_color}'>{formatted_put_premium}</b></span>"
-        ),
-        xref="paper",
-        yref="paper",
-        x=0.99,
-        y=1.09,
-        xanchor="right",
-        yanchor="top",
-        showarrow=False,
-        font=dict(
-            family="Arial, sans-serif",
-            size=10,
-            color="white"
-        ),
-        align="right",
-        bgcolor="#515452",
-        bordercolor="#636363",
-        borderwidth=1,
-        borderpad=5
+    volume_text = (
+        f"<b>Net Call Volume: <span style='color:{call_color}'>{formatted_call_volume}</b></span><br>"
+        f"<b>Net Put Volume: <span style='color:{put_color}'>{formatted_put_volume}</b></span>"
+    )
+    premium_text = (
+        f"<b>Net Call Premium: <span style='color:{call_premium_color}'>{formatted_call_premium}</b></span><br>"
+        f"<b>Net Put Premium: <span style='color:{put_premium_color}'>{formatted_put_premium}</b></span>"
+    )
+    return volume_text, premium_text
+
+
+@lru_cache(maxsize=1)
+def figure_template():
+    """
+    The default Plotly template as a plain dict, the same one go.Figure() embeds in every figure's layout.
+    Built once per process; shared by every figure_dict(), so it must not be modified.
+    """
+    return go.Figure().layout.template.to_plotly_json()
+
+
+def _values(array):
+    """A numpy array as a list of Python numbers ( NaN stays NaN and is written as null )."""
+    return np.asarray(array, dtype=float).tolist()
+
+
+@span("render")
+def figure_dict(summary, width=600, height=400, oi_change=None):
+    """
+    Build the chart of a ChainSummary as a plain {"data": [...], "layout": {...}} dict, ready for a JSON encoder
+    such as orjson. It is the figure render_summary() draws, without building and validating Plotly's graph
+    objects ( which takes far longer than the analytics for a cached summary ).
+    oi_change ( {'calls': {label: change}, 'puts': {...}}, see ChainArchive.expiration_changes ) adds the open
+    interest change per expiration since the previous archived day, as two lines over the OI bars.
+    """
+    ticker = summary.ticker
+    company_name = summary.company_name
+    current_price = summary.current_price
+    daily_change_dollar = summary.daily_change_dollar
+    daily_change_pct = summary.daily_change_pct
+    calls, puts = summary.calls, summary.puts
+    call_dates = calls['expiration'].tolist()
+    put_dates = puts['expiration'].tolist()
+    top_volume_contracts = summary.top_volume_contracts
+    avg_strike = _values(summary.avg_strike)
+    call_strikes = [_values(calls[f'strike_{rank}']) for rank in (1, 2, 3)]
+    put_strikes = [_values(puts[f'strike_{rank}']) for rank in (1, 2, 3)]
+
+    data = [
+        # Bar graph for Call OI
+        {
+            'type': 'bar',
+            'x': call_dates,  # Sorted expiration dates for calls
+            'y': _values(calls['oi']),  # Total open interest per date
+            'name': 'Call OI',
+            'marker': {'color': '#708d8b'},
+            'opacity': 0.55,
+            'showlegend': True,
+            'hovertemplate': '%{y:.3s}<extra></extra>',
+        },
+        # Bar graph for Put OI
+        {
+            'type': 'bar',
+            'x': put_dates,  # Sorted expiration dates for puts
+            'y': _values(puts['oi']),  # Total open interest per date
+            'name': 'Put OI',
+            'marker': {'color': '#b87d6e'},
+            'opacity': 0.55,
+            'showlegend': True,
+            'hovertemplate': '%{y:.3s}<extra></extra>',
+        },
+        # The average strike line
+        {
+            'type': 'scatter',
+            'x': call_dates,  # Sorted expiration dates
+            'y': avg_strike,  # Average strikes per date
+            'name': 'Average',
+            'mode': 'lines+markers',
+            'connectgaps': True,
+            'marker': {
+                'color': '#565887',
+                'size': 4,
+                'symbol': 'square',  # Square markers
+                'line': {'color': 'black', 'width': 1},  # Border of the markers
+            },
+            'opacity': 0.80,
+            'yaxis': 'y2',  # Use secondary y-axis for strike prices
+            'showlegend': True,
+            'line': {'color': 'rgba(40, 40, 43, 0.5)', 'width': 2, 'dash': 'dashdot'},
+            'hovertemplate': '%{y:.2f}<extra></extra>',
+        },
+    ]
+
+    # Determine the max open interest for scaling
+    all_open_interest = np.concatenate([calls['max_oi'], puts['max_oi']])
+    all_open_interest = all_open_interest[~np.isnan(all_open_interest)]
+    max_open_interest = all_open_interest.max() if all_open_interest.size else 1  # Avoid division by zero
+
+    strike_hovertemplate = (
+        '<span style="font-family: Arial, sans-serif; font-size:9px;"><b>Strike:</b> $%{y:.2f}<br>'
+        '<b>Volume:</b> %{customdata[0]:,}<br>'
+        '<b>OI:</b> %{customdata[1]:,}</span><extra></extra>'
     )
 
-    # Add annotations for the highest volume contracts
+    # Line plots for the most bought call / put strikes, the top one with markers scaled by open interest
+    sides = (
+        ('Call', calls, call_dates, call_strikes, '#75f542', '#75f542', ('#57f542', '#25f74f')),
+        ('Put', puts, put_dates, put_strikes, '#f54242', '#de3557', ('#d16262', '#d17b7b')),
+    )
+    for name, side, dates, strikes, line_color, marker_color, runner_up_colors in sides:
+        data.append({
+            'type': 'scatter',
+            'x': dates,  # Sorted expiration dates
+            'y': strikes[0],
+            'name': name,
+            'mode': 'lines+markers',  # Add markers
+            'connectgaps': True,
+            'opacity': 0.56,
+            'yaxis': 'y2',
+            'showlegend': True,
+            'line': {'color': line_color, 'width': 2.65},
+            'marker': {
+                'size': (np.nan_to_num(side['max_oi']) / max_open_interest * 20).tolist() if max_open_interest > 0
+                else [5] * len(side),
+                'color': marker_color,
+                'symbol': 'square',
+                'line': {'width': 1, 'color': 'black'},  # Border color for contrast
+            },
+            'hovertemplate': strike_hovertemplate,
+            'customdata': np.column_stack([side['top_volume'], side['top_oi']]).astype(float).tolist(),
+        })
+        for rank, color, opacity, line_width in ((2, runner_up_colors[0], .47, 2.85),
+                                                 (3, runner_up_colors[1], .37, 2.55)):
+            data.append({
+                'type': 'scatter',
+                'x': dates,
+                'y': strikes[rank - 1],
+                'name': f"{'2nd' if rank == 2 else '3rd'} Most-Bought {name}",
+                'mode': 'lines',
+                'marker': {'color': color},
+                'opacity': opacity,
+                'line': {'width': line_width, 'dash': 'dot'},
+                'yaxis': 'y2',
+                'showlegend': False,
+                'hovertemplate': '%{y:.2f}<extra></extra>',
+            })
+
+    volume_text, premium_text = totals_annotation_text(
+        summary.total_call_volume, summary.total_put_volume, summary.total_call_premium, summary.total_put_premium)
+
+    # Annotation boxes in the upper-right corner: total volume, and total premiums below it
+    annotations = [
+        {
+            'text': text,
+            'xref': 'paper',
+            'yref': 'paper',
+            'x': 0.99,
+            'y': y,
+            'xanchor': 'right',
+            'yanchor': 'top',
+            'showarrow': False,
+            'font': {'family': 'Arial, sans-serif', 'size': 10, 'color': 'white'},
+            'align': 'right',
+            'bgcolor': '#515452',
+            'bordercolor': '#636363',
+            'borderwidth': 1,
+            'borderpad': 5,
+        }
+        for text, y in ((volume_text, 1.20), (premium_text, 1.09))
+    ]
+
+    # Annotations for the highest volume contracts
     offset_step = 2  # Incremental offset for each subsequent annotation
     for idx, ann in enumerate(top_volume_contracts):
         # Determine color based on option type
         color = '#ff5e00' if ann['type'] == 'PUT' else '#32a852'
 
-        # Change the marker symbol to a diamond
-        symbol = 'diamond'
-
-        # Format volume, strike, openInterest, and total_spent with commas
+        # Format volume and strike with commas
         formatted_volume = f"{int(ann['volume']):,}"
         formatted_strike = f"{int(ann['strike']):,}"
-        formatted_open_interest = f"{int(ann['openInterest']):,}"
         formatted_total_spent = ann['total_spent']
 
-        # Decide the background color if 'volume' > 'openInterest'
-        # Purple hex color example => #8B00FF or #800080
-        if ann['unusual']:
-            annotation_bg_color = '#2a1c63'  # Purple
-        else:
-            annotation_bg_color = '#3b3b3b'  # Default
+        # Purple background when 'volume' > 'openInterest'
+        annotation_bg_color = '#2a1c63' if ann['unusual'] else '#3b3b3b'
 
-        # Use HTML to format the annotation text
         annotation_text = (
             f"<b><span style='font-size:10px;'>${formatted_strike} <span style='color:{color}'>{ann['type']}</span></span></b><br>"
             f"<span style='font-size:10px;'><span style='color:#cfcfcf'><b>Qty:</span> {formatted_volume}<br></b></span>"
             f"<span style='font-size:10.5px;'><b>{formatted_total_spent}</b></span>"
         )
 
-        # Calculate offset to prevent overlap
-        ax_offset = 35 if ann['type'] == 'PUT' else -35  # Right for PUT, Left for CALL
-        ay_offset = -35 - (idx * offset_step)  # Vertical offset based on order
-
-        # Point annotations to the strike price on yaxis2
-        fig.add_annotation(
-            text=annotation_text,
-            x=ann['date'],  # Ensure this matches the formatted_date used in preprocessing
-            y=ann['strike'],  # Point to the strike price
-            yref='y2',  # Reference the y2 axis
-            font=dict(
-                family='Arial, sans-serif',
-                size=8,
-                color='#ffffff'
-            ),
-            bgcolor=annotation_bg_color,  # <-- Use the variable
-            showarrow=True,
-            arrowhead=0,  # Set to 0 to remove arrowhead shape
-            ax=ax_offset,
-            ay=ay_offset,
-            arrowwidth=1.5,
-            bordercolor='#636363',  # Set border color
-            borderwidth=1,  # Set border width for thin outline
-            borderpad=4  # Padding between the text and the border
-        )
-
-        # Add a triangle marker where the annotation is pointing
-        fig.add_trace(go.Scatter(
-            x=[ann['date']],  # Matches the x-axis dates in the graph
-            y=[ann['strike']],  # Ensure this is set to strike price for correct placement
-            mode='markers',
-            marker=dict(
-                size=8,  # Adjust size of the diamond marker
-                color=color,  # Use the same color as the annotation for consistency
-                symbol=symbol,  # Diamond shape for the marker
-                line=dict(width=1, color='#636363')  # Optional: border color for contrast
-            ),
-            showlegend=False,  # Hide this trace from the legend
-            xaxis='x',  # Ensure correct x-axis reference
-            yaxis='y2',  # Ensure correct y-axis reference for positioning
-            hoverinfo='skip'  # Disable hover text for this marker
-        ))
-
-    # Add a horizontal line for the current price
-    fig.add_shape(
-        type='line',
-        x0=0,
-        x1=1,
-        xref='paper',
-        y0=current_price,
-        y1=current_price,
-        yref='y2',
-        line=dict(
-            color='#00dbf4',
-            width=1.75,
-            dash='solid',
-        )
-    )
-
-    # Add annotation for the current price
-    fig.add_annotation(
-        text=f'${current_price:.2f}',
-        xref='paper',
-        x=-0.01,
-        y=current_price,
-        yref='y2',
-        font=dict(
-            family='Arial, sans-serif',
-            size=14,
-            color='#ffffff'
-        ),
-        bgcolor='#333333',
-        showarrow=False
-    )
-
-    # Add a dummy trace for the legend
-    fig.add_trace(go.Scatter(
-        x=[None],  # Use None to keep the trace from appearing on the plot
-        y=[None],  # Use None to keep the trace from appearing on the plot
-        mode='markers',
-        marker=dict(
-            size=25,
-            color='#3b3b3b',
-            symbol='square',
-            line=dict(width=1, color='#636363')  # border color
-        ),
-        name='<span style="color:#10112e">Most Active Options</span>',  # Custom legend text
-        showlegend=True
-    ))
+        # Point the annotation to the strike price on yaxis2, offset to prevent overlap
+        annotations.append({
+            'text': annotation_text,
+            'x': ann['date'],
+            'y': ann['strike'],
+            'yref': 'y2',
+            'font': {'family': 'Arial, sans-serif', 'size': 8, 'color': '#ffffff'},
+            'bgcolor': annotation_bg_color,
+            'showarrow': True,
+            'arrowhead': 0,  # No arrowhead shape
+            'ax': 35 if ann['type'] == 'PUT' else -35,  # Right for PUT, Left for CALL
+            'ay': -35 - (idx * offset_step),  # Vertical offset based on order
+            'arrowwidth': 1.5,
+            'bordercolor': '#636363',
+            'borderwidth': 1,
+            'borderpad': 4,
+        })
+
+        # A diamond marker where the annotation is pointing
+        data.append({
+            'type': 'scatter',
+            'x': [ann['date']],
+            'y': [ann['strike']],
+            'mode': 'markers',
+            'marker': {'size': 8, 'color': color, 'symbol': 'diamond', 'line': {'width': 1, 'color': '#636363'}},
+            'showlegend': False,
+            'xaxis': 'x',
+            'yaxis': 'y2',
+            'hoverinfo': 'skip',
+        })
+
+    # Horizontal line and label for the current price
+    shapes = [{
+        'type': 'line',
+        'x0': 0,
+        'x1': 1,
+        'xref': 'paper',
+        'y0': current_price,
+        'y1': current_price,
+        'yref': 'y2',
+        'line': {'color': '#00dbf4', 'width': 1.75, 'dash': 'solid'},
+    }]
+    annotations.append({
+        'text': f'${current_price:.2f}',
+        'xref': 'paper',
+        'x': -0.01,
+        'y': current_price,
+        'yref': 'y2',
+        'font': {'family': 'Arial, sans-serif', 'size': 14, 'color': '#ffffff'},
+        'bgcolor': '#333333',
+        'showarrow': False,
+    })
+
+    # A dummy trace for the legend
+    data.append({
+        'type': 'scatter',
+        'x': [None],  # None keeps the trace from appearing on the plot
+        'y': [None],
+        'mode': 'markers',
+        'marker': {'size': 25, 'color': '#3b3b3b', 'symbol': 'square', 'line': {'width': 1, 'color': '#636363'}},
+        'name': '<span style="color:#10112e">Most Active Options</span>',  # Custom legend text
+        'showlegend': True,
+    })
+
+    # Open interest change since the previous archived snapshot, on the OI axis
+    if oi_change:
+        for name, dates, changes, color in (('Call OI Change', call_dates, oi_change['calls'], '#3f5654'),
+                                            ('Put OI Change', put_dates, oi_change['puts'], '#7a4a3e')):
+            data.append({
+                'type': 'scatter',
+                'x': dates,
+                'y': [changes.get(date, np.nan) for date in dates],
+                'name': name,
+                'mode': 'lines+markers',
+                'connectgaps': False,
+                'marker': {'color': color, 'size': 5, 'symbol': 'circle'},
+                'line': {'color': color, 'width': 1.5, 'dash': 'dot'},
+                'opacity': 0.85,
+                'showlegend': True,
+                'hovertemplate': f'{name}: %{{y:+,.0f}}<extra></extra>',
+            })
 
     dollar_color = "green" if daily_change_dollar > 0 else "red"
     pct_color = "green" if daily_change_pct > 0 else "red"
@@ -659,58 +1026,121 @@ def calculate_and_visualize_data(ticker, width=600, height=400):
         f"</span>"
     )
 
-    # Update layout with consistent settings
-    fig.update_layout(
-        title=dict(
-            text=title_text,
-            x=0.1,  # Move all the way to the left edge of the plot
-            xanchor='left',  # Anchor it on the left side
-            y=0.94,
-            yanchor='top',
-            font=dict(
-                size=30,
-                family='Times New Roman, serif',
-                color='#01234a',
-                style='italic'
-            )
-        ),
-        xaxis=dict(
-            title='',
-            title_font=dict(size=20, family='Arial, sans-serif', color='#2c3442', style='italic'),
-            showgrid=False,
-            autorange=True,
-            tickangle=38,  # Force the x-axis tick labels to display at a 45-degree angle
-            tickfont=dict(
-                family="Arial, sans-serif",
-                size=13.5,  # Adjust size if necessary
-                color='#01234a'
-            )
-        ),
-        yaxis=dict(
-            title='',  # Hide the Open Interest title
-            showticklabels=False,  # Hide the tick labels
-            showgrid=False,  # Hide grid lines
-            side='right',
-            autorange=True
-        ),
-        yaxis2=dict(
-            title='Strike',
-            title_font=dict(size=30, family='Arial, sans-serif', color='#2c3442', style='italic'),
-            side='left',
-            overlaying='y',
-            range=[0, max(max(max_strike_calls.values(), default=0),
-                          max(max_strike_puts.values(), default=0),
-                          max(avg_strike.values(), default=0),
-                          current_price) + 50],
-            autorange=True
-        ),
-        barmode='group',
-        plot_bgcolor='#a8a8a8',
-        paper_bgcolor='#a8a8a8',
-        showlegend=False,
-        width=width,
-        height=height
-    )
+    layout = {
+        'annotations': annotations,
+        'shapes': shapes,
+        'template': figure_template(),
+        'title': {
+            'text': title_text,
+            'x': 0.1,  # Near the left edge of the plot
+            'xanchor': 'left',
+            'y': 0.94,
+            'yanchor': 'top',
+            'font': {'size': 30, 'family': 'Times New Roman, serif', 'color': '#01234a', 'style': 'italic'},
+        },
+        'xaxis': {
+            'title': {'text': '', 'font': {'size': 20, 'family': 'Arial, sans-serif', 'color': '#2c3442',
+                                           'style': 'italic'}},
+            'showgrid': False,
+            'autorange': True,
+            'tickangle': 38,  # Slanted x-axis tick labels
+            'tickfont': {'family': 'Arial, sans-serif', 'size': 13.5, 'color': '#01234a'},
+        },
+        'yaxis': {
+            'title': {'text': ''},  # Hide the Open Interest title
+            'showticklabels': False,
+            'showgrid': False,
+            'side': 'right',
+            'autorange': True,
+        },
+        'yaxis2': {
+            'title': {'text': 'Strike', 'font': {'size': 30, 'family': 'Arial, sans-serif', 'color': '#2c3442',
+                                                 'style': 'italic'}},
+            'side': 'left',
+            'overlaying': 'y',
+            'range': [0, max(max(call_strikes[0], default=0),
+                             max(put_strikes[0], default=0),
+                             max(avg_strike, default=0),
+                             current_price) + 50],
+            'autorange': True,
+        },
+        'barmode': 'group',
+        'plot_bgcolor': '#a8a8a8',
+        'paper_bgcolor': '#a8a8a8',
+        'showlegend': False,
+        'width': width,
+        'height': height,
+    }
+
+    return {'data': data, 'layout': layout}
+
+
+# -- COMPACT FIGURES -- #
+TYPED_ARRAY_MIN_LENGTH = 8  # Shorter arrays stay JSON lists; base64 only pays off on longer ones
+INT32_MAX = np.iinfo(np.int32).max
+
+
+def typed_array(values):
+    """
+    A list of numbers as a Plotly typed array spec, {"dtype": ..., "bdata": <base64>}, which plotly.js ( >= 2.28 )
+    decodes into a typed array. Whole numbers ( open interest, volumes ) go as int32, anything else as float32:
+    about 7 significant digits, more than the chart shows. NaN ( a gap ) stays NaN.
+    A 2-D array ( customdata: one row per point ) also carries its "shape".
+    """
+    array = np.asarray(values, dtype=float)
+    finite = array[np.isfinite(array)]
+    if finite.size == array.size and np.all(finite == np.round(finite)) and np.all(np.abs(finite) <= INT32_MAX):
+        dtype, typed = 'i4', array.astype('<i4')
+    else:
+        dtype, typed = 'f4', array.astype('<f4')
+    spec = {'dtype': dtype, 'bdata': base64.b64encode(typed.tobytes()).decode('ascii')}
+    if array.ndim > 1:
+        spec['shape'] = ','.join(str(length) for length in array.shape)
+    return spec
 
-    return fig
-    pass
+
+def _compact_numbers(values):
+    """values as a typed array if it is a long enough list of numbers ( or of rows of numbers ), else unchanged."""
+    if not isinstance(values, list) or len(values) < TYPED_ARRAY_MIN_LENGTH:
+        return values
+    rows = values if all(isinstance(value, list) for value in values) else [values]
+    if len({len(row) for row in rows}) == 1 and all(isinstance(value, (int, float)) for row in rows for value in row):
+        return typed_array(values)
+    return values
+
+
+def compact_figure(figure):
+    """
+    A smaller wire form of a figure_dict() figure, for the web front end:
+
+    - y values, marker sizes and customdata as base64 typed arrays ( see typed_array )
+    - expiration dates listed once, in the figure's "x_labels"; each trace's x is {"label_index": [...]}
+      into that list ( the same dates are repeated by up to 8 traces ), expanded back by the front end
+
+    Layout and everything else is unchanged. The input figure isn't modified.
+    """
+    labels = {}
+    data = []
+    for trace in figure['data']:
+        trace = dict(trace)
+        x = trace.get('x')
+        if x and all(isinstance(value, str) for value in x):
+            trace['x'] = {'label_index': [labels.setdefault(value, len(labels)) for value in x]}
+        for key in ('y', 'customdata'):
+            if key in trace:
+                trace[key] = _compact_numbers(trace[key])
+        marker = trace.get('marker')
+        if marker and 'size' in marker:
+            trace['marker'] = dict(marker, size=_compact_numbers(marker['size']))
+        data.append(trace)
+    return {'data': data, 'layout': figure['layout'], 'x_labels': list(labels)}
+
+
+def render_summary(summary, width=600, height=400):
+    """
+    Build the Plotly figure for a ChainSummary. Rendering is separate from the analytics, so a cached
+    summary can be drawn again at any width / height without touching the option chain.
+    The figure is figure_dict() loaded into Plotly's graph objects; the web endpoints send figure_dict() itself
+    ( as compact_figure() ).
+    """
+    return go.Figure(figure_dict(summary, width=width, height=height))
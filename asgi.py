@@ -0,0 +1,208 @@
+"""
+ASGI entry point, for serving Vectr from an asyncio server instead of Flask's threaded one:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+/process_ticker, /get_performance and /get_performance_group are answered natively on the event loop. Their
+blocking work ( yfinance fetches, the first performance snapshot, chart rendering ) is offloaded to one bounded
+thread pool, so hundreds of slow requests can be waiting at once while only VECTR_ASYNC_WORKERS threads exist.
+Requests waiting for the same work share a single call, and answers that are already in memory ( sector ETF
+performance, rendered charts ) never leave the event loop, so they aren't queued behind slow fetches.
+
+Every other route is the Flask app, run through asgiref's WSGI adapter with a thread per request.
+"""
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import ThreadSensitiveContext
+from asgiref.wsgi import WsgiToAsgi
+from markupsafe import escape
+from werkzeug.wrappers import Request
+
+import FlaskAppVectr as vectr
+import compression
+import metrics
+
+# Threads doing blocking work for the native endpoints ( also the limit on concurrent upstream fetches )
+ASYNC_WORKERS = int(os.environ.get("VECTR_ASYNC_WORKERS", "64"))
+
+blocking_executor = ThreadPoolExecutor(max_workers=ASYNC_WORKERS, thread_name_prefix="asgi-blocking")
+
+
+class AsyncSingleFlight:
+    """Run func(*args) in the blocking executor once per key; concurrent callers with that key await the same call."""
+
+    def __init__(self, executor):
+        self.executor = executor
+        self._futures = {}  # key -> asyncio.Future
+
+    async def run(self, key, func, *args):
+        future = self._futures.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+            self._futures[key] = future
+            future.add_done_callback(lambda done: self._futures.pop(key, None) if self._futures.get(key) is done else None)
+        # A waiter that goes away ( client disconnect ) must not cancel the call the others are waiting on
+        return await asyncio.shield(future)
+
+    def __len__(self):
+        return len(self._futures)
+
+
+flights = AsyncSingleFlight(blocking_executor)
+
+
+def build_environ(scope, body):
+    """WSGI environ for an ASGI HTTP scope, so werkzeug can parse the query string, form and headers."""
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf8").decode("latin1"),
+        "PATH_INFO": scope["path"].encode("utf8").decode("latin1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin1")
+        key = {"content-type": "CONTENT_TYPE", "content-length": "CONTENT_LENGTH"}.get(
+            name, "HTTP_" + name.upper().replace("-", "_"))
+        value = value.decode("latin1")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    environ["CONTENT_LENGTH"] = str(len(body))  # The body has been read in full, whatever framing it came in
+    return environ
+
+
+async def read_body(receive):
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return bytes(body)
+
+
+async def send_response(send, response, environ):
+    """Send a werkzeug / Flask response object over ASGI ( without a body for 304s and HEAD requests )."""
+    headers = [(name.lower().encode("latin1"), value.encode("latin1")) for name, value in response.headers.items()]
+    await send({"type": "http.response.start", "status": response.status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": b"".join(response.get_app_iter(environ))})
+
+
+def json_response(payload, status=200):
+    response = vectr.app.json.response(payload)
+    response.status_code = status
+    return response
+
+
+async def process_ticker(request):
+    ticker = escape(request.values.get('ticker', '').strip().upper())
+
+    if not ticker:
+        return json_response({'error': 'No ticker provided'}, 400)
+    if not vectr.valid_symbol(ticker):
+        return json_response({'error': 'Invalid ticker symbol'}, 400)
+
+    try:
+        ticker = str(ticker)
+        width, height = vectr.figure_size(request.values)
+        chain = vectr.chain_cache.peek(ticker)
+        if chain is not None:
+            rendered = vectr.figure_cache.peek(vectr.figure_cache_key(ticker, chain, width, height))
+            if rendered is not None:
+                # Already rendered for this snapshot: answer without leaving the loop
+                return vectr.conditional_figure(rendered, request)
+
+        quote = None
+        if chain is None or vectr.summary_cache.peek((ticker, chain.fetched_at)) is None:
+            # Nothing cached to draw from: fetch the quote alongside the chain instead of after it
+            quote, _ = await asyncio.gather(flights.run(("quote", ticker), vectr.fetch_quote, ticker),
+                                            flights.run(("chain", ticker), vectr.get_option_chain, ticker))
+        rendered = await flights.run(("figure", ticker, width, height), vectr.render_figure, ticker, width, height,
+                                     None, quote)
+        return vectr.conditional_figure(rendered, request)
+    except Exception as e:
+        error = f"An error occurred while processing {ticker}: {e}"
+        print(error)
+        return json_response({'error': error}, 500)
+
+
+async def get_performance(request):
+    etf, timeframe = vectr.performance_symbol(request.args.get("etf")), request.args.get("timeframe")
+    if etf is None:
+        return json_response({'error': 'Invalid ETF symbol'}, 400)
+    matrix = vectr.performance_snapshot.peek()
+
+    if matrix is not None and etf in matrix.etfs:
+        # Read from the in-memory snapshot ( custom lookbacks are one binary search ): no need to leave the loop
+        payload, matrix = vectr.performance_data(etf, timeframe, matrix)
+    else:
+        payload, matrix = await flights.run(("performance", etf, timeframe), vectr.performance_data, etf, timeframe)
+    return json_response(payload) if matrix is None else vectr.conditional_json(payload, matrix, request)
+
+
+async def get_performance_group(request):
+    timeframe = request.args.get("timeframe")
+    matrix = vectr.performance_snapshot.peek()
+
+    if matrix is not None:
+        payload, matrix = vectr.performance_group_data(timeframe, matrix)
+    else:
+        payload, matrix = await flights.run(("performance_group", timeframe), vectr.performance_group_data, timeframe)
+    return vectr.conditional_json(payload, matrix, request)
+
+
+# ( method, path ) -> coroutine taking a werkzeug Request and returning a response
+NATIVE_ROUTES = {
+    ("GET", "/process_ticker"): process_ticker,
+    ("POST", "/process_ticker"): process_ticker,
+    ("GET", "/get_performance"): get_performance,
+    ("GET", "/get_performance_group"): get_performance_group,
+}
+
+flask_app = WsgiToAsgi(vectr.app)
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                blocking_executor.shutdown(wait=False, cancel_futures=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    handler = NATIVE_ROUTES.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+    if handler is None:
+        # asgiref runs every WSGI call on one shared thread unless each gets its own thread-sensitive context
+        async with ThreadSensitiveContext():
+            await flask_app(scope, receive, send)
+        return
+
+    started, status = metrics.request_started(), 500
+    try:
+        body = await read_body(receive)
+        if body is None:
+            status = 499  # Client disconnected before sending the whole request
+            return
+        request = Request(build_environ(scope, body))
+        response = await handler(request)
+        status = response.status_code
+        response = compression.compress_response(vectr.apply_security_headers(response), request)
+        await send_response(send, response, request.environ)
+    finally:
+        metrics.request_finished(scope["path"], scope["method"], status, started)
@@ -0,0 +1,227 @@
+"""
+Concurrent-request throughput of the ASGI entry point ( asgi.py under uvicorn ) against Flask's threaded server.
+
+Both servers run in a subprocess of this script, with the data provider replaced by a stub that sleeps for
+--latency seconds per upstream call, so the numbers measure how each server copes with many slow requests at once rather
+than the network. Every /process_ticker request uses a ticker nobody asked for before ( a cache miss ), while
+/get_performance requests are answered from the sector snapshot.
+
+    python benchmarks/async_vs_threaded.py --requests 400 --concurrency 200 --latency 0.25
+
+Prints one JSON object per server: throughput, latency percentiles, errors and the server's peak thread count.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SECTOR_ETFS = ["XLRE", "XLE", "XLU", "XLK", "XLB", "XLP", "XLY", "XLI", "XLC", "XLV", "XLF", "XBI"]
+
+
+# ---------------------------------------------------------------------------------------------------------------
+# Server side ( runs in the subprocess )
+# ---------------------------------------------------------------------------------------------------------------
+
+def install_stub(latency):
+    """Install a deterministic stub, sleeping `latency` seconds per upstream call, as the process-wide data provider."""
+    import numpy as np
+    import pandas as pd
+    from providers import MarketDataProvider, set_provider
+
+    class StubProvider(MarketDataProvider):
+        def options(self, symbol):
+            time.sleep(latency)
+            today = pd.Timestamp.today().normalize()
+            return tuple((today + pd.Timedelta(days=7 * (week + 1))).strftime("%Y-%m-%d") for week in range(4))
+
+        def option_chain(self, symbol, date):
+            time.sleep(latency)
+            rng = np.random.default_rng(sum(map(ord, symbol)))
+            strikes = np.arange(50.0, 150.0, 2.5)
+
+            def side():
+                return pd.DataFrame({
+                    "contractSymbol": [f"{symbol}{date}{strike}" for strike in strikes],
+                    "strike": strikes,
+                    "lastPrice": rng.uniform(0.1, 20, len(strikes)).round(2),
+                    "volume": rng.integers(0, 5000, len(strikes)).astype(float),
+                    "openInterest": rng.integers(0, 20000, len(strikes)).astype(float),
+                    "lastTradeDate": pd.Timestamp.now(tz="UTC").floor("s"),
+                })
+
+            return side(), side()
+
+        def history(self, symbol, period=None, start=None):
+            time.sleep(latency)
+            days = 2 if period in ("1d", "2d") else 2000
+            index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days, tz="America/New_York")
+            close = 100 * np.exp(np.cumsum(np.random.default_rng(sum(map(ord, symbol))).normal(0, 0.01, days)))
+            frame = pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1e6,
+                                  "Dividends": 0.0, "Stock Splits": 0.0}, index=index)
+            return frame.iloc[-1:] if period == "1d" else frame
+
+        def info(self, symbol):
+            time.sleep(latency)
+            return {"longName": f"{symbol} Inc."}
+
+    set_provider(StubProvider())
+
+
+def serve(mode, port, latency):
+    os.chdir(tempfile.mkdtemp())  # Price store and other files go to a scratch directory
+    sys.path.insert(0, REPO_DIR)
+    install_stub(latency)
+
+    import FlaskAppVectr
+    FlaskAppVectr.performance_snapshot.get()  # Warm the sector snapshot, as a running server would have
+
+    if mode == "threaded":
+        import logging
+        from werkzeug.serving import make_server
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)  # No access log line per request
+        make_server("127.0.0.1", port, FlaskAppVectr.app, threaded=True).serve_forever()
+    else:
+        import uvicorn
+        uvicorn.run("asgi:app", host="127.0.0.1", port=port, log_level="warning", backlog=4096)
+
+
+# ---------------------------------------------------------------------------------------------------------------
+# Client side
+# ---------------------------------------------------------------------------------------------------------------
+
+async def http_request(port, method, path, body=b""):
+    """One HTTP/1.1 request on a fresh connection; returns ( status, latency in seconds )."""
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port, limit=2 ** 24)
+    headers = f"{method} {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n"
+    if body:
+        headers += f"Content-Type: application/x-www-form-urlencoded\r\nContent-Length: {len(body)}\r\n"
+    writer.write(headers.encode() + b"\r\n" + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    status = int(response.split(b" ", 2)[1]) if response.startswith(b"HTTP/") else 0
+    return status, time.perf_counter() - started
+
+
+def request_mix(total, run_id):
+    """( method, path, body ) of each request: 3 / 4 option chains for new tickers, 1 / 4 sector performance."""
+    requests = []
+    for number in range(total):
+        if number % 4 == 3:
+            etf = SECTOR_ETFS[number % len(SECTOR_ETFS)]
+            requests.append(("GET", f"/get_performance?etf={etf}&timeframe=1-month", b""))
+        else:
+            requests.append(("POST", "/process_ticker", f"ticker={run_id}{number:05d}".encode()))
+    return requests
+
+
+def peak_threads(pid, stop, result):
+    """Sample the server's thread count from /proc until stop is set ( Linux only; -1 elsewhere )."""
+    result.append(-1)
+    while not stop.is_set():
+        try:
+            with open(f"/proc/{pid}/status") as status:
+                for line in status:
+                    if line.startswith("Threads:"):
+                        result[0] = max(result[0], int(line.split()[1]))
+        except OSError:
+            return
+        time.sleep(0.05)
+
+
+async def run_load(port, total, concurrency, run_id):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(method, path, body):
+        async with semaphore:
+            try:
+                status, latency = await http_request(port, method, path, body)
+            except OSError:
+                status, latency = 0, 0.0
+            return path.split("?")[0], status, latency
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(*request) for request in request_mix(total, run_id)))
+    return results, time.perf_counter() - started
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))] if values else None
+
+
+async def wait_until_up(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            status, _ = await http_request(port, "GET", "/cache_stats")
+            if status == 200:
+                return
+        except OSError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def benchmark(mode, port, args):
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", mode, "--port", str(port),
+                               "--latency", str(args.latency)])
+    try:
+        asyncio.run(wait_until_up(port))
+        stop, threads = threading.Event(), []
+        sampler = threading.Thread(target=peak_threads, args=(server.pid, stop, threads), daemon=True)
+        sampler.start()
+        results, elapsed = asyncio.run(run_load(port, args.requests, args.concurrency, mode[0].upper()))
+        stop.set()
+        sampler.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    def latency_stats(latencies):
+        return {f"p{q}_ms": round(percentile(latencies, q) * 1000, 1) if latencies else None for q in (50, 95, 99)}
+
+    ok = [(path, latency) for path, status, latency in results if status == 200]
+    report = {
+        "server": mode,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "upstream_latency": args.latency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 2),
+        "errors": sum(1 for _, status, _ in results if status != 200),
+        **latency_stats([latency for _, latency in ok]),
+        "peak_threads": threads[0] if threads else -1,
+    }
+    for path in sorted({path for path, _ in ok}):
+        report[path] = latency_stats([latency for request_path, latency in ok if request_path == path])
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.25, help="Seconds per stubbed upstream call")
+    parser.add_argument("--servers", default="threaded,asgi")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--serve", choices=["threaded", "asgi"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.latency)
+        return
+
+    for offset, mode in enumerate(args.servers.split(",")):
+        print(json.dumps(benchmark(mode, args.port + offset, args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compare two result files of run_benchmarks.py and flag regressions:
+
+    python benchmarks/compare.py benchmarks/results/<baseline>.json benchmarks/results/<candidate>.json
+
+A benchmark regresses when its median time or its peak memory grew by more than --threshold ( 10% by default ).
+The exit status is 1 when anything regressed, so the comparison can gate a CI job.
+"""
+import argparse
+import json
+import sys
+
+
+def load_results(path):
+    with open(path) as f:
+        report = json.load(f)
+    return report["environment"], {result["name"]: result for result in report["results"]}
+
+
+def change(old, new):
+    """Relative change from old to new ( +0.25 is 25% more ), None when there is no baseline value."""
+    return (new - old) / old if old else None
+
+
+def format_change(value):
+    return "    n/a" if value is None else f"{value * 100:+6.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative growth counted as a regression")
+    args = parser.parse_args()
+
+    old_env, old_results = load_results(args.baseline)
+    new_env, new_results = load_results(args.candidate)
+    print(f"baseline  {(old_env.get('commit') or '?')[:10]}  {old_env.get('timestamp')}")
+    print(f"candidate {(new_env.get('commit') or '?')[:10]}  {new_env.get('timestamp')}")
+    if (old_env.get("platform"), old_env.get("cpu_count")) != (new_env.get("platform"), new_env.get("cpu_count")):
+        print("warning: the two runs were measured on different machines")
+    print()
+    print(f"{'benchmark':<42} {'median ms':>21} {'time':>8} {'peak MiB':>19} {'memory':>8}")
+
+    regressions = []
+    for name, new in new_results.items():
+        old = old_results.get(name)
+        if old is None:
+            print(f"{name:<42} {'':>10} {new['median_s'] * 1000:10.3f} {'new':>8}")
+            continue
+
+        time_change = change(old["median_s"], new["median_s"])
+        memory_change = change(old["peak_memory_bytes"], new["peak_memory_bytes"])
+        flags = [label for label, value in (("time", time_change), ("memory", memory_change))
+                 if value is not None and value > args.threshold]
+        if flags:
+            regressions.append((name, flags))
+        print(f"{name:<42} {old['median_s'] * 1000:10.3f} {new['median_s'] * 1000:10.3f} {format_change(time_change):>8} "
+              f"{old['peak_memory_bytes'] / 2 ** 20:9.2f} {new['peak_memory_bytes'] / 2 ** 20:9.2f} "
+              f"{format_change(memory_change):>8}{'  REGRESSION' if flags else ''}")
+
+    for name in old_results.keys() - new_results.keys():
+        print(f"{name:<42} missing from the candidate run")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}: "
+              + ", ".join(f"{name} ({'/'.join(flags)})" for name, flags in regressions))
+        sys.exit(1)
+    print(f"\nNo regressions above {args.threshold:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
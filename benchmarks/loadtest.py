@@ -0,0 +1,266 @@
+"""
+HTTP load test of the Vectr server: how /process_ticker and /sp500sectors latency degrades as concurrency rises,
+and where throughput saturates.
+
+The server runs in a subprocess of this script with the synthetic data provider ( see synthetic.py ) and
+synthetic holdings files, so no request leaves the machine; --latency makes every upstream call sleep like a
+network round trip. For each concurrency level, that many clients send requests back to back for --duration
+seconds ( after --warmup seconds that aren't counted ), each picking an endpoint from --mix and a ticker from
+--tickers.
+
+    python benchmarks/loadtest.py --concurrency 1,4,16,64 --duration 20
+    python benchmarks/loadtest.py --mix process_ticker=1 --tickers AAPL:5,MSFT:3,SPY --unique 0.2 --latency 0.2
+    python benchmarks/loadtest.py --server asgi --output loadtest.json
+
+Per level and endpoint it reports throughput, latency percentiles, a latency histogram and the error rate.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from async_vs_threaded import http_request, percentile, wait_until_up  # noqa: E402
+
+# Upper bounds ( ms ) of the latency histogram buckets; the last bucket is open-ended
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, float("inf"))
+
+SATURATION_GAIN = 0.10  # A level saturates the server when the next one adds less than 10% throughput
+
+SECTOR_ETFS = ["XLRE", "XLE", "XLU", "XLK", "XLB", "XLP", "XLY", "XLI", "XLC", "XLV", "XLF", "XBI"]
+
+
+# ---------------------------------------------------------------------------------------------------------------
+# Server side ( runs in the subprocess )
+# ---------------------------------------------------------------------------------------------------------------
+
+def serve(mode, port, latency, expirations, strikes):
+    os.chdir(tempfile.mkdtemp(prefix="vectr-loadtest-"))  # Price store, holdings and CSVs go to a scratch directory
+    sys.path.insert(0, REPO_DIR)
+
+    from providers import set_provider
+    from synthetic import SyntheticProvider, synthetic_holdings
+    set_provider(SyntheticProvider(expirations=expirations, strikes=strikes, latency=latency))
+
+    from holdings import save_holdings
+    for etf in SECTOR_ETFS:
+        save_holdings(etf, synthetic_holdings(etf))
+
+    import FlaskAppVectr
+    FlaskAppVectr.holdings_refresher.state["last_success"] = time.time()  # The files above are today's: no download
+    FlaskAppVectr.performance_snapshot.get()  # Warm the sector snapshot, as a running server would have
+
+    if mode == "threaded":
+        import logging
+        from werkzeug.serving import make_server
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)  # No access log line per request
+        make_server("127.0.0.1", port, FlaskAppVectr.app, threaded=True).serve_forever()
+    else:
+        import uvicorn
+        uvicorn.run("asgi:app", host="127.0.0.1", port=port, log_level="warning", backlog=4096)
+
+
+# ---------------------------------------------------------------------------------------------------------------
+# Client side
+# ---------------------------------------------------------------------------------------------------------------
+
+def parse_weights(spec, default_weight=1.0):
+    """'a=3,b' / 'a:3,b' -> {'a': 3.0, 'b': 1.0}"""
+    weights = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, weight = item.replace(":", "=").partition("=")
+        weights[name] = float(weight) if weight else default_weight
+    return weights
+
+
+class RequestMix:
+    """
+    Picks the next request: an endpoint by --mix weight, and for /process_ticker a ticker by --tickers weight,
+    or a ticker never requested before ( a guaranteed cache miss ) with probability --unique.
+    """
+
+    def __init__(self, endpoints, tickers, unique, seed=0):
+        self.endpoints = list(endpoints)
+        self.endpoint_weights = list(endpoints.values())
+        self.tickers = list(tickers)
+        self.ticker_weights = list(tickers.values())
+        self.unique = unique
+        self.random = random.Random(seed)
+        self.unique_count = 0
+
+    def ticker(self):
+        if self.random.random() < self.unique:
+            self.unique_count += 1
+            return f"U{self.unique_count:06d}"
+        return self.random.choices(self.tickers, self.ticker_weights)[0]
+
+    def next(self):
+        """( endpoint, method, path, body )"""
+        endpoint = self.random.choices(self.endpoints, self.endpoint_weights)[0]
+        if endpoint == "process_ticker":
+            return endpoint, "POST", "/process_ticker", f"ticker={self.ticker()}".encode()
+        if endpoint == "get_performance":
+            etf = self.random.choice(SECTOR_ETFS)
+            return endpoint, "GET", f"/get_performance?etf={etf}&timeframe=1-month", b""
+        return endpoint, "GET", f"/{endpoint}", b""
+
+
+async def run_level(port, mix, concurrency, duration, timeout):
+    """concurrency clients sending requests back to back for duration seconds; returns [( endpoint, outcome, s )]."""
+    deadline = time.perf_counter() + duration
+    samples = []
+
+    async def client():
+        while time.perf_counter() < deadline:
+            endpoint, method, path, body = mix.next()
+            started = time.perf_counter()
+            try:
+                status, latency = await asyncio.wait_for(http_request(port, method, path, body), timeout)
+                outcome = "ok" if status == 200 else f"http_{status}"
+            except asyncio.TimeoutError:
+                outcome, latency = "timeout", time.perf_counter() - started
+            except OSError:
+                outcome, latency = "connection", time.perf_counter() - started
+            samples.append((endpoint, outcome, latency))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+def histogram(latencies):
+    """Count of latencies per HISTOGRAM_BUCKETS_MS bucket, as {"<=10ms": n, ...}."""
+    counts = Counter()
+    for latency in latencies:
+        milliseconds = latency * 1000
+        bound = next(bound for bound in HISTOGRAM_BUCKETS_MS if milliseconds <= bound)
+        counts[bound] += 1
+    return {(f"<={bound:g}ms" if bound != float("inf") else f">{HISTOGRAM_BUCKETS_MS[-2]:g}ms"): counts[bound]
+            for bound in HISTOGRAM_BUCKETS_MS}
+
+
+def summarize(samples, elapsed):
+    """Throughput, latency percentiles ( of successful requests ), histogram and errors of a set of samples."""
+    ok = [latency for _, outcome, latency in samples if outcome == "ok"]
+    errors = Counter(outcome for _, outcome, _ in samples if outcome != "ok")
+    return {
+        "requests": len(samples),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(sum(errors.values()) / len(samples), 4) if samples else 0.0,
+        "errors": dict(errors),
+        **{f"p{q}_ms": round(percentile(ok, q) * 1000, 1) if ok else None for q in (50, 95, 99)},
+        "max_ms": round(max(ok) * 1000, 1) if ok else None,
+        "histogram": histogram(ok),
+    }
+
+
+def saturation_point(levels):
+    """Lowest concurrency beyond which more clients add less than SATURATION_GAIN throughput ( None if never )."""
+    for current, following in zip(levels, levels[1:]):
+        if following["total"]["throughput_rps"] < current["total"]["throughput_rps"] * (1 + SATURATION_GAIN):
+            return current["concurrency"]
+    return None
+
+
+def print_level(level):
+    print(f"\nconcurrency {level['concurrency']}  ( {level['elapsed_s']} s )")
+    print(f"  {'endpoint':<18} {'requests':>8} {'rps':>9} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in list(level["endpoints"].items()) + [("total", level["total"])]:
+        print(f"  {name:<18} {stats['requests']:>8} {stats['throughput_rps']:>9.2f} {stats['error_rate']:>7.1%} "
+              + " ".join(f"{stats[key] if stats[key] is not None else '-':>9}" for key in ("p50_ms", "p95_ms", "p99_ms")))
+    for name, stats in level["endpoints"].items():
+        total = sum(stats["histogram"].values()) or 1
+        print(f"  {name} latency histogram")
+        for bucket, count in stats["histogram"].items():
+            if count:
+                print(f"    {bucket:>10} {count:>7}  {'#' * max(1, round(40 * count / total))}")
+
+
+async def load_test(port, args):
+    mix = RequestMix(parse_weights(args.mix), parse_weights(args.tickers), args.unique, seed=args.seed)
+    await wait_until_up(port)
+
+    levels = []
+    for concurrency in (int(level) for level in args.concurrency.split(",")):
+        if args.warmup > 0:
+            await run_level(port, mix, concurrency, args.warmup, args.timeout)
+        samples, elapsed = await run_level(port, mix, concurrency, args.duration, args.timeout)
+        level = {
+            "concurrency": concurrency,
+            "elapsed_s": round(elapsed, 3),
+            "endpoints": {endpoint: summarize([sample for sample in samples if sample[0] == endpoint], elapsed)
+                          for endpoint in sorted({sample[0] for sample in samples})},
+            "total": summarize(samples, elapsed),
+        }
+        levels.append(level)
+        print_level(level)
+    return levels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", choices=["threaded", "asgi"], default="threaded",
+                        help="Flask's threaded server, or asgi.py under uvicorn")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="Comma separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=15.0, help="Measured seconds per level")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds before each level")
+    parser.add_argument("--mix", default="process_ticker=3,sp500sectors=1",
+                        help="Endpoint weights: process_ticker, sp500sectors, get_performance")
+    parser.add_argument("--tickers", default="AAPL:4,MSFT:3,NVDA:3,SPY:2,TSLA:2,AMD,META,QQQ",
+                        help="Ticker weights for /process_ticker")
+    parser.add_argument("--unique", type=float, default=0.0,
+                        help="Fraction of /process_ticker requests for a never-seen ticker ( cache misses )")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per synthetic upstream call")
+    parser.add_argument("--expirations", type=int, default=8, help="Expirations per synthetic chain")
+    parser.add_argument("--strikes", type=int, default=40, help="Strikes per synthetic expiration")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds before a request counts as failed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=5077)
+    parser.add_argument("--output", help="Also write the report as JSON to this file")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.server, args.port, args.latency, args.expirations, args.strikes)
+        return
+
+    unknown = set(parse_weights(args.mix)) - {"process_ticker", "sp500sectors", "get_performance"}
+    if unknown:
+        parser.error(f"unknown endpoint(s) in --mix: {', '.join(sorted(unknown))}")
+
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", "--server", args.server,
+                               "--port", str(args.port), "--latency", str(args.latency),
+                               "--expirations", str(args.expirations), "--strikes", str(args.strikes)],
+                              stdout=subprocess.DEVNULL)
+    try:
+        levels = asyncio.run(load_test(args.port, args))
+    finally:
+        server.terminate()
+        server.wait()
+
+    saturation = saturation_point(levels)
+    print(f"\nThroughput saturates at concurrency {saturation}" if saturation is not None
+          else "\nThroughput was still rising at the highest concurrency level")
+
+    if args.output:
+        report = {
+            "config": {key: value for key, value in vars(args).items() if key not in ("serve", "output")},
+            "levels": levels,
+            "saturation_concurrency": saturation,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
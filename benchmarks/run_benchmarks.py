@@ -0,0 +1,326 @@
+"""
+Benchmarks of the analytics and sector hot paths, on synthetic data ( see synthetic.py ), no network needed.
+
+    python benchmarks/run_benchmarks.py                      # every benchmark, every chain size
+    python benchmarks/run_benchmarks.py --sizes small,spx --filter summarize,figure_json
+    python benchmarks/compare.py results/<old>.json results/<new>.json
+
+Each benchmark is timed over several runs ( at least --repeat, and until --min-time has elapsed ), then run
+once more under tracemalloc for its peak memory. Results are written as JSON to benchmarks/results/ ( or
+--output ), tagged with the commit, so runs of different commits can be compared.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import numpy as np  # noqa: E402
+import orjson  # noqa: E402
+import pandas as pd  # noqa: E402
+import plotly  # noqa: E402
+from plotly.utils import PlotlyJSONEncoder  # noqa: E402
+
+import chain_archive  # noqa: E402
+import compression  # noqa: E402
+import providers  # noqa: E402
+import sectors  # noqa: E402
+import VectrPyLogic  # noqa: E402
+from price_store import PriceStore  # noqa: E402
+from synthetic import CHAIN_SIZES, SyntheticProvider, synthetic_chain  # noqa: E402
+
+
+class Benchmark:
+    """
+    One timed case.
+
+    + Parameters:
+    name (str): Unique name, e.g. "summarize_chain[spx]".
+    func (callable): The code being measured.
+    setup (callable): Run before every call, outside the timing ( e.g. to reset a cache ).
+    items (int): Units of work per call ( rows, amounts ... ), reported as items per second.
+    params (dict): Extra description saved with the result.
+    """
+
+    def __init__(self, name, func, setup=None, items=1, params=None):
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.items = items
+        self.params = params or {}
+
+
+def once(build):
+    """
+    A fixture builder that only runs on its first call: used as the setup of a group's benchmarks, the fixtures
+    are built when the first of them runs, and not at all when --filter leaves none of them.
+    """
+    built = []
+
+    def setup():
+        if not built:
+            built.append(build())
+        return built[0]
+
+    return setup
+
+
+def measure(benchmark, repeat, min_time, max_repeat=1000):
+    """Time a benchmark and record its peak traced memory. Returns the result dict saved in the JSON file."""
+    if benchmark.setup:
+        benchmark.setup()
+    benchmark.func()  # Warm-up: imports, lazily built templates, allocator pools
+
+    timings = []
+    while len(timings) < max_repeat and (len(timings) < repeat or sum(timings) < min_time):
+        if benchmark.setup:
+            benchmark.setup()
+        gc.collect()
+        started = time.perf_counter()
+        benchmark.func()
+        timings.append(time.perf_counter() - started)
+
+    if benchmark.setup:
+        benchmark.setup()
+    gc.collect()
+    tracemalloc.start()
+    benchmark.func()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    median = statistics.median(timings)
+    ordered = sorted(timings)
+    return {
+        "name": benchmark.name,
+        "params": benchmark.params,
+        "runs": len(timings),
+        "min_s": min(timings),
+        "median_s": median,
+        "mean_s": statistics.fmean(timings),
+        "p95_s": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+        "max_s": max(timings),
+        "stdev_s": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "items": benchmark.items,
+        "items_per_s": benchmark.items / median if median > 0 else None,
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+def chain_benchmarks(size, workdir):
+    """preprocess_dates, the analytics, rendering and figure encoding for one chain size."""
+    expirations, strikes = CHAIN_SIZES[size]
+    rows = expirations * strikes * 2
+    params = {"size": size, "expirations": expirations, "strikes": strikes, "contracts": rows}
+    compact_params, gzip_params = dict(params), dict(params)  # Payload sizes are filled in by build()
+    fixture = types.SimpleNamespace()
+
+    @once
+    def build():
+        fixture.chain = synthetic_chain("SYN", expirations, strikes)
+        # preprocess_dates reads the CSV layout written by save_options_data()
+        fixture.chain.save_csv(workdir)
+        fixture.calls_dir = os.path.join(workdir, fixture.chain.ticker, "CALLS")
+        fixture.quote = VectrPyLogic.fetch_quote(fixture.chain.ticker)
+        fixture.summary = VectrPyLogic.summarize_chain(fixture.chain, fixture.quote)
+        fixture.fig = VectrPyLogic.render_summary(fixture.summary, width=1200, height=540)
+        compact_params["bytes"] = len(compact_response())
+        gzip_params.update(bytes=len(compression.compress(compact_response(), "gzip")),
+                           uncompressed_plain_bytes=len(fast_path_response()))
+
+    def fast_path_response():
+        return orjson.dumps({"ticker": fixture.chain.ticker,
+                             "figure": VectrPyLogic.figure_dict(fixture.summary, width=1200, height=540)})
+
+    def compact_response():
+        figure = VectrPyLogic.figure_dict(fixture.summary, width=1200, height=540)
+        return orjson.dumps({"ticker": fixture.chain.ticker, "figure": VectrPyLogic.compact_figure(figure)})
+
+    return [
+        Benchmark(f"preprocess_dates[{size}]", lambda: VectrPyLogic.preprocess_dates(fixture.calls_dir, "CALLS"),
+                  setup=build, items=rows // 2, params=params),
+        Benchmark(f"calculate_and_visualize_data[{size}]",
+                  lambda: VectrPyLogic.calculate_and_visualize_data(fixture.chain.ticker, 1200, 540,
+                                                                    chain=fixture.chain),
+                  setup=build, items=rows, params=params),
+        Benchmark(f"summarize_chain[{size}]", lambda: VectrPyLogic.summarize_chain(fixture.chain, fixture.quote),
+                  setup=build, items=rows, params=params),
+        Benchmark(f"render_summary[{size}]",
+                  lambda: VectrPyLogic.render_summary(fixture.summary, width=1200, height=540),
+                  setup=build, params=params),
+        Benchmark(f"figure_dict[{size}]", lambda: VectrPyLogic.figure_dict(fixture.summary, width=1200, height=540),
+                  setup=build, params=params),
+        Benchmark(f"figure_json[{size}]", lambda: json.dumps(fixture.fig, cls=PlotlyJSONEncoder), setup=build,
+                  params=params),
+        # /process_ticker's response for a cached summary: the graph objects figure encoded by PlotlyJSONEncoder and
+        # nested as a string in the JSON response, against the plain dict figure encoded once with orjson
+        Benchmark(f"response_graph_objects[{size}]", lambda: json.dumps({
+            "ticker": fixture.chain.ticker,
+            "graph_json": json.dumps(VectrPyLogic.render_summary(fixture.summary, width=1200, height=540),
+                                     cls=PlotlyJSONEncoder)}), setup=build, params=params),
+        Benchmark(f"response_fast_path[{size}]", fast_path_response, setup=build, params=params),
+        # The same response as the front end gets it: a compact figure, and gzip on top ( payload bytes in params )
+        Benchmark(f"response_compact[{size}]", compact_response, setup=build, params=compact_params),
+        Benchmark(f"response_compact_gzip[{size}]", lambda: compression.compress(compact_response(), "gzip"),
+                  setup=build, params=gzip_params),
+    ]
+
+
+def format_dollar_benchmark(count=100_000):
+    """format_dollar_amount over amounts spread from cents to tens of billions."""
+    amounts = (10 ** np.random.default_rng(0).uniform(-1, 10.5, count)).tolist()
+
+    def run():
+        format_dollar_amount = VectrPyLogic.format_dollar_amount
+        for amount in amounts:
+            format_dollar_amount(amount)
+
+    return Benchmark("format_dollar_amount[loop]", run, items=count, params={"amounts": count})
+
+
+def sector_benchmarks(workdir):
+    """get_etf_performance with an empty price store ( full downloads ) and with a synced one."""
+    etfs = sectors.SECTOR_ETFS
+    params = {"etfs": len(etfs), "timeframes": len(sectors.TIMEFRAMES)}
+    cold_root = os.path.join(workdir, "cold_prices")
+
+    def reset_cold_store():
+        shutil.rmtree(cold_root, ignore_errors=True)
+        sectors.price_store = PriceStore(root=cold_root)
+
+    warm_store = PriceStore(root=os.path.join(workdir, "warm_prices"), min_sync_interval=float("inf"))
+    sync_warm_store = once(lambda: warm_store.sync_many(etfs))
+
+    def use_warm_store():
+        sync_warm_store()
+        sectors.price_store = warm_store
+
+    return [
+        Benchmark("get_etf_performance[cold]", lambda: sectors.get_etf_performance(etfs), setup=reset_cold_store,
+                  items=len(etfs), params=dict(params, store="empty")),
+        Benchmark("get_etf_performance[warm]", lambda: sectors.get_etf_performance(etfs), setup=use_warm_store,
+                  items=len(etfs), params=dict(params, store="synced")),
+    ]
+
+
+def archive_benchmarks(workdir, days=125, size="large"):
+    """The chain archive: appending a day's snapshot, and reading back about six months of daily partitions."""
+    expirations, strikes = CHAIN_SIZES[size]
+    chain = synthetic_chain("SYN", expirations, strikes)
+    archive = chain_archive.ChainArchive(os.path.join(workdir, "archive"))
+    last_day = chain_archive.session_date(chain.fetched_at)
+
+    @once
+    def write_partitions():
+        fetched_at = chain.fetched_at
+        for day in range(days):
+            chain.fetched_at = fetched_at - (days - day) * 86400
+            archive.append(chain)
+        chain.fetched_at = fetched_at
+        archive.append(chain)
+
+    rows = expirations * strikes * 2
+    params = {"size": size, "partitions": days + 1, "contracts": rows}
+    columns = ("expiration", "type", "strike", "open_interest", "oi_change")
+    return [
+        Benchmark(f"archive_append[{size}]", lambda: archive.append(chain), setup=write_partitions, items=rows,
+                  params=params),
+        Benchmark(f"archive_load[{days + 1}d]", lambda: archive.load("SYN", columns=columns),
+                  setup=write_partitions, items=rows * (days + 1), params=dict(params, columns=len(columns))),
+        Benchmark(f"archive_expiration_history[{days + 1}d]", lambda: archive.expiration_history("SYN"),
+                  setup=write_partitions, items=rows * (days + 1), params=params),
+        Benchmark("archive_expiration_changes", lambda: archive.expiration_changes("SYN", last_day),
+                  setup=write_partitions, params=params),
+    ]
+
+
+def environment():
+    """Commit, interpreter and library versions the results were measured with."""
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=REPO_DIR, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "plotly": plotly.__version__,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(CHAIN_SIZES), help="Chain sizes: " + ", ".join(
+        f"{name} ({expirations}x{strikes})" for name, (expirations, strikes) in CHAIN_SIZES.items()))
+    parser.add_argument("--filter", default="", help="Comma separated substrings; only matching benchmarks run")
+    parser.add_argument("--repeat", type=int, default=5, help="Minimum timed runs per benchmark")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Minimum seconds of timed runs per benchmark")
+    parser.add_argument("--output", help="JSON file to write ( default: benchmarks/results/<time>-<commit>.json )")
+    args = parser.parse_args()
+
+    # Quotes and price histories come from the synthetic provider, never from the network
+    providers.set_provider(SyntheticProvider())
+
+    workdir = tempfile.mkdtemp(prefix="vectr-bench-")
+    try:
+        benchmarks = []
+        for size in filter(None, args.sizes.split(",")):
+            benchmarks += chain_benchmarks(size, os.path.join(workdir, size))
+        benchmarks.append(format_dollar_benchmark())
+        benchmarks += sector_benchmarks(workdir)
+        benchmarks += archive_benchmarks(workdir)
+
+        patterns = [pattern for pattern in args.filter.split(",") if pattern]
+        if patterns:
+            benchmarks = [benchmark for benchmark in benchmarks if any(p in benchmark.name for p in patterns)]
+
+        results = []
+        for benchmark in benchmarks:
+            result = measure(benchmark, args.repeat, args.min_time)
+            results.append(result)
+            print(f"{result['name']:<42} median {result['median_s'] * 1000:10.3f} ms   "
+                  f"p95 {result['p95_s'] * 1000:10.3f} ms   peak {result['peak_memory_bytes'] / 2 ** 20:8.2f} MiB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    medians = {result["name"]: result["median_s"] for result in results}
+    for name, slow in medians.items():
+        fast = medians.get(name.replace("response_graph_objects", "response_fast_path"))
+        if name.startswith("response_graph_objects") and fast:
+            print(f"{name[len('response_graph_objects'):]:<8} fast path saves {(slow - fast) * 1000:.2f} ms per "
+                  f"/process_ticker response ( {slow / fast:.1f}x faster )")
+
+    report = {"environment": environment(), "results": results}
+    output = args.output
+    if output is None:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(BENCH_DIR, "results", f"{stamp}-{(report['environment']['commit'] or 'nogit')[:10]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Deterministic synthetic market data for benchmarks: option chains shaped like yfinance's, daily price
+histories, and a MarketDataProvider serving both, so the app can be exercised without network access.
+
+Holdings tables ( synthetic_holdings ) stand in for the SSGA downloads on the sectors page.
+
+Chain sizes are given as ( expirations, strikes per expiration ); CHAIN_SIZES spans a small-cap chain up to an
+SPX-sized one.
+"""
+import os
+import sys
+import time
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from providers import MarketDataProvider  # noqa: E402
+from VectrPyLogic import OptionChain  # noqa: E402
+
+CHAIN_SIZES = {
+    "small": (5, 20),  # Small cap
+    "medium": (20, 200),  # Liquid large cap
+    "large": (40, 500),  # Index ETF
+    "spx": (60, 1000),  # SPX
+}
+
+SPOT_PRICE = 100.0
+HISTORY_DAYS = 8000  # About 30 years of business days, like the oldest sector ETFs
+
+
+def _seed(*parts):
+    return sum(ord(character) * (index + 1) for index, character in enumerate("|".join(map(str, parts))))
+
+
+def expiration_dates(count, start=None):
+    """'YYYY-MM-DD' expirations: weeklies first, then monthlies, like a listed chain."""
+    start = pd.Timestamp(start or pd.Timestamp.today().normalize())
+    friday = start + pd.Timedelta(days=(4 - start.weekday()) % 7)
+    weekly = min(count, 12)
+    dates = [friday + pd.Timedelta(weeks=week) for week in range(weekly)]
+    dates += [friday + pd.Timedelta(weeks=weekly + 4 * month) for month in range(1, count - weekly + 1)]
+    return [date.strftime("%Y-%m-%d") for date in dates]
+
+
+def option_side(rng, strikes, kind, expiration, spot=SPOT_PRICE, now=None):
+    """One side ( calls or puts ) of an expiration, with yfinance's columns and realistic gaps ( NaN volume / OI )."""
+    n = len(strikes)
+    now = now or pd.Timestamp.now(tz="UTC").floor("s")
+    moneyness = (strikes - spot) / spot
+    intrinsic = np.maximum(spot - strikes, 0) if kind == "P" else np.maximum(strikes - spot, 0)
+    last_price = np.round(intrinsic + spot * 0.05 * np.exp(-4 * np.abs(moneyness)) + rng.random(n) * 0.1, 2)
+
+    # Activity concentrates near the money
+    activity = np.exp(-6 * np.abs(moneyness))
+    volume = np.floor(rng.random(n) * 5000 * activity)
+    volume[rng.random(n) < 0.2] = np.nan
+    open_interest = np.floor(rng.random(n) * 20000 * activity)
+    open_interest[rng.random(n) < 0.1] = np.nan
+
+    hours_ago = rng.integers(0, 72, n).astype("timedelta64[h]")
+    symbol_date = expiration.replace("-", "")[2:]
+    return pd.DataFrame({
+        "contractSymbol": [f"SYN{symbol_date}{kind}{int(strike * 1000):08d}" for strike in strikes],
+        "lastTradeDate": now - pd.to_timedelta(hours_ago),
+        "strike": strikes,
+        "lastPrice": last_price,
+        "bid": np.maximum(last_price - 0.05, 0),
+        "ask": last_price + 0.05,
+        "change": np.round(rng.normal(0, 0.2, n), 2),
+        "percentChange": np.round(rng.normal(0, 2, n), 2),
+        "volume": volume,
+        "openInterest": open_interest,
+        "impliedVolatility": np.round(0.2 + 0.3 * np.abs(moneyness) + rng.random(n) * 0.02, 4),
+        "inTheMoney": intrinsic > 0,
+        "contractSize": "REGULAR",
+        "currency": "USD",
+    })
+
+
+def strike_grid(count, spot=SPOT_PRICE):
+    """count strikes spread from 50% to 150% of the spot price."""
+    return np.round(np.linspace(spot * 0.5, spot * 1.5, count), 2)
+
+
+def expiration_frames(symbol, date, strikes):
+    """( calls, puts ) of one expiration; the same arguments always give the same frames."""
+    rng = np.random.default_rng(_seed(symbol, date, strikes))
+    grid = strike_grid(strikes)
+    return option_side(rng, grid, "C", date), option_side(rng, grid, "P", date)
+
+
+def synthetic_chain(symbol="SYN", expirations=5, strikes=20):
+    """An OptionChain of the given size."""
+    chain = OptionChain(symbol)
+    for date in expiration_dates(expirations):
+        chain.add_expiration(date, *expiration_frames(symbol, date, strikes))
+    return chain
+
+
+def synthetic_history(symbol, days=HISTORY_DAYS, end=None):
+    """Daily bars shaped like yfinance's history(): a random walk ending today ( or at end )."""
+    return _history(symbol, days, pd.Timestamp(end or pd.Timestamp.today().normalize())).copy()
+
+
+@lru_cache(maxsize=256)
+def _history(symbol, days, end):
+    index = pd.bdate_range(end=end, periods=days, tz="America/New_York", name="Date")
+    rng = np.random.default_rng(_seed(symbol))
+    walk = np.exp(np.cumsum(rng.normal(0.0003, 0.012, days)))
+    close = walk / walk[-1] * SPOT_PRICE  # Ends at the spot price the option strikes are centered on
+    return pd.DataFrame({
+        "Open": close * (1 + rng.normal(0, 0.002, days)),
+        "High": close * 1.01,
+        "Low": close * 0.99,
+        "Close": close,
+        "Volume": rng.integers(1_000_000, 20_000_000, days).astype(float),
+        "Dividends": 0.0,
+        "Stock Splits": 0.0,
+    }, index=index)
+
+
+def synthetic_holdings(etf, rows=10):
+    """Top holdings of an ETF, with the columns update_holdings() keeps ( Name, Ticker, Weight )."""
+    rng = np.random.default_rng(_seed(etf, "holdings"))
+    weights = np.sort(rng.uniform(1, 20, rows))[::-1]
+    return pd.DataFrame({
+        "Name": [f"{etf} Holding {number + 1} Corp" for number in range(rows)],
+        "Ticker": [f"{etf[:2]}{chr(65 + number)}" for number in range(rows)],
+        "Weight": np.round(weights, 2),
+    })
+
+
+class SyntheticProvider(MarketDataProvider):
+    """
+    Serves synthetic chains and histories for any symbol.
+
+    + Parameters:
+    expirations, strikes (int): Size of every option chain.
+    latency (float): Seconds each call sleeps, standing in for the network.
+    history_days (int): Length of the full price history.
+    """
+
+    def __init__(self, expirations=8, strikes=40, latency=0.0, history_days=HISTORY_DAYS):
+        self.expirations = expirations
+        self.strikes = strikes
+        self.latency = latency
+        self.history_days = history_days
+
+    def _wait(self):
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def options(self, symbol):
+        self._wait()
+        return tuple(expiration_dates(self.expirations))
+
+    def option_chain(self, symbol, date):
+        self._wait()
+        return expiration_frames(symbol, date, self.strikes)
+
+    def history(self, symbol, period=None, start=None):
+        self._wait()
+        frame = synthetic_history(symbol, self.history_days)
+        if start is not None:
+            return frame[frame.index.tz_localize(None) >= pd.Timestamp(start)]
+        return frame.iloc[-{"1d": 1, "2d": 2, "5d": 5}.get(period, self.history_days):]
+
+    def info(self, symbol):
+        self._wait()
+        return {"longName": f"{symbol} Synthetic Inc."}
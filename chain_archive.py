@@ -0,0 +1,246 @@
+"""
+Opt-in archive of option chain snapshots ( VECTR_ARCHIVE=1 ), so "how did open interest change since yesterday"
+can be answered from disk instead of refetching and diffing by hand.
+
+Layout: <VECTR_ARCHIVE_DIR>/<TICKER>/<YYYY-MM-DD>.npz, one partition per ticker and trading day ( the New York
+date of the snapshot ). A partition holds one row per contract, column-wise, sorted by ( expiration, type, strike ):
+
+    expiration                          datetime64[D]
+    type                                int8, CALL ( 0 ) or PUT ( 1 )
+    strike, open_interest, volume, last_price           float64
+    oi_change, volume_change            float64, against the previous partition ( NaN if there is none )
+
+Past partitions are never rewritten. A later snapshot of the same day replaces that day's partition ( open
+interest only changes overnight, volume keeps growing during the session ). Deltas are computed once, when a
+partition is written, against the previous partition alone: appending costs the same however long the archive
+gets, and reading a date range only opens the partitions in it ( and only the requested columns of those ).
+"""
+import os
+import re
+import threading
+import zipfile
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from chain_cache import MARKET_TZ
+from metrics import span
+from price_store import valid_symbol
+
+ARCHIVE_ENABLED = os.environ.get("VECTR_ARCHIVE", "0") == "1"
+ARCHIVE_DIR = os.environ.get("VECTR_ARCHIVE_DIR", "archive")
+
+CALL, PUT = 0, 1
+COLUMNS = ("expiration", "type", "strike", "open_interest", "volume", "last_price", "oi_change", "volume_change")
+PARTITION_PATTERN = re.compile(r"^(\d{4}-\d{2}-\d{2})\.npz$")
+
+STRIKE_SCALE = 1000  # Strikes are matched to a thousandth of a dollar
+
+
+def session_date(timestamp):
+    """The New York date ( 'YYYY-MM-DD' ) of an epoch timestamp: the partition a snapshot taken then goes to."""
+    return datetime.fromtimestamp(timestamp, MARKET_TZ).strftime("%Y-%m-%d")
+
+
+def contract_keys(expiration, option_type, strike):
+    """
+    One int64 per contract, ordered like ( expiration, type, strike ): days since the epoch in the high bits,
+    then the type, then the strike in thousandths. Partitions are sorted by it and joined on it.
+    """
+    days = expiration.astype("datetime64[D]").astype(np.int64)
+    return (days << 40) | (option_type.astype(np.int64) << 39) | np.round(strike * STRIKE_SCALE).astype(np.int64)
+
+
+def snapshot_columns(chain):
+    """The contracts of an OptionChain as partition columns ( without the deltas ), sorted by contract key."""
+    parts = []
+    for option_type, frames in ((CALL, chain.calls), (PUT, chain.puts)):
+        for date, df in frames.items():
+            if df.empty:
+                continue
+            rows = len(df)
+            parts.append({
+                "expiration": np.full(rows, np.datetime64(date, "D")),
+                "type": np.full(rows, option_type, dtype=np.int8),
+                "strike": df["strike"].to_numpy(dtype=float),
+                "open_interest": np.nan_to_num(df["openInterest"].to_numpy(dtype=float)),
+                "volume": np.nan_to_num(df["volume"].to_numpy(dtype=float)),
+                "last_price": df["lastPrice"].to_numpy(dtype=float),
+            })
+
+    if not parts:
+        return {column: np.zeros(0, dtype=dtype) for column, dtype in (
+            ("expiration", "datetime64[D]"), ("type", np.int8), ("strike", float), ("open_interest", float),
+            ("volume", float), ("last_price", float))}
+
+    columns = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+    keys = contract_keys(columns["expiration"], columns["type"], columns["strike"])
+    order = np.argsort(keys, kind="stable")
+    # A contract listed twice keeps its last row
+    keys = keys[order]
+    keep = np.append(keys[1:] != keys[:-1], True)
+    return {name: values[order][keep] for name, values in columns.items()}
+
+
+def with_changes(current, previous):
+    """current's columns plus oi_change / volume_change against the previous partition's ( or NaN if None )."""
+    rows = len(current["strike"])
+    if previous is None:
+        return dict(current, oi_change=np.full(rows, np.nan), volume_change=np.full(rows, np.nan))
+
+    current_keys = contract_keys(current["expiration"], current["type"], current["strike"])
+    previous_keys = contract_keys(previous["expiration"], previous["type"], previous["strike"])  # Sorted on write
+
+    # Contracts that weren't listed in the previous partition start from zero
+    previous_oi, previous_volume = np.zeros(rows), np.zeros(rows)
+    if len(previous_keys):
+        positions = np.minimum(np.searchsorted(previous_keys, current_keys), len(previous_keys) - 1)
+        listed = previous_keys[positions] == current_keys
+        previous_oi[listed] = previous["open_interest"][positions[listed]]
+        previous_volume[listed] = previous["volume"][positions[listed]]
+    return dict(current, oi_change=current["open_interest"] - previous_oi,
+                volume_change=current["volume"] - previous_volume)
+
+
+class ChainArchive:
+    """
+    Daily partitions of option chain snapshots, per ticker ( see the module docstring ).
+
+    + Parameters:
+    root (str): Directory holding a sub-directory of partitions per ticker.
+    """
+
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = root
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, ticker):
+        with self._locks_guard:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def ticker_dir(self, ticker):
+        """The ticker's partition directory; ValueError unless the ticker is a valid_symbol()."""
+        if not valid_symbol(ticker.upper()):
+            raise ValueError(f"Invalid symbol: {ticker!r}")
+        return os.path.join(self.root, ticker.upper())
+
+    def partition_path(self, ticker, day):
+        return os.path.join(self.ticker_dir(ticker), f"{day}.npz")
+
+    def partitions(self, ticker):
+        """Dates ( 'YYYY-MM-DD' ) of the ticker's partitions, oldest first."""
+        directory = self.ticker_dir(ticker)
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return []
+        return sorted(match.group(1) for match in map(PARTITION_PATTERN.match, names) if match)
+
+    def read_partition(self, ticker, day, columns=COLUMNS):
+        """
+        {column: array} of one partition, reading only the given columns; None if there is no such partition, or if
+        it can't be read ( truncated, corrupt or missing a column ): a damaged partition counts as a missing one.
+        """
+        path = self.partition_path(ticker, day)
+        try:
+            with np.load(path, allow_pickle=False) as stored:
+                return {column: stored[column] for column in columns}
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+            print(f"Skipping the unreadable archive partition {path}: {e!r}")
+            return None
+
+    @span("archive_append")
+    def append(self, chain):
+        """
+        Write the chain as its day's partition, with deltas against the ticker's previous partition.
+        Returns the partition's date, or None for a chain without expirations ( nothing to archive ).
+        """
+        if not len(chain):
+            return None
+        day = session_date(chain.fetched_at)
+        current = snapshot_columns(chain)
+
+        with self._lock(chain.ticker):
+            earlier = [partition for partition in self.partitions(chain.ticker) if partition < day]
+            previous = self.read_partition(chain.ticker, earlier[-1], ("expiration", "type", "strike",
+                                                                       "open_interest", "volume")) if earlier else None
+            columns = with_changes(current, previous)
+
+            path = self.partition_path(chain.ticker, day)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+            np.savez(tmp_path, **columns)  # Uncompressed: partitions are read far more often than written
+            os.replace(tmp_path, path)
+        return day
+
+    def days(self, ticker, start=None, end=None):
+        """Dates of the ticker's partitions from start to end ( inclusive, 'YYYY-MM-DD', open-ended when None )."""
+        return [day for day in self.partitions(ticker)
+                if (start is None or day >= start) and (end is None or day <= end)]
+
+    def load(self, ticker, start=None, end=None, columns=COLUMNS):
+        """
+        The ticker's contracts from the partitions dated start to end as one DataFrame with a 'date' column.
+        Every contract of every day is in memory at once: about 400 MiB for six months of a large chain ( see
+        benchmarks/run_benchmarks.py ). Ask for the columns needed only, or use expiration_history for totals per
+        expiration, which reduces each day as it is read.
+        """
+        frames = []
+        for day in self.days(ticker, start, end):
+            partition = self.read_partition(ticker, day, columns)
+            if partition is not None:
+                frame = pd.DataFrame(partition)
+                frame.insert(0, "date", np.datetime64(day, "D"))
+                frames.append(frame)
+        if not frames:
+            return pd.DataFrame(columns=["date", *columns])
+        return pd.concat(frames, ignore_index=True)
+
+    def expiration_history(self, ticker, start=None, end=None):
+        """
+        Open interest and its change per day, expiration and type ( one row each ) from start to end. Partitions
+        are reduced as they are read, so months of history take little memory, unlike load()ing every contract.
+        """
+        frames = []
+        for day in self.days(ticker, start, end):
+            partition = self.read_partition(ticker, day, ("expiration", "type", "open_interest", "oi_change"))
+            if partition is None or not len(partition["type"]):
+                continue
+            # Rows are sorted by ( expiration, type, strike ), so each group is one contiguous run
+            groups = partition["expiration"].astype(np.int64) * 2 + partition["type"]
+            starts = np.flatnonzero(np.append(True, groups[1:] != groups[:-1]))
+            frames.append(pd.DataFrame({
+                "date": np.datetime64(day, "D"),
+                "expiration": (groups[starts] // 2).astype("datetime64[D]"),
+                "type": (groups[starts] % 2).astype(np.int8),
+                "open_interest": np.add.reduceat(partition["open_interest"], starts),
+                "oi_change": np.add.reduceat(partition["oi_change"], starts),
+            }))
+        if not frames:
+            return pd.DataFrame(columns=["date", "expiration", "type", "open_interest", "oi_change"])
+        return pd.concat(frames, ignore_index=True)
+
+    def expiration_changes(self, ticker, day):
+        """
+        Open interest change per expiration in the day's partition, as {'calls': {label: change}, 'puts': {...}}
+        with '%m/%d/%y' labels ( the chart's ). None without the partition or a previous one to compare with.
+        """
+        partition = self.read_partition(ticker, day, ("expiration", "type", "oi_change"))
+        if partition is None or not len(partition["oi_change"]) or np.isnan(partition["oi_change"]).all():
+            return None
+
+        changes = {}
+        for option_type, side in ((CALL, "calls"), (PUT, "puts")):
+            selected = partition["type"] == option_type
+            expirations, codes = np.unique(partition["expiration"][selected], return_inverse=True)
+            totals = np.bincount(codes, weights=partition["oi_change"][selected], minlength=len(expirations))
+            changes[side] = {pd.Timestamp(expiration).strftime("%m/%d/%y"): float(total)
+                             for expiration, total in zip(expirations, totals)}
+        return changes
+
+
+def from_environment():
+    """A ChainArchive in VECTR_ARCHIVE_DIR if VECTR_ARCHIVE=1, else None."""
+    return ChainArchive() if ARCHIVE_ENABLED else None
@@ -0,0 +1,203 @@
+"""
+Snapshot cache for option chains (or anything else that is expensive to fetch from yfinance).
+
+- Entries expire after a TTL, which is shorter while the US market is open and quotes move.
+- Once the cached snapshots exceed a memory budget, the least recently used ones are evicted.
+- Concurrent misses for the same key are coalesced ( "single-flight" ): one caller loads the
+  snapshot while the others wait for that result instead of starting their own fetch.
+- Optionally, misses go through a SharedCache ( see shared_cache.py ) first, so worker processes on the
+  same host reuse each other's snapshots and don't fetch the same one at the same time.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, time as dtime
+from zoneinfo import ZoneInfo
+
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = dtime(9, 30)
+MARKET_CLOSE = dtime(16, 0)
+
+
+def is_market_hours(now=None):
+    """Return True during regular US equity trading hours (Mon-Fri, 9:30-16:00 New York time)."""
+    now = now.astimezone(MARKET_TZ) if now is not None else datetime.now(MARKET_TZ)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires_at")
+
+    def __init__(self, value, size, expires_at):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+
+
+class _Flight:
+    """A load in progress; followers wait on the event and then read the leader's outcome."""
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SnapshotCache:
+    """
+    Thread-safe TTL + LRU cache with single-flight loading.
+
+    + Parameters:
+    ttl (float): Seconds an entry stays fresh outside market hours.
+    market_hours_ttl (float): Seconds an entry stays fresh while the market is open.
+    max_bytes (int): Memory budget; least recently used entries are evicted beyond it.
+    sizeof (callable): Returns the approximate size in bytes of a cached value.
+    shared (SharedCache): Store shared with the other worker processes, or None.
+    namespace (str): This cache's namespace in the shared store.
+    """
+
+    def __init__(self, ttl=900, market_hours_ttl=60, max_bytes=256 * 1024 * 1024, sizeof=None,
+                 shared=None, namespace=None):
+        self.ttl = ttl
+        self.market_hours_ttl = market_hours_ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda value: 0)
+        self.shared = shared
+        self.namespace = namespace
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> _Entry, least recently used first
+        self._flights = {}  # key -> _Flight
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.shared_hits = 0
+
+    def current_ttl(self):
+        """TTL applied to entries stored right now."""
+        return self.market_hours_ttl if is_market_hours() else self.ttl
+
+    def get(self, key, loader):
+        """
+        Return the cached value for key, calling loader() to produce it on a miss.
+        Exceptions raised by the loader are propagated to every waiting caller and are not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.value
+                self._remove(key)
+                self.expirations += 1
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = self._load(key, loader)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    def _load(self, key, loader):
+        """Run loader() and cache its value; with a shared store, take the value another process stored instead."""
+        if self.shared is None:
+            value = loader()
+            self.put(key, value)
+            return value
+
+        value, expires_at, loaded = self.shared.get_or_load(self.namespace, key, loader, self.current_ttl())
+        if not loaded:
+            with self._lock:
+                self.shared_hits += 1
+        self.put(key, value, ttl=expires_at - time.time())  # Expires along with the shared entry
+        return value
+
+    def peek(self, key):
+        """Return the fresh cached value for key without loading or touching the statistics, else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > time.monotonic():
+                return entry.value
+        return None
+
+    def put(self, key, value, ttl=None):
+        """Store a value ( for ttl seconds, the current TTL by default ), evicting least recently used entries."""
+        size = self.sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return  # Larger than the whole budget; serve it once but don't cache it
+
+            self._entries[key] = _Entry(value, size, time.monotonic() + (self.current_ttl() if ttl is None else ttl))
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def invalidate_where(self, predicate):
+        """Remove every entry whose key satisfies predicate(key); returns how many were removed."""
+        with self._lock:
+            stale = [key for key in self._entries if predicate(key)]
+            for key in stale:
+                self._remove(key)
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        # Caller must hold self._lock
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def stats(self):
+        """Counters used to size the cache: hit/miss ratio, coalesced waits, evictions and memory use."""
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "shared_hits": self.shared_hits,
+                "in_flight": len(self._flights),
+                "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+                "ttl": self.current_ttl(),
+            }
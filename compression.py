@@ -0,0 +1,149 @@
+"""
+Response compression negotiated by Accept-Encoding: brotli when the Brotli package is installed and the client
+accepts it, else gzip.
+
+Text responses ( JSON, NDJSON, HTML, CSS, JS ) of at least VECTR_COMPRESS_MIN_SIZE bytes are compressed;
+streamed ones ( /process_tickers ) are compressed chunk by chunk and flushed after every chunk, so each line still
+reaches the client as soon as it is produced. Server-Sent Events are left alone, as proxies often buffer
+compressed event streams. Each encoding of a body is its own representation with its own strong ETag, the
+identity one with the encoding appended ( "<etag>-gzip", "<etag>-br" ), and If-None-Match is checked against the
+tag of the encoding the client would get: a 304 carries the same validator as the 200 it revalidates.
+"""
+import gzip
+import os
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.environ.get("VECTR_COMPRESS_MIN_SIZE", "1024"))  # bytes; smaller bodies gain nothing
+GZIP_LEVEL = int(os.environ.get("VECTR_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.environ.get("VECTR_BROTLI_QUALITY", "5"))  # 0-11; 5 compresses better than gzip at its speed
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "text/javascript",
+    "text/html",
+    "text/css",
+    "text/plain",
+    "image/svg+xml",
+}
+
+
+def available_encodings():
+    """Encodings this server can produce, most preferred first."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding):
+    """
+    The encoding to respond with for an Accept-Encoding header, or None for identity.
+    The client's q-values decide; on a tie brotli wins over gzip.
+    """
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            weights[name] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in available_encodings():
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def encoded_etag(etag, encoding):
+    """The strong ETag of a body compressed with encoding, given the ETag of the uncompressed one."""
+    return f"{etag}-{encoding}"
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _compress_stream(chunks, encoding):
+    """Compress an iterable of chunks, flushing after each one so it can be decoded on arrival."""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+        process, flush, finish = compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            yield process(chunk) + flush()
+        yield finish()
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+def compress_response(response, req):
+    """
+    Compress a Flask / werkzeug response in place if the client accepts an encoding and it is worth it.
+    A strong ETag is replaced by the compressed body's, and the response turned into a 304 if req's
+    If-None-Match holds that tag.
+
+    + Parameters:
+    response (Response): The response to compress.
+    req (Request): The request it answers, for its Accept-Encoding and conditional headers.
+    """
+    if (response.status_code not in (200, 304) or response.direct_passthrough
+            or "Content-Encoding" in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    # The body depends on the client's Accept-Encoding from here on, whether this one gets compressed or not
+    response.vary.add("Accept-Encoding")
+    if response.status_code == 304:  # The view matched the identity ETag
+        return response
+    encoding = choose_encoding(req.headers.get("Accept-Encoding"))
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return response
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            # The view compared If-None-Match with the identity ETag only
+            response.set_etag(encoded_etag(etag, encoding))
+            if response.make_conditional(req).status_code != 200:  # 304, or 412 for a failed If-Match
+                return response
+        response.set_data(compress(data, encoding))
+
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def install(app):
+    """Compress the responses of a Flask app; install it first, so it runs after every other after_request hook."""
+
+    @app.after_request
+    def compress_after_request(response):
+        return compress_response(response, request)
@@ -0,0 +1,40 @@
+"""
+Production serving: gunicorn with one worker process per core, each running threads, the app preloaded.
+
+    gunicorn -c gunicorn.conf.py FlaskAppVectr:app
+
+The app is imported once in the master before the workers are forked ( preload_app ), so imports and module
+setup happen once and the workers share those memory pages. Background threads and process pools only start on
+first use, inside each worker.
+
+Workers share chain snapshots, chain summaries, the sector performance matrix and holdings refreshes through a
+SQLite file ( VECTR_SHARED_CACHE, see shared_cache.py ): one worker fetches, the others reuse its result, so N
+workers don't mean N fetches of the same data. Set VECTR_SHARED_CACHE="" to keep every worker's caches separate.
+
+Environment:
+    VECTR_BIND       address to listen on ( 0.0.0.0:5000 )
+    VECTR_WORKERS    worker processes ( one per core )
+    VECTR_THREADS    threads per worker, each serving one request at a time ( 8; streamed responses hold one )
+    VECTR_TIMEOUT    seconds a worker may go silent before it is restarted ( 120 )
+"""
+import multiprocessing
+import os
+
+# Before the app is imported, so its module-level setup sees them
+os.environ.setdefault("VECTR_SHARED_CACHE", os.path.join("cache", "shared.sqlite3"))
+# The workers are the processes: no summary process pool inside each of them
+os.environ.setdefault("VECTR_SUMMARY_PROCESSES", "0")
+
+bind = os.environ.get("VECTR_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("VECTR_WORKERS", str(multiprocessing.cpu_count())))
+worker_class = "gthread"
+threads = int(os.environ.get("VECTR_THREADS", "8"))
+preload_app = True
+
+# Chains can take up to VECTR_FETCH_DEADLINE ( 45 s ) to fetch; leave room for that
+timeout = int(os.environ.get("VECTR_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
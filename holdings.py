@@ -1,70 +1,464 @@
+import io
 import os
+import json
+import time
+import hashlib
+import threading
 import requests
 import pandas as pd
+from requests.adapters import HTTPAdapter
+from datetime import datetime, timedelta, time as dtime
+from zoneinfo import ZoneInfo
 from concurrent.futures import ThreadPoolExecutor
+from metrics import span, upstream_call
 
-def update_holdings(etfs=None):
-    """Download and process holdings data for a list of ETFs."""
+# Directory holding the cleaned holdings files
+HOLDINGS_DIR = "sectors"
+
+HOLDINGS_UPDATING_HTML = '<p>Holdings data is being updated. Please refresh the page in a few moments.</p>'
+HOLDINGS_ERROR_HTML = '<p>Error loading holdings data.</p>'
+
+# SSGA posts the daily holdings files after the US close; refreshes are scheduled after that time
+HOLDINGS_PUBLISH_TIME = "19:00"  # America/New_York
+HOLDINGS_PUBLISH_DAYS = (0, 1, 2, 3, 4)  # Monday - Friday
+HOLDINGS_RETRY_INTERVAL = 30 * 60  # seconds to wait after a failed refresh before trying again
+HOLDINGS_LEASE_TIMEOUT = 15 * 60  # seconds before a worker's refresh lease is considered abandoned
+HOLDINGS_STATE_FILE = os.path.join(HOLDINGS_DIR, "refresh_state.json")
+
+# Base URL for downloading holdings
+HOLDINGS_BASE_URL = "https://www.ssga.com/us/en/intermediary/library-content/products/fund-data/etfs/us/holdings-daily-us-en-{}.xlsx"
+
+# Headers for the HTTP requests
+HOLDINGS_HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Referer": "https://www.ssga.com/us/en/intermediary/etfs/",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9",
+    "Accept-Encoding": "gzip, deflate, br, zstd",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+HOLDINGS_HTTP_TIMEOUT = (5, 30)  # seconds ( connect, read )
+HOLDINGS_MAX_WORKERS = 5
+
+# ETag / Last-Modified / content hash of the last download of each ETF, used for conditional requests
+HOLDINGS_VALIDATORS_FILE = os.path.join(HOLDINGS_DIR, "http_validators.json")
+
+
+def make_session(pool_size=HOLDINGS_MAX_WORKERS):
+    """HTTP session with a connection pool large enough for every download worker to reuse a connection."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(HOLDINGS_HEADERS)
+    return session
+
+
+def _validators_file(output_dir):
+    return os.path.join(output_dir, os.path.basename(HOLDINGS_VALIDATORS_FILE))
+
+
+def _load_validators(output_dir=HOLDINGS_DIR):
+    try:
+        with open(_validators_file(output_dir)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_validators(validators, output_dir=HOLDINGS_DIR):
+    path = _validators_file(output_dir)
+    tmp_file = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(validators, f, indent=2)
+    os.replace(tmp_file, path)
+
+
+def update_holdings(etfs=None, session=None, force=False, output_dir=HOLDINGS_DIR):
+    """
+    Download and process holdings data for a list of ETFs.
+    Downloads are conditional ( If-None-Match / If-Modified-Since ) and the content hash of every workbook is
+    remembered, so a file that hasn't changed upstream is neither parsed nor rewritten.
+
+    Parameters:
+    - etfs (list): ETFs to update ( all sector ETFs by default ).
+    - session (requests.Session): Shared session; a pooled one is created for this run when omitted.
+    - force (bool): Ignore the stored validators and re-process every file.
+    - output_dir (str): Directory to save the cleaned files ( and the validators ) to.
+
+    Returns:
+    - dict: {etf: None if it was updated or is unchanged, else a short description of the failure}
+    """
     # List of ETFs to process
     if etfs is None:
         etfs = ["XLRE", "XLE", "XLU", "XLK", "XLB",
                 "XLP", "XLY", "XLI", "XLC", "XLV", "XLF", "XBI"]
 
-    # Directory to save the cleaned files
-    output_dir = "sectors"
-
-    # Base URL for downloading holdings
-    base_url = "https://www.ssga.com/us/en/intermediary/library-content/products/fund-data/etfs/us/holdings-daily-us-en-{}.xlsx"
-
-    # Headers for the HTTP requests
-    headers = {
-        "User-Agent": "Mozilla/5.0",
-        "Referer": "https://www.ssga.com/us/en/intermediary/etfs/",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9",
-        "Accept-Encoding": "gzip, deflate, br, zstd",
-        "Accept-Language": "en-US,en;q=0.9",
-    }
-
     # Create the output directory if it doesn't exist
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
+    own_session = session is None
+    if own_session:
+        session = make_session()
+    validators = {} if force else _load_validators(output_dir)
+
     def process_etf(etf):
-        """Download and process a single ETF."""
+        """Download and process a single ETF. Returns ( error or None, new validators or None )."""
         try:
             # Construct the download URL for the current ETF
-            url = base_url.format(etf.lower())
+            url = HOLDINGS_BASE_URL.format(etf.lower())
+
+            # Only ask for the file if it changed since the last download we still have on disk
+            previous = validators.get(etf, {}) if holdings_file(etf, output_dir) else {}
+            conditional_headers = {}
+            if previous.get("etag"):
+                conditional_headers["If-None-Match"] = previous["etag"]
+            if previous.get("last_modified"):
+                conditional_headers["If-Modified-Since"] = previous["last_modified"]
 
             # Download the ETF holdings file
-            response = requests.get(url, headers=headers)
+            with upstream_call("ssga", "holdings") as call:
+                response = session.get(url, headers=conditional_headers, timeout=HOLDINGS_HTTP_TIMEOUT)
+                if response.status_code != 200:
+                    call["outcome"] = "not_modified" if response.status_code == 304 else f"http_{response.status_code}"
+            if response.status_code == 304:
+                print(f"{etf} holdings unchanged (not modified).")
+                return None, previous
+
             if response.status_code == 200:
-                # Load the Excel file into pandas directly from memory
-                df = pd.read_excel(response.content, skiprows=4)
+                current = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "sha256": hashlib.sha256(response.content).hexdigest(),
+                }
+                if previous.get("sha256") == current["sha256"]:
+                    print(f"{etf} holdings unchanged (same content).")
+                    return None, current
 
-                # Drop unnecessary columns
-                columns_to_drop = ["Identifier", "SEDOL", "Sector", "Local Currency", "Shares Held"]
-                df = df.drop(columns=columns_to_drop, errors="ignore")
+                with span("holdings_parse"):
+                    # Load the Excel file into pandas directly from memory
+                    df = pd.read_excel(io.BytesIO(response.content), skiprows=4)
 
-                # Keep only the top 10 holdings
-                df = df.head(10)
+                    # Drop unnecessary columns
+                    columns_to_drop = ["Identifier", "SEDOL", "Sector", "Local Currency", "Shares Held"]
+                    df = df.drop(columns=columns_to_drop, errors="ignore")
 
-                # Format the 'Weight' column with two decimal places
-                df["Weight"] = df["Weight"].apply(lambda x: round(x, 2))
+                    # Keep only the top 10 holdings
+                    df = df.head(10)
 
-                # Save the cleaned-up DataFrame to the output folder
-                cleaned_file_path = os.path.join(output_dir, f"{etf}_holdings.xlsx")
-                df.to_excel(cleaned_file_path, index=False)
+                    # Format the 'Weight' column with two decimal places
+                    df["Weight"] = df["Weight"].apply(lambda x: round(x, 2))
+
+                    # Save the cleaned-up DataFrame to the output folder
+                    cleaned_file_path = save_holdings(etf, df, output_dir)
                 print(f"Data cleaned and saved to {cleaned_file_path}.")
+                return None, current
             else:
                 print(f"Failed to download {etf} holdings. Status code: {response.status_code}")
+                return f"HTTP {response.status_code}", None
         except Exception as e:
             print(f"Error processing {etf}: {e}")
+            return str(e), None
+
+    # Use ThreadPoolExecutor to run tasks concurrently, all sharing the session's connection pool
+    try:
+        with ThreadPoolExecutor(max_workers=HOLDINGS_MAX_WORKERS) as executor:
+            outcomes = dict(zip(etfs, executor.map(process_etf, etfs)))
+    finally:
+        if own_session:
+            session.close()
 
-    # Use ThreadPoolExecutor to run tasks concurrently
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        executor.map(process_etf, etfs)
+    for etf, (error, current) in outcomes.items():
+        if current is not None:
+            validators[etf] = current
+    _save_validators(validators, output_dir)
 
     print("All tasks completed.")
+    return {etf: error for etf, (error, _) in outcomes.items()}
+
+def holdings_path(etf, directory=HOLDINGS_DIR):
+    """Path of the cleaned holdings file written by update_holdings() ( a pickled DataFrame )."""
+    return os.path.join(directory, f"{etf}_holdings.pkl")
+
+
+def legacy_holdings_path(etf, directory=HOLDINGS_DIR):
+    """Path of the .xlsx file older versions wrote; still read, and converted on first load."""
+    return os.path.join(directory, f"{etf}_holdings.xlsx")
+
+
+def holdings_file(etf, directory=HOLDINGS_DIR):
+    """The holdings file that load_holdings() would read for an ETF, or None if there is none yet."""
+    for path in (holdings_path(etf, directory), legacy_holdings_path(etf, directory)):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def save_holdings(etf, df, directory=HOLDINGS_DIR):
+    """
+    Store an ETF's cleaned holdings.
+    The frame is pickled, which round-trips a 10-row table in well under a millisecond ( openpyxl needs tens of
+    milliseconds each way ). It is written through a temporary file, so readers never see a partial write.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = holdings_path(etf, directory)
+    tmp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    df.to_pickle(tmp_file)
+    os.replace(tmp_file, path)
+
+    # The .xlsx would otherwise be shadowed forever; drop it once the new file exists
+    legacy = legacy_holdings_path(etf, directory)
+    if os.path.exists(legacy):
+        os.remove(legacy)
+    return path
+
+
+def load_holdings(etf, directory=HOLDINGS_DIR):
+    """
+    Read an ETF's cleaned holdings, or return None if they haven't been downloaded yet.
+    A legacy .xlsx file is read with pandas.read_excel and migrated with save_holdings().
+    """
+    path = holdings_path(etf, directory)
+    if os.path.exists(path):
+        return pd.read_pickle(path)
+
+    legacy = legacy_holdings_path(etf, directory)
+    if not os.path.exists(legacy):
+        return None
+    df = pd.read_excel(legacy)
+    save_holdings(etf, df, directory)
+    print(f"Migrated {legacy} to {path}.")
+    return df
+
+
+@span("holdings_render")
+def render_holdings(df):
+    """Render a holdings table as the HTML fragment shown on the sectors page."""
+    df = df.copy()
+    # Format the 'Weight' column with percentages
+    df["Weight"] = df["Weight"].apply(lambda x: f"{x}%")
+    # Convert the DataFrame to HTML with Bootstrap classes
+    return df.to_html(classes='table table-striped holdings-table', index=False)
+
+
+class HoldingsFragments:
+    """
+    Parsed holdings tables and their rendered HTML, kept in memory.
+    A file is only parsed and rendered again when its modification time or size changes, so page views
+    just stat the files instead of loading and rendering every ETF.
+    """
+
+    def __init__(self, etfs, directory=HOLDINGS_DIR):
+        self.etfs = list(etfs)
+        self.directory = directory
+        self.frames = {}  # etf -> parsed DataFrame
+        self._fragments = {}  # etf -> (file signature, HTML)
+        self._lock = threading.Lock()
+
+    def _signature(self, etf):
+        try:
+            path = holdings_file(etf, self.directory)
+            stat = os.stat(path)
+        except (OSError, TypeError):
+            return None
+        return path, stat.st_mtime_ns, stat.st_size
+
+    def get(self, etf):
+        """HTML fragment for one ETF, rebuilt only if its holdings file changed."""
+        signature = self._signature(etf)
+        cached = self._fragments.get(etf)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        with self._lock:
+            cached = self._fragments.get(etf)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+
+            if signature is None:
+                html = HOLDINGS_UPDATING_HTML
+            else:
+                try:
+                    df = load_holdings(etf, self.directory)
+                    self.frames[etf] = df
+                    html = render_holdings(df)
+                except Exception as e:
+                    print(f"Error reading {signature[0]}: {e}")
+                    html = HOLDINGS_ERROR_HTML
+                # A migrated .xlsx now lives at a new path; key the fragment by the file it will be read from
+                signature = self._signature(etf)
+
+            self._fragments[etf] = (signature, html)
+            return html
+
+    def all(self):
+        """HTML fragments for every ETF, as {etf: html}."""
+        return {etf: self.get(etf) for etf in self.etfs}
+
+    def refresh(self):
+        """Rebuild whatever changed on disk, e.g. right after update_holdings() finished."""
+        return self.all()
+
+
+class HoldingsRefresher:
+    """
+    Runs update_holdings() on a schedule aligned with SSGA's daily publication, at most one refresh at a time.
+
+    A refresh is due once the most recent scheduled publication ( publish_time on publish_days, New York time )
+    is newer than the last successful refresh. The last success, duration and failures are persisted to
+    state_file, so a restart doesn't trigger a new download of every file.
+
+    + Parameters:
+    etfs (list): ETFs to refresh ( update_holdings() defaults when None ).
+    publish_time (str): "HH:MM" New York time after which the day's files are available.
+    publish_days (tuple): Weekdays ( 0 = Monday ) on which files are published.
+    retry_interval (float): Seconds to wait after a failed refresh before trying again.
+    state_file (str): Where the refresh state is persisted ( refresh_state.json in directory when None ).
+    directory (str): Directory update_holdings() writes the holdings files to.
+    on_success (callable): Called after a successful refresh, e.g. to rebuild the rendered fragments.
+    shared (SharedCache): Store shared with the other worker processes, or None. With it, one worker at a time
+                          refreshes, and the others read its outcome from state_file instead of downloading again.
+    """
+
+    def __init__(self, etfs=None, publish_time=HOLDINGS_PUBLISH_TIME, publish_days=HOLDINGS_PUBLISH_DAYS,
+                 retry_interval=HOLDINGS_RETRY_INTERVAL, state_file=None, on_success=None,
+                 shared=None, directory=HOLDINGS_DIR):
+        self.etfs = etfs
+        self.directory = directory
+        self.shared = shared
+        hour, minute = (int(part) for part in publish_time.split(":"))
+        self.publish_time = dtime(hour, minute)
+        self.publish_days = tuple(publish_days)
+        self.retry_interval = retry_interval
+        self.state_file = state_file or os.path.join(directory, os.path.basename(HOLDINGS_STATE_FILE))
+        self.on_success = on_success
+        self.timezone = ZoneInfo("America/New_York")
+
+        self._run_lock = threading.Lock()  # Held for the whole duration of a refresh
+        self._thread = None
+        self._thread_lock = threading.Lock()  # Guards the one-time start of the scheduler thread
+        self.state = self._load_state()
+
+    def _load_state(self):
+        state = {"last_success": 0, "last_attempt": 0, "last_duration": None, "last_error": None,
+                 "consecutive_failures": 0, "runs": 0, "failures": 0}
+        try:
+            with open(self.state_file) as f:
+                state.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+        return state
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+        tmp_file = f"{self.state_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_file, self.state_file)
+
+    def last_publication(self, now=None):
+        """Most recent scheduled publication at or before now."""
+        now = now.astimezone(self.timezone) if now is not None else datetime.now(self.timezone)
+        candidate = datetime.combine(now.date(), self.publish_time, tzinfo=self.timezone)
+        if candidate > now:
+            candidate -= timedelta(days=1)
+        while candidate.weekday() not in self.publish_days:
+            candidate -= timedelta(days=1)
+        return candidate
+
+    def is_due(self, now=None):
+        """True when a newer publication exists ( or nothing was downloaded yet ) and no retry backoff applies."""
+        current_time = (now or datetime.now(self.timezone)).timestamp()
+        if self.state["consecutive_failures"] and current_time - self.state["last_attempt"] < self.retry_interval:
+            return False
+        if not os.path.exists(self.directory):
+            return True
+        return self.state["last_success"] < self.last_publication(now).timestamp()
+
+    @property
+    def running(self):
+        return self._run_lock.locked()
+
+    def refresh(self):
+        """
+        Run one refresh now, unless another one is in flight.
+        Returns the update_holdings() results, or None if the refresh was skipped.
+        """
+        if not self._run_lock.acquire(blocking=False):
+            return None
+        try:
+            if self.shared is None:
+                return self._refresh()
+            with self.shared.lease("holdings_refresh", timeout=HOLDINGS_LEASE_TIMEOUT) as acquired:
+                if not acquired:
+                    return None  # Another worker is refreshing
+                self.state = self._load_state()  # Another worker may have refreshed since this one last looked
+                if not self.is_due():
+                    return None
+                return self._refresh()
+        finally:
+            self._run_lock.release()
+
+    def _refresh(self):
+        """One refresh: update_holdings(), then the persisted state and on_success."""
+        started = time.time()
+        self.state["last_attempt"] = started
+        try:
+            with span("holdings_refresh"):
+                results = update_holdings(self.etfs, output_dir=self.directory)
+            failed = {etf: error for etf, error in results.items() if error}
+            error = "; ".join(f"{etf}: {message}" for etf, message in failed.items()) or None
+        except Exception as e:
+            results, error = None, str(e)
+
+        duration = round(time.time() - started, 3)
+        self.state["runs"] += 1
+        self.state["last_duration"] = duration
+        self.state["last_error"] = error
+        if error is None:
+            self.state["last_success"] = started
+            self.state["consecutive_failures"] = 0
+            print(f"Holdings refresh completed in {duration}s.")
+        else:
+            self.state["failures"] += 1
+            self.state["consecutive_failures"] += 1
+            print(f"Holdings refresh failed after {duration}s: {error}")
+        self._save_state()
+
+        if error is None and self.on_success is not None:
+            self.on_success()
+        return results
+
+    def maybe_refresh(self):
+        """Start a background refresh if one is due and none is running. Never blocks the caller."""
+        self.start()
+        if self.running or not self.is_due():
+            return False
+        threading.Thread(target=self.refresh, name="holdings-refresh", daemon=True).start()
+        return True
+
+    def start(self, check_interval=60):
+        """Start the scheduler thread ( once per process ), which refreshes whenever a new publication is due."""
+        with self._thread_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, args=(check_interval,), name="holdings-scheduler",
+                                            daemon=True)
+            self._thread.start()
+
+    def _run(self, check_interval):
+        while True:
+            if self.is_due():
+                self.refresh()
+            time.sleep(check_interval)
+
+    def status(self):
+        """Refresh state for monitoring: persisted counters plus the schedule and whether a refresh is running."""
+        return dict(self.state, running=self.running,
+                    last_publication=self.last_publication().isoformat(),
+                    publish_time=self.publish_time.strftime("%H:%M"))
+
 
 # Ensure the script can still be run directly
 if __name__ == "__main__":
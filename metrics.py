@@ -0,0 +1,202 @@
+"""
+In-process metrics, served in the Prometheus text format at /metrics.
+
+- vectr_stage_seconds{stage}: timing spans around each step of the pipelines ( option chain fetch, CSV writes,
+  preprocessing, analytics, figure rendering, JSON encoding, sector prices and returns, holdings downloads ... )
+- vectr_upstream_calls_total{source, call, outcome} / vectr_upstream_seconds{source, call}: every call to a data
+  source ( the market-data provider, SSGA holdings downloads )
+- vectr_http_requests_total{endpoint, method, status}, vectr_http_request_seconds{endpoint, method} and
+  vectr_http_requests_in_flight
+
+Spans are used as context managers or decorators:
+
+    with metrics.span("render"):
+        fig = render_summary(summary)
+
+Values live in the memory of the process that recorded them; with several worker processes, each one reports its
+own ( Prometheus aggregates them by instance ). For summaries computed in the process pool, the "summarize" stage
+is the request's wait for the worker.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans range from sub-millisecond rendering steps to upstream fetches hitting their deadline
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}  # label values tuple -> value
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes the labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """[( name suffix, label values, extra labels, value )] for the exposition format."""
+        with self._lock:
+            return [("", key, (), value) for key, value in sorted(self._values.items())]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, key, extra)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """A monotonically increasing count per label combination."""
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """A value that goes up and down per label combination."""
+    kind = "gauge"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets per label combination, with their sum and count."""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]  # bucket counts, sum, count
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with block ( or decorated call ), also when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def samples(self):
+        with self._lock:
+            snapshot = [(key, list(state[0]), state[1], state[2]) for key, state in sorted(self._values.items())]
+        samples = []
+        for key, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                samples.append(("_bucket", key, (("le", _format_value(bound)),), cumulative))
+            samples.append(("_sum", key, (), total))
+            samples.append(("_count", key, (), count))
+        return samples
+
+
+REGISTRY = []
+
+STAGE_SECONDS = Histogram("vectr_stage_seconds", "Duration of a pipeline stage.", ("stage",))
+UPSTREAM_CALLS = Counter("vectr_upstream_calls_total", "Calls to upstream data sources.", ("source", "call", "outcome"))
+UPSTREAM_SECONDS = Histogram("vectr_upstream_seconds", "Duration of upstream data source calls.", ("source", "call"))
+HTTP_REQUESTS = Counter("vectr_http_requests_total", "HTTP requests handled.", ("endpoint", "method", "status"))
+HTTP_REQUEST_SECONDS = Histogram("vectr_http_request_seconds", "HTTP request duration, until the response is complete.",
+                                 ("endpoint", "method"))
+HTTP_IN_FLIGHT = Gauge("vectr_http_requests_in_flight", "HTTP requests being handled.")
+
+
+def span(stage):
+    """Time a pipeline stage into vectr_stage_seconds ( context manager or decorator )."""
+    return STAGE_SECONDS.time(stage=stage)
+
+
+@contextmanager
+def upstream_call(source, call):
+    """
+    Count and time one upstream call. The outcome is "error" if the block raises, else "ok"; the block can report
+    another outcome ( e.g. an HTTP status ) by setting result["outcome"] on the yielded dict.
+    """
+    result = {"outcome": "ok"}
+    started = time.perf_counter()
+    try:
+        yield result
+    except BaseException:
+        result["outcome"] = "error"
+        raise
+    finally:
+        UPSTREAM_SECONDS.observe(time.perf_counter() - started, source=source, call=call)
+        UPSTREAM_CALLS.inc(source=source, call=call, outcome=result["outcome"])
+
+
+def request_started():
+    """Mark an HTTP request as in flight; returns the start time to pass to request_finished()."""
+    HTTP_IN_FLIGHT.inc()
+    return time.perf_counter()
+
+
+def request_finished(endpoint, method, status, started):
+    HTTP_IN_FLIGHT.dec()
+    HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, method=method)
+    HTTP_REQUESTS.inc(endpoint=endpoint, method=method, status=status)
+
+
+def render():
+    """Every metric in the Prometheus text exposition format."""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
@@ -0,0 +1,163 @@
+"""
+Local store of daily price bars, so sector performance doesn't re-download decades of history on every page load.
+
+Each symbol's bars are kept column-wise ( one array per field ) in <root>/<SYMBOL>.npz. The first sync downloads
+the full history once; later syncs only request the bars since the last stored date and append them.
+"""
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from providers import get_provider
+
+PRICE_STORE_DIR = "price_history"
+PRICE_COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+MIN_SYNC_INTERVAL = 15 * 60  # seconds between upstream checks for the same symbol
+SYMBOL_PATTERN = re.compile(r"^[A-Z0-9.\-^]{1,10}$")  # What a ticker can look like; anything else never reaches a path
+
+
+def valid_symbol(symbol):
+    """True if symbol is a plausible upper-case ticker ( e.g. XLK, BRK.B, ^GSPC )."""
+    return isinstance(symbol, str) and SYMBOL_PATTERN.match(symbol) is not None
+
+
+class PriceStore:
+    """
+    Incrementally synced daily bars per symbol.
+
+    + Parameters:
+    root (str): Directory holding the <SYMBOL>.npz files.
+    min_sync_interval (float): A symbol synced more recently than this (in seconds) is served from the store
+                               without contacting yfinance. The file's modification time counts as the last
+                               sync, so restarts don't trigger a new round of downloads.
+    provider (MarketDataProvider): Data source; the process-wide one ( see providers.py ) when None.
+    """
+
+    def __init__(self, root=PRICE_STORE_DIR, min_sync_interval=MIN_SYNC_INTERVAL, provider=None):
+        self.root = root
+        self.min_sync_interval = min_sync_interval
+        self.provider = provider
+        self._frames = {}  # symbol -> (file mtime, DataFrame), mirrors the files on disk
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def path(self, symbol):
+        if not valid_symbol(symbol.upper()):
+            raise ValueError(f"Invalid symbol: {symbol!r}")
+        return os.path.join(self.root, f"{symbol.upper()}.npz")
+
+    def _lock(self, symbol):
+        with self._locks_guard:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def last_synced(self, symbol):
+        """Epoch time of the last successful sync, or 0 if the symbol has never been synced."""
+        try:
+            return os.path.getmtime(self.path(symbol))
+        except OSError:
+            return 0
+
+    def load(self, symbol):
+        """Return the stored bars for a symbol ( DataFrame indexed by date ), or None if it was never synced."""
+        mtime = self.last_synced(symbol)
+        if not mtime:
+            return None
+
+        # Reuse the parsed frame unless the file was rewritten ( e.g. by another worker process )
+        cached = self._frames.get(symbol)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        with np.load(self.path(symbol), allow_pickle=False) as stored:
+            index = pd.DatetimeIndex(stored["date"], name="Date")
+            frame = pd.DataFrame({column: stored[column] for column in PRICE_COLUMNS}, index=index)
+        self._frames[symbol] = (mtime, frame)
+        return frame
+
+    def save(self, symbol, frame):
+        """Write a symbol's bars to disk ( through a temporary file, so readers never see a partial write )."""
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path(symbol)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        np.savez(
+            tmp_path,
+            date=frame.index.to_numpy(dtype="datetime64[D]"),
+            **{column: frame[column].to_numpy(dtype=float) for column in PRICE_COLUMNS},
+        )
+        os.replace(tmp_path, path)
+        self._frames[symbol] = (os.path.getmtime(path), frame)
+
+    def sync(self, symbol, force=False, persist=True):
+        """
+        Bring a symbol's bars up to date and return them.
+        Only bars from the last stored date onward are requested ( the last bar is re-fetched, since it may have
+        been stored mid-session ). If those new bars carry a dividend or split, the adjusted history before them
+        has changed as well, so the full history is downloaded again.
+        With persist=False ( one-off lookups ) the bars are returned without being written to the store.
+        """
+        with self._lock(symbol):
+            stored = self.load(symbol)
+            if not force and stored is not None and time.time() - self.last_synced(symbol) < self.min_sync_interval:
+                return stored
+
+            provider = self.provider or get_provider()
+            if stored is None or stored.empty:
+                merged = _normalize_bars(provider.history(symbol, period="max"))
+            else:
+                last_date = stored.index[-1]
+                recent = provider.history(symbol, start=last_date.strftime("%Y-%m-%d"))
+                if _has_corporate_action(recent, after=last_date):
+                    print(f"{symbol}: dividend or split since {last_date.date()}, reloading the full history.")
+                    merged = _normalize_bars(provider.history(symbol, period="max"))
+                else:
+                    recent = _normalize_bars(recent)
+                    merged = pd.concat([stored[stored.index < recent.index[0]], recent]) if not recent.empty else stored
+
+            if merged.empty:
+                raise ValueError(f"No price data found for {symbol}. Symbol may be delisted or unavailable.")
+
+            if persist:
+                self.save(symbol, merged)
+            return merged
+
+    def sync_many(self, symbols, max_workers=6, persist=True):
+        """
+        Sync several symbols concurrently ( see sync() for persist ).
+        Returns {symbol: DataFrame or Exception}, so one failing symbol doesn't hide the others.
+        """
+        def sync_one(symbol):
+            try:
+                return self.sync(symbol, persist=persist)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return dict(zip(symbols, executor.map(sync_one, symbols)))
+
+
+def _normalize_bars(history):
+    """Reduce a yfinance history frame to PRICE_COLUMNS indexed by naive calendar dates."""
+    if history.empty:
+        return pd.DataFrame({column: pd.Series(dtype=float) for column in PRICE_COLUMNS},
+                            index=pd.DatetimeIndex([], name="Date"))
+    bars = history.reindex(columns=list(PRICE_COLUMNS)).astype(float)
+    dates = pd.to_datetime(history.index)
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    bars.index = pd.DatetimeIndex(dates.normalize(), name="Date")
+    return bars[~bars.index.duplicated(keep="last")]
+
+
+def _has_corporate_action(history, after):
+    """True if a dividend or split is reported strictly after the given date."""
+    if history.empty:
+        return False
+    dates = pd.to_datetime(history.index)
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    newer = dates.normalize() > after
+    actions = [column for column in ("Dividends", "Stock Splits") if column in history.columns]
+    return bool(newer.any() and (history.loc[newer, actions] != 0).any().any()) if actions else False
@@ -0,0 +1,274 @@
+"""
+On-demand profiling of single requests, for finding out where a slow production request spends its time.
+
+Off unless VECTR_PROFILING=1. When off, install() changes nothing: no middleware, no routes, no per-request check.
+When on, a request is profiled if it carries the trigger, either as a header or a query parameter:
+
+    curl -H "X-Vectr-Profile: <token>" -d ticker=SPY http://host/process_ticker
+    curl "http://host/sp500sectors?vectr_profile=<token>"
+
+<token> is VECTR_PROFILE_TOKEN, which is required: without it, profiling stays off even with VECTR_PROFILING=1,
+so no client can trigger profiling overhead or read the stored profiles unless it knows the token. Profiles are kept in VECTR_PROFILE_DIR, the most recent VECTR_PROFILE_KEEP of them, and served by:
+
+    GET /admin/profiles                 JSON list of the stored profiles, newest first
+    GET /admin/profiles/<name>          download one ( .pstats: load with pstats / snakeviz; .collapsed: flamegraph.pl )
+    GET /admin/profiles/<name>?top=40   a .pstats profile as text, the 40 most expensive functions by cumulative time
+
+The admin routes take the token the same way. VECTR_PROFILE_MODE picks the profiler:
+
+- cprofile ( default ): deterministic, every call in the request's thread, saved as pstats
+- sample: samples the request thread's stack every VECTR_PROFILE_INTERVAL seconds, saved as collapsed stacks
+
+Both follow the thread handling the request ( including a streamed response body ), not the pools it hands work
+to. Natively served ASGI routes ( see asgi.py ) aren't profiled.
+"""
+import cProfile
+import hmac
+import io
+import itertools
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from urllib.parse import parse_qs
+from flask import abort, jsonify, request, send_from_directory, Response
+
+PROFILING_ENABLED = os.environ.get("VECTR_PROFILING", "0") == "1"
+PROFILE_TOKEN = os.environ.get("VECTR_PROFILE_TOKEN", "")
+PROFILE_DIR = os.environ.get("VECTR_PROFILE_DIR", "profiles")
+PROFILE_KEEP = int(os.environ.get("VECTR_PROFILE_KEEP", "20"))
+PROFILE_MODE = os.environ.get("VECTR_PROFILE_MODE", "cprofile")
+PROFILE_INTERVAL = float(os.environ.get("VECTR_PROFILE_INTERVAL", "0.005"))  # seconds between stack samples
+
+PROFILE_HEADER = "HTTP_X_VECTR_PROFILE"  # X-Vectr-Profile, as found in the WSGI environ
+PROFILE_PARAM = "vectr_profile"
+
+PROFILE_NAME_PATTERN = re.compile(r"^[0-9TZ.-]+-\d+\.(pstats|collapsed)$")
+
+
+def _authorized(value):
+    """True if value is the configured token; nothing is authorized without one."""
+    if not value or not PROFILE_TOKEN:
+        return False
+    return hmac.compare_digest(value, PROFILE_TOKEN)
+
+
+def _trigger(environ):
+    if environ.get("PATH_INFO", "").startswith("/admin/profiles"):
+        return False  # The token on admin requests authenticates them; it doesn't ask for a profile
+    value = environ.get(PROFILE_HEADER) or parse_qs(environ.get("QUERY_STRING", "")).get(PROFILE_PARAM, [None])[0]
+    return _authorized(value)
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval from a background thread, into collapsed stacks."""
+
+    def __init__(self, thread_id, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self):
+        """'frame;frame;frame count' lines, the input format of flamegraph.pl and speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """A directory holding the most recent profiles ( data file + .json metadata each ), oldest removed first."""
+
+    def __init__(self, directory=PROFILE_DIR, keep=PROFILE_KEEP):
+        self.directory = directory
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+
+    def save(self, extension, write, metadata):
+        """Write a profile with write(path) and its metadata; returns the profile's file name."""
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S.%fZ")
+        name = f"{stamp}-{next(self._sequence)}.{extension}"
+        path = os.path.join(self.directory, name)
+        write(path)
+        with open(f"{path}.json", "w") as f:
+            json.dump(dict(metadata, name=name, size=os.path.getsize(path)), f)
+        self._trim()
+        return name
+
+    def _trim(self):
+        with self._lock:
+            for name in [entry["name"] for entry in self.list()][self.keep:]:
+                for path in (os.path.join(self.directory, name), os.path.join(self.directory, f"{name}.json")):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+    def list(self):
+        """Metadata of the stored profiles, newest first."""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if PROFILE_NAME_PATTERN.match(name):
+                try:
+                    with open(os.path.join(self.directory, f"{name}.json")) as f:
+                        entries.append(json.load(f))
+                except (OSError, ValueError):
+                    entries.append({"name": name})
+        return sorted(entries, key=lambda entry: entry["name"], reverse=True)
+
+
+class ProfilingMiddleware:
+    """WSGI middleware profiling the requests that carry the trigger; the others pass straight through."""
+
+    def __init__(self, wsgi_app, store, mode=PROFILE_MODE):
+        if mode not in ("cprofile", "sample"):
+            raise ValueError(f"Unknown VECTR_PROFILE_MODE: {mode!r} (expected cprofile or sample)")
+        self.wsgi_app = wsgi_app
+        self.store = store
+        self.mode = mode
+
+    def __call__(self, environ, start_response):
+        if not _trigger(environ):
+            return self.wsgi_app(environ, start_response)
+
+        status = []
+
+        def capture_status(status_line, headers, exc_info=None):
+            status.append(int(status_line.split(" ", 1)[0]))
+            return start_response(status_line, headers, exc_info)
+
+        if self.mode == "cprofile":
+            profiler = cProfile.Profile()
+            begin, end = profiler.enable, profiler.disable
+        else:
+            profiler = StackSampler(threading.get_ident())
+            begin, end = profiler.start, profiler.stop
+
+        started = time.perf_counter()
+        try:
+            begin()
+        except (ValueError, RuntimeError) as e:
+            # e.g. another profiler is already active in this thread
+            print(f"Not profiling {environ.get('PATH_INFO')}: {e}")
+            return self.wsgi_app(environ, start_response)
+        try:
+            body = self.wsgi_app(environ, capture_status)
+        except BaseException:
+            end()
+            self._save(profiler, environ, None, started)
+            raise
+
+        def finish():
+            end()
+            self._save(profiler, environ, status[0] if status else None, started)
+
+        return ProfiledBody(body, finish)
+
+    def _save(self, profiler, environ, status, started):
+        metadata = {
+            "method": environ.get("REQUEST_METHOD"),
+            "path": environ.get("PATH_INFO"),
+            "status": status,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "mode": self.mode,
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        try:
+            if self.mode == "cprofile":
+                name = self.store.save("pstats", profiler.dump_stats, metadata)
+            else:
+                def write(path):
+                    with open(path, "w") as f:
+                        f.write(profiler.collapsed())
+                name = self.store.save("collapsed", write, metadata)
+            print(f"Profiled {metadata['method']} {metadata['path']} ({metadata['duration_ms']} ms): {name}")
+        except OSError as e:
+            print(f"Could not save the profile of {metadata['path']}: {e}")
+
+
+class ProfiledBody:
+    """Response body that keeps the profiler running while it is iterated, and stops it when the server closes it."""
+
+    def __init__(self, body, finish):
+        self.body = body
+        self.finish = finish
+
+    def __iter__(self):
+        return iter(self.body)
+
+    def close(self):
+        try:
+            if hasattr(self.body, "close"):
+                self.body.close()
+        finally:
+            self.finish()
+
+
+def _admin_token():
+    return request.headers.get("X-Vectr-Profile") or request.args.get(PROFILE_PARAM)
+
+
+def install(app, store=None):
+    """
+    Add the profiling middleware and admin routes to a Flask app, if VECTR_PROFILING=1 and VECTR_PROFILE_TOKEN is
+    set; otherwise do nothing.
+    """
+    if not PROFILING_ENABLED:
+        return None
+    if not PROFILE_TOKEN:
+        print("Request profiling not enabled: VECTR_PROFILING=1 also requires VECTR_PROFILE_TOKEN")
+        return None
+
+    store = store or ProfileStore()
+    app.wsgi_app = ProfilingMiddleware(app.wsgi_app, store)
+
+    def list_profiles():
+        if not _authorized(_admin_token()):
+            abort(403)
+        return jsonify({"profiles": store.list()})
+
+    def get_profile(name):
+        if not _authorized(_admin_token()):
+            abort(403)
+        if not PROFILE_NAME_PATTERN.match(name) or not os.path.exists(os.path.join(store.directory, name)):
+            abort(404)
+
+        top = request.args.get("top", type=int)
+        if top and name.endswith(".pstats"):
+            report = io.StringIO()
+            pstats.Stats(os.path.join(store.directory, name), stream=report).sort_stats("cumulative").print_stats(top)
+            return Response(report.getvalue(), mimetype="text/plain")
+        return send_from_directory(os.path.abspath(store.directory), name, as_attachment=True)
+
+    app.add_url_rule("/admin/profiles", "list_profiles", list_profiles)
+    app.add_url_rule("/admin/profiles/<name>", "get_profile", get_profile)
+    print(f"Request profiling enabled ({PROFILE_MODE}); profiles are kept in {os.path.abspath(store.directory)}")
+    return store
@@ -0,0 +1,267 @@
+"""
+Market-data providers: everything Vectr asks of an upstream data source goes through one of these.
+
+- YFinanceProvider ( default ): live data from yfinance.
+- RecordingProvider: wraps another provider and saves every response under a directory.
+- ReplayProvider: serves a recorded directory back, offline, with optional artificial latency.
+
+The active provider is chosen with VECTR_DATA_PROVIDER:
+
+    yfinance                ( default )
+    record:<directory>      live yfinance data, also written to <directory>
+    replay:<directory>      recorded data only; VECTR_REPLAY_LATENCY / VECTR_REPLAY_JITTER add a delay ( seconds )
+                            to every call, so timings are reproducible without the network's noise
+"""
+import os
+import pickle
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import pandas as pd
+import yfinance as yf
+
+import metrics
+
+TICKER_CACHE_SIZE = 64  # symbols whose yf.Ticker YFinanceProvider keeps between options() and option_chain()
+
+
+class MarketDataProvider(ABC):
+    """
+    Interface of a market-data source. Symbols are upper-case tickers; dates are 'YYYY-MM-DD' strings.
+    """
+
+    @abstractmethod
+    def options(self, symbol):
+        """Expiration dates of the symbol's listed options ( a tuple, empty if there are none )."""
+
+    @abstractmethod
+    def option_chain(self, symbol, date):
+        """Calls and puts of one expiration, as a ( calls DataFrame, puts DataFrame ) tuple."""
+
+    @abstractmethod
+    def history(self, symbol, period=None, start=None):
+        """Daily bars ( yfinance's history() frame ), for a period such as "2d" / "max" or from a start date."""
+
+    @abstractmethod
+    def info(self, symbol):
+        """Company information ( yfinance's info dict, e.g. longName )."""
+
+
+class YFinanceProvider(MarketDataProvider):
+    """
+    Live data from yfinance.
+    option_chain() reuses the yf.Ticker of the last options() call for that symbol: yfinance maps dates to its own
+    expiration ids on that object, and a fresh Ticker would download the expiration list again for every date.
+    Only the most recently used max_tickers symbols keep theirs, so symbols asked for once don't pile up.
+
+    + Parameters:
+    max_tickers (int): Number of symbols whose yf.Ticker is kept; enough for the chains fetched at the same time.
+    """
+
+    def __init__(self, max_tickers=TICKER_CACHE_SIZE):
+        self.max_tickers = max_tickers
+        self._tickers = OrderedDict()  # symbol -> yf.Ticker of the latest options() call, least recently used first
+        self._lock = threading.Lock()
+
+    def options(self, symbol):
+        stock = yf.Ticker(symbol)
+        with self._lock:
+            self._tickers[symbol] = stock
+            self._tickers.move_to_end(symbol)
+            while len(self._tickers) > self.max_tickers:
+                self._tickers.popitem(last=False)
+        return tuple(stock.options)
+
+    def option_chain(self, symbol, date):
+        with self._lock:
+            stock = self._tickers.get(symbol)
+            if stock is not None:
+                self._tickers.move_to_end(symbol)
+        if stock is None:
+            stock = yf.Ticker(symbol)
+        chain = stock.option_chain(date)
+        return chain.calls, chain.puts
+
+    def history(self, symbol, period=None, start=None):
+        stock = yf.Ticker(symbol)
+        return stock.history(start=start) if start is not None else stock.history(period=period)
+
+    def info(self, symbol):
+        return yf.Ticker(symbol).info
+
+
+def _recording_name(method, *args):
+    """File name of a recorded call, e.g. option_chain_2025-01-17.pkl or history_period-max.pkl"""
+    parts = [method] + [re.sub(r"[^A-Za-z0-9.-]+", "-", str(arg)) for arg in args if arg is not None]
+    return "_".join(parts) + ".pkl"
+
+
+def _history_args(period, start):
+    return (f"start-{start}",) if start is not None else (f"period-{period}",)
+
+
+class RecordingProvider(MarketDataProvider):
+    """
+    Pass every call through to another provider and save its response as <directory>/<SYMBOL>/<call>.pkl,
+    overwriting older recordings of the same call.
+    """
+
+    def __init__(self, directory, inner=None):
+        self.directory = directory
+        self.inner = inner or YFinanceProvider()
+
+    def _save(self, symbol, name, value):
+        folder = os.path.join(self.directory, symbol.upper())
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, name)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        return value
+
+    def options(self, symbol):
+        return self._save(symbol, _recording_name("options"), self.inner.options(symbol))
+
+    def option_chain(self, symbol, date):
+        return self._save(symbol, _recording_name("option_chain", date), self.inner.option_chain(symbol, date))
+
+    def history(self, symbol, period=None, start=None):
+        return self._save(symbol, _recording_name("history", *_history_args(period, start)),
+                          self.inner.history(symbol, period=period, start=start))
+
+    def info(self, symbol):
+        return self._save(symbol, _recording_name("info"), self.inner.info(symbol))
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Serve responses saved by RecordingProvider, without any network access.
+
+    + Parameters:
+    directory (str): Recording directory.
+    latency (float): Seconds every call waits before answering, to stand in for the network.
+    jitter (float): Up to this many extra seconds ( uniformly random, seeded ) per call.
+    seed (int): Seed of the jitter, so a replay's timings are repeatable.
+
+    A call that wasn't recorded raises LookupError. history(start=...) falls back to the recorded full history
+    ( period "max" ) cut at the start date, since incremental price syncs ask for a different start every day.
+    """
+
+    def __init__(self, directory, latency=0.0, jitter=0.0, seed=0):
+        self.directory = directory
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _delay(self):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _load(self, symbol, name):
+        path = os.path.join(self.directory, symbol.upper(), name)
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            raise LookupError(f"No recording of {name[:-4]} for {symbol} in {self.directory}") from None
+
+    def options(self, symbol):
+        self._delay()
+        return self._load(symbol, _recording_name("options"))
+
+    def option_chain(self, symbol, date):
+        self._delay()
+        calls, puts = self._load(symbol, _recording_name("option_chain", date))
+        return calls.copy(), puts.copy()
+
+    def history(self, symbol, period=None, start=None):
+        self._delay()
+        try:
+            return self._load(symbol, _recording_name("history", *_history_args(period, start))).copy()
+        except LookupError:
+            if start is None and period == "max":
+                raise
+        full = self._load(symbol, _recording_name("history", "period-max"))
+        if start is not None:
+            dates = full.index.tz_localize(None) if full.index.tz is not None else full.index
+            return full[dates >= pd.Timestamp(start)].copy()
+        return full.iloc[-int(period[:-1]):].copy() if re.fullmatch(r"\d+d", period or "") else full.copy()
+
+    def info(self, symbol):
+        self._delay()
+        return dict(self._load(symbol, _recording_name("info")))
+
+
+class InstrumentedProvider(MarketDataProvider):
+    """
+    Count and time every call to another provider ( vectr_upstream_calls_total / vectr_upstream_seconds, see
+    metrics.py ). get_provider() always hands out the active provider wrapped in one of these.
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.source = type(inner).__name__
+
+    def options(self, symbol):
+        with metrics.upstream_call(self.source, "options"):
+            return self.inner.options(symbol)
+
+    def option_chain(self, symbol, date):
+        with metrics.upstream_call(self.source, "option_chain"):
+            return self.inner.option_chain(symbol, date)
+
+    def history(self, symbol, period=None, start=None):
+        with metrics.upstream_call(self.source, "history"):
+            return self.inner.history(symbol, period=period, start=start)
+
+    def info(self, symbol):
+        with metrics.upstream_call(self.source, "info"):
+            return self.inner.info(symbol)
+
+
+def provider_from_env(environ=None):
+    """Build the provider selected by VECTR_DATA_PROVIDER ( see the module docstring )."""
+    environ = os.environ if environ is None else environ
+    setting = environ.get("VECTR_DATA_PROVIDER", "yfinance")
+    kind, _, directory = setting.partition(":")
+
+    if kind == "yfinance":
+        return YFinanceProvider()
+    if kind == "record" and directory:
+        return RecordingProvider(directory)
+    if kind == "replay" and directory:
+        return ReplayProvider(directory,
+                              latency=float(environ.get("VECTR_REPLAY_LATENCY", "0")),
+                              jitter=float(environ.get("VECTR_REPLAY_JITTER", "0")))
+    raise ValueError(f"Unknown VECTR_DATA_PROVIDER: {setting!r} (expected yfinance, record:<dir> or replay:<dir>)")
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    """The process-wide provider ( instrumented ), built from the environment on first use."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = InstrumentedProvider(provider_from_env())
+    return _provider
+
+
+def set_provider(provider):
+    """Replace the process-wide provider ( e.g. with a stub in benchmarks ); returns the previous one."""
+    global _provider
+    with _provider_lock:
+        previous, _provider = _provider, InstrumentedProvider(provider)
+    return previous.inner if previous is not None else None
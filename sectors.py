@@ -1,60 +1,232 @@
-import yfinance as yf
+import re
+import json
+import time
+import hashlib
+import threading
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-
-def get_etf_performance(etfs):
-    performance = {}
-    today = datetime.today().date()
-
-    # Define time intervals
-    timeframes = {
-        "1-day": today - timedelta(days=1),
-        "1-week": today - timedelta(weeks=1),
-        "1-month": today - timedelta(days=30),
-        "3-month": today - timedelta(days=90),
-        "year-to-date": datetime(today.year, 1, 1).date(),
-        "1-year": today - timedelta(days=365),
-        "5-year": today - timedelta(days=1825),
-        "max": None,  # Special case for max performance
-    }
+from datetime import datetime, timedelta, timezone
+from price_store import PriceStore
+from metrics import span
 
+# Daily bars are synced incrementally into a local store instead of downloading period="max" every time
+price_store = PriceStore()
+
+# Sector ETFs shown on the sectors page
+SECTOR_ETFS = ["XLRE", "XLE", "XLU", "XLK", "XLB", "XLP", "XLY", "XLI", "XLC", "XLV", "XLF", "XBI"]
+
+# Timeframes shown on the sectors page
+TIMEFRAMES = ["1-day", "1-week", "1-month", "3-month", "year-to-date", "1-year", "5-year", "max"]
+
+# Custom lookbacks are written as "<n>-<unit>", e.g. "2-week" or "6-month" ( a month is 30 days, a year 365 )
+LOOKBACK_UNITS = {"day": 1, "week": 7, "month": 30, "year": 365}
+LOOKBACK_PATTERN = re.compile(r"^(\d+)-(day|week|month|year)s?$")
+
+
+def timeframe_start(label, today):
+    """
+    Return the date a timeframe is measured from, or None for "max" ( the first available close ).
+    Raises ValueError for labels that are neither "year-to-date", "max" nor a "<n>-<unit>" lookback.
+    """
+    if label == "max":
+        return None
+    if label == "year-to-date":
+        return datetime(today.year, 1, 1).date()
+
+    match = LOOKBACK_PATTERN.match(label)
+    if not match:
+        raise ValueError(f"Unknown timeframe: {label}")
+    return today - timedelta(days=int(match.group(1)) * LOOKBACK_UNITS[match.group(2)])
+
+
+def build_price_panel(histories):
+    """
+    Align the closes of several symbols on one sorted date index ( one column per symbol ).
+    Dates a symbol didn't trade on are NaN in its column.
+    """
+    panel = pd.concat({symbol: history["Close"] for symbol, history in histories.items()}, axis=1)
+    return panel.sort_index()
+
+
+def compute_returns(panel, labels, today=None):
+    """
+    Percentage change from each timeframe's start to the latest close, for every symbol at once.
+
+    Each start date is located with a binary search ( np.searchsorted ) over the panel's sorted dates, taking
+    the nearest close on or before it, the same as scanning the history for the latest date <= start.
+
+    + Returns:
+    ndarray: shape ( len(labels), number of columns ), rounded to 2 decimals; NaN where no close is available.
+    """
+    if today is None:
+        today = datetime.today().date()
+
+    dates = panel.index.to_numpy(dtype="datetime64[D]")
+    closes = panel.ffill().to_numpy(dtype=float)  # Forward fill = "nearest close on or before" for every date
+    latest = closes[-1]
+    first = panel.bfill().to_numpy(dtype=float)[0]  # First available close per symbol ( "max" )
+
+    starts = [timeframe_start(label, today) for label in labels]
+    targets = np.array([start if start is not None else today for start in starts], dtype="datetime64[D]")
+    positions = np.searchsorted(dates, targets, side="right") - 1
+
+    previous = np.where((positions >= 0)[:, None], closes[np.clip(positions, 0, None)], np.nan)
+    is_max = np.array([start is None for start in starts])
+    previous[is_max] = first
+
+    previous[previous == 0] = np.nan  # A zero close can't be used as a base
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = (latest - previous) / previous * 100
+    return np.round(returns, 2)
+
+
+def load_price_panel(etfs, persist=True):
+    """
+    Sync the ETFs' price history and align their closes in one panel.
+    persist=False serves one-off lookups without adding them to the price store.
+
+    + Returns:
+    tuple: ( panel DataFrame or None if nothing could be loaded, list of ETFs without data )
+    """
+    # Bring the local price history up to date ( only missing bars are downloaded )
+    with span("sector_price_sync"):
+        histories = price_store.sync_many(etfs, persist=persist)
+
+    available, missing = {}, []
     for etf in etfs:
-        try:
-            # Fetch historical data
-            data = yf.Ticker(etf).history(period="max")
-            if data.empty:
-                raise ValueError(f"No price data found for {etf}. Symbol may be delisted or unavailable.")
-
-            data.index = pd.to_datetime(data.index).date  # Ensure the index is in date format
-            latest_close = data["Close"].iloc[-1]
-
-            etf_performance = {}
-            for label, date in timeframes.items():
-                if date is not None:
-                    # Find the nearest date before or on the target date
-                    nearest_date = max([d for d in data.index if d <= date], default=None)
-                    if nearest_date is not None:
-                        previous_close = data.loc[nearest_date, "Close"]
-                    else:
-                        previous_close = None
-                else:  # Max performance
-                    previous_close = data["Close"].iloc[0]
-
-                # Calculate performance if valid data is found
-                if previous_close:
-                    performance_change = ((latest_close - previous_close) / previous_close) * 100
-                    etf_performance[label] = round(performance_change, 2)
-                else:
-                    etf_performance[label] = "N/A"
-
-            performance[etf] = etf_performance
-        except Exception as e:
-            # Log the error and display a user-friendly message
-            print(f"{etf}: {e}")
-            performance[etf] = {"error": "Data not available"}
+        data = histories[etf]
+        if isinstance(data, Exception) or data.empty:
+            # Log the error; the ETF is reported as unavailable
+            print(f"{etf}: {data if isinstance(data, Exception) else 'No price data found.'}")
+            missing.append(etf)
+        else:
+            available[etf] = data
+
+    return (build_price_panel(available) if available else None), missing
+
+
+@span("sector_returns")
+def performance_from_panel(panel, etfs, timeframes, today=None):
+    """Format compute_returns() output as {etf: {timeframe: percent or "N/A"}} ( {"error": ...} without data )."""
+    performance = {etf: {"error": "Data not available"} for etf in etfs}
+
+    if panel is not None:
+        columns = [etf for etf in etfs if etf in panel.columns]
+        returns = compute_returns(panel[columns], timeframes, today)
+        for column, etf in enumerate(columns):
+            performance[etf] = {
+                label: "N/A" if np.isnan(value) else float(value)
+                for label, value in zip(timeframes, returns[:, column])
+            }
 
     return performance
 
+
+def get_etf_performance(etfs, timeframes=None, persist=True):
+    """
+    Performance of each ETF over each timeframe, as {etf: {timeframe: percent or "N/A"}}.
+    ETFs whose prices can't be loaded map to {"error": "Data not available"}.
+
+    + Parameters:
+    etfs (list): Symbols to report on.
+    timeframes (list): Timeframe labels ( defaults to TIMEFRAMES ); custom "<n>-<unit>" lookbacks are accepted.
+    persist (bool): Keep the downloaded prices in the price store; False for one-off lookups.
+    """
+    if timeframes is None:
+        timeframes = TIMEFRAMES
+    for label in timeframes:
+        timeframe_start(label, datetime.today().date())  # Reject unknown labels before touching the network
+
+    panel, _ = load_price_panel(etfs, persist)
+    return performance_from_panel(panel, etfs, timeframes)
+
+
+class PerformanceMatrix:
+    """An immutable, precomputed ETF x timeframe performance table plus the price panel it came from."""
+    __slots__ = ("etfs", "timeframes", "performance", "panel", "etag", "last_modified")
+
+    def __init__(self, etfs, timeframes, performance, panel, etag, last_modified):
+        self.etfs = etfs
+        self.timeframes = timeframes
+        self.performance = performance
+        self.panel = panel
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def custom(self, etfs, label):
+        """Compute a custom lookback from the stored panel ( no network, one binary search per timeframe )."""
+        return performance_from_panel(self.panel, etfs, [label])
+
+
+class PerformanceSnapshot:
+    """
+    Background-refreshed PerformanceMatrix for a fixed set of ETFs, so the performance endpoints only read it.
+
+    + Parameters:
+    etfs (list): Symbols in the matrix.
+    refresh_interval (float): Seconds between recomputations.
+    shared (SharedCache): Store shared with the other worker processes, or None. With it, one worker computes
+                          the matrix per refresh_interval and the others take it from the store.
+    """
+
+    def __init__(self, etfs, refresh_interval=300, shared=None):
+        self.etfs = list(etfs)
+        self.refresh_interval = refresh_interval
+        self.shared = shared
+        self._matrix = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def refresh(self):
+        """Recompute the matrix ( or take the one another worker stored, if fresh ) and make it current."""
+        if self.shared is None:
+            self._matrix = self._compute()
+        else:
+            self._matrix, _, _ = self.shared.get_or_load("performance", tuple(self.etfs), self._compute,
+                                                         self.refresh_interval)
+        return self._matrix
+
+    @span("sector_snapshot")
+    def _compute(self):
+        """A new matrix; the ETag and Last-Modified only change when the numbers do."""
+        panel, _ = load_price_panel(self.etfs)
+        performance = performance_from_panel(panel, self.etfs, TIMEFRAMES)
+        etag = hashlib.sha1(json.dumps(performance, sort_keys=True).encode()).hexdigest()
+
+        previous = self._matrix
+        last_modified = previous.last_modified if previous is not None and previous.etag == etag \
+            else datetime.now(timezone.utc).replace(microsecond=0)
+        return PerformanceMatrix(self.etfs, TIMEFRAMES, performance, panel, etag, last_modified)
+
+    def get(self):
+        """Return the current matrix, computing it on the first call and starting the refresher."""
+        matrix = self._matrix
+        if matrix is None:
+            with self._lock:
+                matrix = self._matrix or self.refresh()
+        self.start()
+        return matrix
+
+    def peek(self):
+        """Return the current matrix without computing it, or None before the first refresh."""
+        return self._matrix
+
+    def start(self):
+        """Start the daemon thread that keeps the matrix fresh ( once per process )."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="performance-snapshot", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Performance snapshot refresh failed: {e}")
+
+
 if __name__ == "__main__":
-    etfs = ["XLRE", "XLE", "XLU", "XLK", "XLB", "XLP", "XLY", "XLI", "XLC", "XLV", "XLF", "XBI"]
-    print(get_etf_performance(etfs))
+    print(get_etf_performance(SECTOR_ETFS))
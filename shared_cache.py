@@ -0,0 +1,179 @@
+"""
+Cache shared by the worker processes of one host, kept in a SQLite file ( VECTR_SHARED_CACHE=<path> ).
+
+Each worker process has its own in-memory caches ( see chain_cache.py ). With this store behind them, a chain
+snapshot, chain summary or sector performance matrix loaded by one worker is reused by the others, and a lease
+lets only one worker load a given key at a time while the others wait for its result: single-flight across
+processes, as SnapshotCache does across threads. The same leases keep the workers from refreshing the holdings
+files together.
+
+Values are pickled, so the file must only be writable by the app itself. WAL mode lets every worker read while
+one of them writes. Entries expire with the TTL they were stored with; beyond VECTR_SHARED_CACHE_MB, the oldest
+ones are removed first.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+SHARED_CACHE_PATH = os.environ.get("VECTR_SHARED_CACHE", "")  # Empty: every process keeps its own caches
+SHARED_CACHE_MAX_BYTES = int(os.environ.get("VECTR_SHARED_CACHE_MB", "512")) * 1024 * 1024
+LEASE_TIMEOUT = 120.0  # seconds a load may hold its lease before another process takes over
+POLL_INTERVAL = 0.05  # seconds between checks while waiting for another process's load
+PURGE_EVERY = 64  # writes between removals of expired entries
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS entries_stored_at ON entries (stored_at);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class SharedCache:
+    """
+    Pickled values with an expiry time per ( namespace, key ), plus named leases, in one SQLite file.
+
+    + Parameters:
+    path (str): The SQLite file; created with its directory if missing.
+    max_bytes (int): Size budget of the stored values; the oldest entries are removed beyond it.
+    lease_timeout (float): Seconds after which a lease is considered abandoned ( its holder died or hangs ).
+    poll_interval (float): Seconds between checks while waiting for another process's load.
+    """
+
+    def __init__(self, path, max_bytes=SHARED_CACHE_MAX_BYTES, lease_timeout=LEASE_TIMEOUT,
+                 poll_interval=POLL_INTERVAL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lease_timeout = lease_timeout
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        self._writes = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self):
+        """This thread's connection; a process forked from another ( a preloaded worker ) opens its own."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)  # Autocommit
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    def get(self, namespace, key):
+        """( value, expiry epoch time ) of a fresh entry, else None."""
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM entries WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (namespace, repr(key), time.time())).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(row[0]), row[1]
+
+    def put(self, namespace, key, value, ttl):
+        """Store a value for ttl seconds; returns its expiry epoch time."""
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO entries (namespace, key, value, size, stored_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)", (namespace, repr(key), data, len(data), now, now + ttl))
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            self.purge()
+        return now + ttl
+
+    def invalidate(self, namespace, key):
+        self._connection().execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, repr(key)))
+
+    def purge(self):
+        """Remove expired entries, then the oldest ones while the store is over its size budget."""
+        connection = self._connection()
+        connection.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        oldest = connection.execute("SELECT namespace, key, size FROM entries ORDER BY stored_at").fetchall()
+        for namespace, key, size in oldest:
+            if total <= self.max_bytes:
+                break
+            connection.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+            total -= size
+
+    def acquire(self, name, timeout=None):
+        """Take the lease name unless another holder's is still valid; returns an owner token, or None."""
+        owner = f"{os.getpid()}-{uuid.uuid4().hex}"
+        now = time.time()
+        cursor = self._connection().execute(
+            "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+            "WHERE leases.expires_at <= ?", (name, owner, now + (timeout or self.lease_timeout), now))
+        return owner if cursor.rowcount == 1 else None
+
+    def release(self, name, owner):
+        self._connection().execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+
+    @contextmanager
+    def lease(self, name, timeout=None):
+        """Hold the lease name for the with block, if it is free; yields whether it was acquired."""
+        owner = self.acquire(name, timeout)
+        try:
+            yield owner is not None
+        finally:
+            if owner is not None:
+                self.release(name, owner)
+
+    def get_or_load(self, namespace, key, loader, ttl):
+        """
+        ( value, expiry epoch time, loaded ) for a key: the stored value if fresh, else loader()'s, stored for ttl
+        seconds. While another process holds the key's lease, wait for its value instead of loading it too.
+        loaded is True if this call ran the loader. Exceptions raised by the loader are propagated and not stored;
+        a waiting process then loads the key itself.
+        """
+        lease_name = f"load:{namespace}:{key!r}"
+        while True:
+            found = self.get(namespace, key)
+            if found is not None:
+                return found + (False,)
+
+            owner = self.acquire(lease_name)
+            if owner is None:
+                time.sleep(self.poll_interval)
+                continue
+            try:
+                found = self.get(namespace, key)  # Stored between the first check and the lease
+                if found is not None:
+                    return found + (False,)
+                value = loader()
+                try:
+                    expires_at = self.put(namespace, key, value, ttl)
+                except (sqlite3.Error, pickle.PicklingError, TypeError, AttributeError) as e:
+                    print(f"Could not store {namespace} {key!r} in the shared cache: {e}")
+                    expires_at = time.time() + ttl
+                return value, expires_at, True
+            finally:
+                self.release(lease_name, owner)
+
+    def stats(self):
+        entries, size = self._connection().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"path": os.path.abspath(self.path), "entries": entries, "bytes": size, "max_bytes": self.max_bytes}
+
+
+def from_environment():
+    """The SharedCache at VECTR_SHARED_CACHE, or None when it isn't set."""
+    return SharedCache(SHARED_CACHE_PATH) if SHARED_CACHE_PATH else None